@@ -0,0 +1,209 @@
+"""asyncio runtime for the controller.
+
+Usage::
+
+    py -3 controller.py --async
+
+Log tailing, RCON, outbound chat and timers run as cooperating tasks on one
+event loop.  The controller's handlers stay synchronous: ``rcon()`` and
+``say()`` only enqueue, commands whose output matters go through
+``rcon_query()`` with a callback, and one RCON task sends everything that
+has queued up as a single pipelined batch.  A slow RCON server therefore
+delays chat, never the handling of the next log line.
+
+Each ``AsyncRuntime`` owns one controller and one RCON connection, so
+several servers can share a process by running several runtimes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from chat_queue import ChatQueue
+from controller import IDLE_WAKE_SECONDS, Controller, data_files
+from log_follower import LogDirIndex
+from rcon_utils import AsyncRconSession
+from runtime_config import RuntimeConfig
+from state import MatchState
+
+logger = logging.getLogger(__name__)
+
+# How long shutdown waits for queued chat and RCON commands to go out.
+DRAIN_TIMEOUT_SECONDS = 5.0
+
+_Batch = Tuple[List[str], Optional[Callable[[List[Optional[str]]], None]]]
+
+
+class AsyncRuntime:
+    """Run one controller against one server on the current event loop."""
+
+    def __init__(
+        self,
+        settings: RuntimeConfig,
+        rcon_session: AsyncRconSession,
+        state: Optional[MatchState] = None,
+        log_index: Optional[LogDirIndex] = None,
+    ) -> None:
+        self.rcon_session = rcon_session
+        self._rcon_queue: "asyncio.Queue[_Batch]" = asyncio.Queue()
+        self._chat_wake = asyncio.Event()
+        self._timer_wake = asyncio.Event()
+        self._stop = asyncio.Event()
+        # follower.wait() blocks in select(); it gets its own thread so the
+        # follower is closed only after the last wait has returned.
+        self._wait_executor = ThreadPoolExecutor(1, thread_name_prefix="log-wait")
+        self.outbox = ChatQueue(
+            self._send_say,
+            max_size=settings.chat_queue_size,
+            rate_per_second=settings.chat_rate_per_second,
+            commentary_max_age=settings.commentary_max_age_seconds,
+            on_put=self._chat_wake.set,
+        )
+        self.controller = Controller(
+            self.submit,
+            self._send_say,
+            state or MatchState(),
+            settings=settings,
+            rcon_many_func=self.submit_many,
+            outbox=self.outbox,
+            rcon_query_func=self.query,
+        )
+        if log_index is not None:
+            self.controller.log_index = log_index
+
+    # -- callables handed to the controller (never block) ---------------
+
+    def submit(self, cmd: str) -> None:
+        self._rcon_queue.put_nowait(([cmd], None))
+
+    def submit_many(self, commands: List[str]) -> List[Optional[str]]:
+        self._rcon_queue.put_nowait((list(commands), None))
+        return [None] * len(commands)
+
+    def query(self, cmd: str, callback: Callable[[Optional[str]], None]) -> None:
+        self._rcon_queue.put_nowait(([cmd], lambda outputs: callback(outputs[0])))
+
+    def _send_say(self, message: str) -> None:
+        safe = message.replace('"', "'")
+        self.submit(f'say "{safe}"')
+
+    # -- tasks ------------------------------------------------------------
+
+    async def _log_task(self) -> None:
+        controller = self.controller
+        follower = controller.follower
+        assert follower is not None
+        while True:
+            if follower.refresh():
+                controller.current_log_path = follower.current_path
+                logger.info("ログ監視切り替え: %s", controller.current_log_path)
+            if follower.current_path is None:
+                await asyncio.sleep(IDLE_WAKE_SECONDS)
+                continue
+            lines = follower.read_lines()
+            if not lines:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self._wait_executor, follower.wait, IDLE_WAKE_SECONDS)
+                continue
+            controller.handle_lines(lines)
+            # Handlers may have scheduled timers.
+            self._timer_wake.set()
+
+    async def _timer_task(self) -> None:
+        scheduler = self.controller.scheduler
+        while True:
+            scheduler.run_due()
+            delay = scheduler.next_delay()
+            self._timer_wake.clear()
+            try:
+                await asyncio.wait_for(
+                    self._timer_wake.wait(), IDLE_WAKE_SECONDS if delay is None else delay
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _chat_task(self) -> None:
+        while True:
+            if self.outbox.send_next():
+                continue
+            delay = self.outbox.next_send_delay()
+            if delay is None:
+                self._chat_wake.clear()
+                await self._chat_wake.wait()
+            else:
+                await asyncio.sleep(delay)
+
+    async def _rcon_task(self) -> None:
+        while True:
+            batches = [await self._rcon_queue.get()]
+            while not self._rcon_queue.empty():
+                batches.append(self._rcon_queue.get_nowait())
+            commands = [cmd for batch_commands, _ in batches for cmd in batch_commands]
+            try:
+                outputs: List[Optional[str]] = list(await self.rcon_session.run_many(commands))
+            except Exception as e:
+                logger.exception("RCON ERROR: %s", e)
+                outputs = [None] * len(commands)
+            offset = 0
+            for batch_commands, callback in batches:
+                chunk = outputs[offset:offset + len(batch_commands)]
+                offset += len(batch_commands)
+                if callback is not None:
+                    try:
+                        callback(chunk)
+                    except Exception:
+                        logger.exception("RCON callback failed")
+                self._rcon_queue.task_done()
+            self._timer_wake.set()
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    async def run(self) -> None:
+        """Run until stop(), then flush chat and RCON."""
+        self.controller.start()
+        workers = [
+            asyncio.create_task(self._rcon_task(), name="rcon"),
+            asyncio.create_task(self._chat_task(), name="chat"),
+        ]
+        producers = [
+            asyncio.create_task(self._log_task(), name="log"),
+            asyncio.create_task(self._timer_task(), name="timers"),
+        ]
+        try:
+            await self._stop.wait()
+        finally:
+            for task in producers:
+                task.cancel()
+            await asyncio.gather(*producers, return_exceptions=True)
+            try:
+                await asyncio.wait_for(self._drain(), DRAIN_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning("未送信のチャット/RCON を残して終了します")
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await asyncio.to_thread(self._wait_executor.shutdown, True)
+            if self.controller.follower is not None:
+                self.controller.follower.close()
+            await self.rcon_session.close()
+            logger.info("chat queue: %s", self.outbox.summary())
+
+    async def _drain(self) -> None:
+        while self.outbox.depth:
+            await asyncio.sleep(0.01)
+        await self._rcon_queue.join()
+
+
+async def run_async(settings: RuntimeConfig) -> None:
+    """Entry point for ``controller.py --async``."""
+    from config import RCON_HOST, RCON_PASSWORD, RCON_PORT
+
+    runtime = AsyncRuntime(settings, AsyncRconSession(RCON_HOST, RCON_PORT, RCON_PASSWORD))
+    with data_files(settings):
+        await runtime.run()
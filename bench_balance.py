@@ -0,0 +1,78 @@
+"""Benchmark team balancing: itertools.combinations vs team_balance.
+
+Usage::
+
+    py -3 bench_balance.py [--players 8 10 12 14 16 20] [--top 8]
+
+``itertools`` is the scan smart_shuffle_balanced used to run: every
+combination of half the roster, summing ratings per candidate.  It is
+skipped above 16 players (C(20, 10) candidates take minutes).  ``numpy``
+is only shown when NumPy is installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import team_balance
+from team_balance import best_split, top_splits
+
+ITERTOOLS_MAX_PLAYERS = 16
+
+
+def itertools_split(players: List[str], rating: Callable[[str], int]) -> Tuple[List[str], List[str]]:
+    best_diff = float("inf")
+    best: Tuple[List[str], List[str]] = ([], [])
+    n = len(players)
+    for i in range(n // 2, n // 2 + 2):
+        for team1 in itertools.combinations(players, i):
+            team2 = [p for p in players if p not in team1]
+            diff = abs(sum(rating(p) for p in team1) - sum(rating(p) for p in team2))
+            if diff < best_diff:
+                best_diff = diff
+                best = (list(team1), team2)
+    return best
+
+
+def timed(func: Callable[[], object], repeat: int) -> float:
+    """Return the best wall time of ``repeat`` runs, in ms."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1e3
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, nargs="+", default=[8, 10, 12, 14, 16, 20])
+    parser.add_argument("--top", type=int, default=team_balance.TOP_K)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    print(f"{'players':>7} {'itertools':>11} {'best':>9} {'top-k':>9} {'numpy':>9}")
+    for n in args.players:
+        ratings: Dict[str, int] = {f"P{i}": rng.randint(700, 1400) for i in range(n)}
+        players = list(ratings)
+        rating = ratings.__getitem__
+
+        old = "-"
+        if n <= ITERTOOLS_MAX_PLAYERS:
+            old = f"{timed(lambda: itertools_split(players, rating), 1):.2f}"
+        best = timed(lambda: best_split(players, rating), args.repeat)
+        top = timed(lambda: top_splits(players, rating, args.top), args.repeat)
+        vectorized = "-"
+        if team_balance.np is not None and n <= team_balance.NUMPY_MAX_PLAYERS:
+            vectorized = f"{timed(lambda: top_splits(players, rating, args.top, use_numpy=True), args.repeat):.2f}"
+        print(f"{n:>7} {old:>11} {best:>9.2f} {top:>9.2f} {vectorized:>9}")
+    print("ms per split; top-k and numpy return the best", args.top, "splits")
+
+
+if __name__ == "__main__":
+    main()
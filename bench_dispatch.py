@@ -0,0 +1,186 @@
+"""Benchmark log line dispatch: sequential regex scan vs keyword classifier.
+
+Usage::
+
+    py -3 bench_dispatch.py [path/to/server.log] [--repeat N]
+
+Without a path a synthetic 24-round match log with a realistic mix of
+buy/damage/grenade/kill/chat/JSON lines is generated.  Handlers are replaced
+by no-ops so only classification, regex matching and event construction
+are measured.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, List, Optional
+
+import events as ev
+from controller import Controller
+from runtime_config import RuntimeConfig
+from state import MatchState
+
+PLAYERS = [
+    ("alice", 2, "[U:1:1001]"), ("bob", 3, "[U:1:1002]"), ("carol", 4, "[U:1:1003]"),
+    ("dave", 5, "[U:1:1004]"), ("erin", 6, "[U:1:1005]"), ("frank", 7, "[U:1:1006]"),
+    ("grace", 8, "[U:1:1007]"), ("heidi", 9, "[U:1:1008]"), ("ivan", 10, "[U:1:1009]"),
+    ("judy", 11, "[U:1:1010]"),
+]
+WEAPONS = ["ak47", "m4a1_silencer", "awp", "glock", "usp_silencer", "deagle", "mp9", "famas"]
+
+
+def synthetic_match_log(rounds: int = 24, seed: int = 7) -> List[str]:
+    """Build a plausible CS2 match log as a list of lines (no newlines)."""
+    rng = random.Random(seed)
+    lines: List[str] = []
+    clock = [0]
+
+    def stamp() -> str:
+        clock[0] += 1
+        minutes, seconds = divmod(clock[0], 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"L 01/03/2026 - {18 + hours:02d}:{minutes:02d}:{seconds:02d}: "
+
+    def tag(index: int) -> str:
+        name, uid, sid = PLAYERS[index]
+        team = "CT" if index < 5 else "TERRORIST"
+        return f'"{name}<{uid}><{sid}><{team}>"'
+
+    lines.append(stamp() + 'Loading map "de_mirage"')
+    for i, (name, uid, sid) in enumerate(PLAYERS):
+        lines.append(stamp() + f'"{name}<{uid}><{sid}><>" connected, address ""')
+        team = "CT" if i < 5 else "TERRORIST"
+        lines.append(stamp() + f'"{name}<{uid}><{sid}><Unassigned>" joined team "{team}"')
+    for _ in range(40):
+        lines.append(stamp() + f'server cvar "mp_{rng.randint(0, 999)}" = "{rng.randint(0, 9)}"')
+
+    for round_number in range(1, rounds + 1):
+        lines.append(stamp() + 'World triggered "Round_Start"')
+        lines.append(stamp() + "Starting Freeze period")
+        for i in range(10):
+            for _ in range(rng.randint(2, 5)):
+                lines.append(stamp() + f'{tag(i)} purchased "{rng.choice(WEAPONS)}"')
+                lines.append(stamp() + f'{tag(i)} money change 4000-2700 = $1300 (tracked) (purchase: weapon_ak47)')
+            lines.append(stamp() + f'{tag(i)} left buyzone with [ weapon_knife weapon_glock ]')
+        for _ in range(rng.randint(60, 120)):
+            a, b = rng.randrange(10), rng.randrange(10)
+            kind = rng.random()
+            if kind < 0.55:
+                lines.append(
+                    stamp() + f'{tag(a)} [1 2 3] attacked {tag(b)} [4 5 6] with "{rng.choice(WEAPONS)}" '
+                    f'(damage "27") (damage_armor "3") (health "73") (armor "97") (hitgroup "chest")'
+                )
+            elif kind < 0.75:
+                lines.append(stamp() + f'{tag(a)} threw smokegrenade [1 2 3]')
+            elif kind < 0.85:
+                lines.append(stamp() + f'{tag(a)} blinded for 1.23 by {tag(b)} from flashbang entindex 211 ')
+            elif kind < 0.95:
+                lines.append(stamp() + f'{tag(a)} picked up "{rng.choice(WEAPONS)}"')
+            else:
+                lines.append(stamp() + f'{tag(a)} say "{rng.choice(["nt", "gg", "!elo", "!stats", "eco?"])}"')
+        for _ in range(rng.randint(4, 9)):
+            a, b = rng.randrange(5), rng.randrange(5, 10)
+            if rng.random() < 0.5:
+                a, b = b, a
+            flags = " (headshot)" if rng.random() < 0.4 else ""
+            lines.append(
+                stamp() + f'{tag(a)} [1 2 3] killed {tag(b)} [4 5 6] with "{rng.choice(WEAPONS)}"{flags}'
+            )
+            lines.append(stamp() + f'{tag(rng.randrange(10))} assisted killing {tag(b)}')
+        lines.append(stamp() + 'World triggered "Round_End"')
+        lines.append(stamp() + f'MatchStatus: Score: {round_number // 2}:{round_number - round_number // 2} '
+                     f'on map "de_mirage" RoundsPlayed: {round_number}')
+        lines.append(stamp() + "JSON_BEGIN{")
+        lines.append(stamp() + '"name": "round_stats",')
+        lines.append(stamp() + f'"round_number" : "{round_number}",')
+        lines.append(stamp() + '"fields" : "accountid, kills, 3k, 4k, 5k"')
+        lines.append(stamp() + '"players" : {')
+        for i, (_, _, sid) in enumerate(PLAYERS):
+            lines.append(stamp() + f'"player_{i}" : "{sid[5:-1]}, 1, 0, 0, 0"')
+        lines.append(stamp() + "}}JSON_END")
+    lines.append(stamp() + "Game Over: competitive mg_active de_mirage score 13:11 after 40 min")
+    return lines
+
+
+def dispatchable_lines(lines: List[str]) -> List[str]:
+    """Drop JSON block lines, which handle_line consumes before dispatch."""
+    result: List[str] = []
+    in_json = False
+    for line in lines:
+        if "JSON_BEGIN" in line:
+            in_json = True
+        elif "JSON_END" in line:
+            in_json = False
+        elif not in_json:
+            result.append(line)
+    return result
+
+
+def make_benchmark_controller() -> Controller:
+    controller = Controller(lambda _cmd: "", lambda _msg: None, MatchState(), settings=RuntimeConfig())
+    noop: Callable = lambda _event: None
+    for handlers in controller.bus.subscribers.values():
+        handlers[:] = [noop] * len(handlers)
+    return controller
+
+
+LEGACY_CHAT_CMD_RE = re.compile(
+    r'L \d+/\d+/\d+ - \d+:\d+:\d+: "([^<]+)<\d+><(\[U:1:\d+\])><(CT|TERRORIST)>" say "!?(\w+)(?:\s+(.*))?"'
+)
+
+# Pattern order of the dispatch table before the classifier was added.
+SEQUENTIAL_PATTERNS = [
+    ev.ROUND_START_RE, ev.KILL_REGEX, ev.CHAT_RE, ev.CONNECT_RE, ev.ACCOLADE_RE,
+    ev.MATCH_STATUS_RE, ev.GAME_OVER_RE, ev.MAP_CHANGE_RE, LEGACY_CHAT_CMD_RE,
+    ev.PLAYER_TEAM_RE, ev.TEAM_ASSIGN_RE, ev.DISCONNECT_RE,
+]
+
+
+def sequential_dispatch(line: str) -> bool:
+    """The dispatch loop before the classifier: try every pattern in order."""
+    for pattern in SEQUENTIAL_PATTERNS:
+        match = pattern.match(line) if pattern is ev.CHAT_RE else pattern.search(line)
+        if match:
+            return True
+    return False
+
+
+def measure(dispatch: Callable[[str], bool], lines: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for line in lines:
+            dispatch(line)
+        best = min(best, time.perf_counter() - started)
+    return len(lines) / best
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log", nargs="?", help="recorded server log (default: synthetic match)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.log:
+        with open(args.log, "rb") as f:
+            lines = [raw.decode("utf-8", errors="ignore").strip() for raw in f.read().splitlines()]
+        source = args.log
+    else:
+        lines = synthetic_match_log()
+        source = "synthetic 24-round match"
+    lines = dispatchable_lines(lines)
+
+    controller = make_benchmark_controller()
+    before = measure(sequential_dispatch, lines, args.repeat)
+    after = measure(controller._dispatch_line_event, lines, args.repeat)
+
+    print(f"source: {source} ({len(lines)} dispatchable lines)")
+    print(f"sequential regex dispatch: {before:>12,.0f} lines/sec")
+    print(f"keyword classifier:        {after:>12,.0f} lines/sec  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
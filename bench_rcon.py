@@ -0,0 +1,71 @@
+"""Benchmark RCON latency: connection reuse and pipelined batches.
+
+Usage::
+
+    py -3 bench_rcon.py [--commands N] [--latency SECONDS]
+
+Runs against a local fake RCON server.  ``--latency`` delays every server
+reply to approximate a remote server (each fresh connection pays it for the
+auth reply as well as the command reply).  The batch section compares ten
+``mp_team_assign`` commands sent one by one with ``RconSession.run_many``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable, List, Optional
+
+from fake_rcon_server import FakeRconServer
+from rcon_utils import RconSession
+
+PASSWORD = "bench"
+
+
+def measure(send: Callable[[str], object], commands: int) -> float:
+    """Return the mean seconds per command."""
+    started = time.perf_counter()
+    for i in range(commands):
+        send(f'say "message {i}"')
+    return (time.perf_counter() - started) / commands
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    with FakeRconServer(PASSWORD, latency=args.latency) as server:
+        def per_command(cmd: str) -> str:
+            # What rcon_utils.rcon used to do: connect and log in every time.
+            fresh = RconSession(server.host, server.port, PASSWORD)
+            try:
+                return fresh.run(cmd)
+            finally:
+                fresh.close()
+
+        session = RconSession(server.host, server.port, PASSWORD)
+        before = measure(per_command, args.commands)
+        after = measure(session.run, args.commands)
+
+        assign = [f"mp_team_assign [U:1:{1000 + i}] {'ct' if i < 5 else 't'}" for i in range(10)]
+        started = time.perf_counter()
+        for cmd in assign:
+            session.run(cmd)
+        one_by_one = time.perf_counter() - started
+        started = time.perf_counter()
+        session.run_many(assign)
+        batched = time.perf_counter() - started
+        session.close()
+
+    print(f"{args.commands} commands, server latency {args.latency * 1e3:.1f} ms")
+    print(f"connection per command: {before * 1e3:8.3f} ms/command")
+    print(f"persistent session:     {after * 1e3:8.3f} ms/command  ({before / after:.1f}x)")
+    print(f"connections opened: {server.connections}")
+    print(f"assign 10 players one by one: {one_by_one * 1e3:8.3f} ms")
+    print(f"assign 10 players run_many:   {batched * 1e3:8.3f} ms  ({one_by_one / batched:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Outbound chat queue drained by a background worker.
+
+``Controller.say`` enqueues instead of calling RCON, so a slow RCON reply
+no longer stalls log processing.  Messages are sent by priority class
+(admin replies, then match flow, then commentary) and FIFO within a class,
+no faster than ``rate_per_second``.  Commentary that waited longer than
+``commentary_max_age`` is dropped instead of being sent late.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Lower value is sent first."""
+
+    ADMIN = 0
+    MATCH = 1
+    COMMENTARY = 2
+
+
+@dataclass
+class ChatQueueMetrics:
+    sent: int = 0
+    dropped_full: int = 0
+    dropped_stale: int = 0
+    send_errors: int = 0
+    max_depth: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    latency_max_by_priority: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def latency_avg(self) -> float:
+        return self.latency_total / self.sent if self.sent else 0.0
+
+
+# (priority, sequence, enqueued_at, message)
+_Item = Tuple[int, int, float, str]
+
+
+class ChatQueue:
+    """Bounded priority queue of chat messages with a rate-limited sender."""
+
+    def __init__(
+        self,
+        send_func: Callable[[str], None],
+        *,
+        max_size: int = 64,
+        rate_per_second: float = 5.0,
+        commentary_max_age: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+        on_put: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.send_func = send_func
+        # Called after each accepted put(), e.g. to wake an asyncio drainer.
+        self.on_put = on_put
+        self.max_size = max_size
+        self.min_interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self.commentary_max_age = commentary_max_age
+        self.clock = clock
+        self.metrics = ChatQueueMetrics()
+        self._heap: List[_Item] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._last_sent_at: Optional[float] = None
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def put(self, message: str, priority: Priority = Priority.MATCH) -> bool:
+        """Enqueue ``message``; returns False if it was dropped.
+
+        When the queue is full the newest message of the lowest class below
+        ``priority`` is evicted to make room; if there is none, ``message``
+        itself is dropped.
+        """
+        with self._cond:
+            if len(self._heap) >= self.max_size and not self._evict_below(priority):
+                self.metrics.dropped_full += 1
+                logger.warning("チャットキューが満杯のため破棄: %s", message)
+                return False
+            heapq.heappush(self._heap, (int(priority), next(self._seq), self.clock(), message))
+            self.metrics.max_depth = max(self.metrics.max_depth, len(self._heap))
+            self._cond.notify()
+        if self.on_put is not None:
+            self.on_put()
+        return True
+
+    def _evict_below(self, priority: Priority) -> bool:
+        victim = max(self._heap)
+        if victim[0] <= priority:
+            return False
+        self._heap.remove(victim)
+        heapq.heapify(self._heap)
+        self.metrics.dropped_full += 1
+        logger.debug("チャットキュー: %s を押し出しました", victim[3])
+        return True
+
+    def send_next(self) -> bool:
+        """Send (or drop) the next due message without waiting.
+
+        Returns False if the queue is empty or the rate limit says wait.
+        The worker thread uses this; tests and replays may call it directly.
+        """
+        with self._cond:
+            if not self._heap or self._rate_wait() > 0:
+                return False
+            priority, _, enqueued_at, message = heapq.heappop(self._heap)
+        now = self.clock()
+        age = now - enqueued_at
+        if priority == Priority.COMMENTARY and age > self.commentary_max_age:
+            self.metrics.dropped_stale += 1
+            logger.debug("古い実況を破棄 (%.1fs): %s", age, message)
+            return True
+        try:
+            self.send_func(message)
+        except Exception:
+            self.metrics.send_errors += 1
+            logger.exception("チャット送信に失敗しました: %s", message)
+        with self._cond:
+            self._last_sent_at = now
+        self._record_latency(Priority(priority), age)
+        return True
+
+    def next_send_delay(self) -> Optional[float]:
+        """Seconds until send_next() can send, or None if the queue is empty."""
+        with self._cond:
+            return self._rate_wait() if self._heap else None
+
+    def _rate_wait(self) -> float:
+        if self._last_sent_at is None:
+            return 0.0
+        return max(0.0, self._last_sent_at + self.min_interval - self.clock())
+
+    def _record_latency(self, priority: Priority, age: float) -> None:
+        m = self.metrics
+        m.sent += 1
+        m.latency_total += age
+        m.latency_max = max(m.latency_max, age)
+        key = priority.name.lower()
+        m.latency_max_by_priority[key] = max(m.latency_max_by_priority.get(key, 0.0), age)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._worker, name="chat-queue", daemon=True)
+            self._thread.start()
+
+    def stop(self, drain: bool = True, timeout: float = 5.0) -> None:
+        """Stop the worker, first sending what is queued if ``drain``."""
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        if drain:
+            while self.depth and time.monotonic() < deadline:
+                time.sleep(0.01)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        self._thread = None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                delay = self._rate_wait()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+            self.send_next()
+
+    def summary(self) -> str:
+        m = self.metrics
+        return (
+            f"depth={self.depth} max_depth={m.max_depth} sent={m.sent} "
+            f"dropped_full={m.dropped_full} dropped_stale={m.dropped_stale} "
+            f"latency_avg={m.latency_avg * 1e3:.0f}ms latency_max={m.latency_max * 1e3:.0f}ms"
+        )
@@ -0,0 +1,71 @@
+"""Crash-safe checkpoint of the log position and MatchState.
+
+The controller writes a checkpoint at each round end and map change, and
+synchronously right after a match result is journaled, so a restart never
+replays the ``Game Over`` line of a match that is already recorded.  On
+restart it reopens the checkpointed log at the saved byte offset instead of
+the end of the newest log, so the lines written while it was down are
+replayed (with chat suppressed) and the score, alive sets and team maps
+survive the restart.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from persistence import write_json
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_SCHEMA_VERSION = 1
+
+
+@dataclass
+class Checkpoint:
+    log_path: str
+    offset: int
+    state: Dict[str, Any]
+    saved_at: float = field(default_factory=time.time)
+
+
+def save_checkpoint(path: str, checkpoint: Checkpoint, *, durable: bool = False) -> None:
+    """Write ``checkpoint`` atomically.
+
+    Queued when a JsonWriter is installed, unless ``durable``: then it is on
+    disk when this returns.
+    """
+    payload = {
+        "schema_version": CHECKPOINT_SCHEMA_VERSION,
+        "log_path": checkpoint.log_path,
+        "offset": checkpoint.offset,
+        "saved_at": checkpoint.saved_at,
+        "state": checkpoint.state,
+    }
+    write_json(path, payload, durable=durable)
+    logger.debug("saved checkpoint: %s @ %d", checkpoint.log_path, checkpoint.offset)
+
+
+def load_checkpoint(path: str) -> Optional[Checkpoint]:
+    """Return the saved checkpoint, or None when missing or unreadable."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if raw.get("schema_version") != CHECKPOINT_SCHEMA_VERSION:
+            logger.warning("checkpoint schema mismatch, ignoring %s", path)
+            return None
+        return Checkpoint(
+            log_path=str(raw["log_path"]),
+            offset=int(raw["offset"]),
+            state=dict(raw["state"]),
+            saved_at=float(raw.get("saved_at", 0.0)),
+        )
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning("failed to load checkpoint %s: %s", path, e)
+        return None
@@ -8,6 +8,8 @@ LOG_DIR = r"D:\\path\\to\\cs2\\game\\csgo\\logs"
 RCON_HOST = "127.0.0.1"
 RCON_PORT = 27015
 RCON_PASSWORD = "CHANGE_ME"
+# Seconds to wait for an RCON response before dropping the connection.
+RCON_TIMEOUT = 5.0
 
 # Admin steam id placeholder.
 ADMIN_STEAMID = "[U:1:YOUR_ACCOUNT_ID]"
@@ -0,0 +1,185 @@
+"""Team balancing with lobby constraints, by simulated annealing.
+
+``team_balance`` only minimises the Elo sum difference.  Lobbies also want
+some players kept together or apart, the strongest players spread across
+both teams, and few players moved from the teams they are on now.  Each of
+those is a weighted penalty; ``balance`` starts from the exact Elo split
+(oriented to move as few players as possible) and anneals with swap moves
+until ``budget`` seconds have passed, keeping the best split seen.  Swaps
+keep the team sizes from the starting split.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from player_elo import get_elo
+from team_balance import best_split
+
+TEAM_CT = "CT"
+TEAM_T = "TERRORIST"
+DEFAULT_BUDGET_SECONDS = 0.05
+# Starting temperature, in objective units (about one Elo point each).
+START_TEMPERATURE = 100.0
+
+
+@dataclass(frozen=True)
+class BalanceConstraints:
+    together: Tuple[Tuple[str, str], ...] = ()
+    apart: Tuple[Tuple[str, str], ...] = ()
+    # The N highest rated players are split as evenly as possible.
+    spread_top: int = 0
+    # Moves beyond this many players (vs current_teams) are penalised; None: no limit.
+    max_changes: Optional[int] = None
+    elo_weight: float = 1.0
+    pair_weight: float = 200.0
+    spread_weight: float = 200.0
+    change_weight: float = 100.0
+
+    @property
+    def active(self) -> bool:
+        return bool(self.together or self.apart or self.spread_top > 1 or self.max_changes is not None)
+
+
+def parse_pairs(items: Iterable[str]) -> Tuple[Tuple[str, str], ...]:
+    """``["alice+bob"]`` -> ``(("ALICE", "BOB"),)``; malformed items are skipped."""
+    pairs = []
+    for item in items:
+        names = [part.strip().upper() for part in str(item).split("+")]
+        if len(names) == 2 and all(names):
+            pairs.append((names[0], names[1]))
+    return tuple(pairs)
+
+
+@dataclass
+class Objective:
+    elo_diff: int
+    pair_violations: int
+    spread_excess: int
+    changes: int
+    change_excess: int
+    total: float
+
+    def describe(self) -> str:
+        return (
+            f"Elo差 {self.elo_diff} / ペア違反 {self.pair_violations}"
+            f" / 上位偏り {self.spread_excess} / 移動 {self.changes}人"
+        )
+
+
+@dataclass
+class ConstrainedSplit:
+    team_ct: List[str]
+    team_t: List[str]
+    objective: Objective
+    iterations: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass
+class _Problem:
+    ratings: List[int]
+    together: List[Tuple[int, int]]
+    apart: List[Tuple[int, int]]
+    top: List[int]
+    # index -> side now (0 CT, 1 T) for players currently on a team.
+    current: Dict[int, int]
+    constraints: BalanceConstraints = field(default_factory=BalanceConstraints)
+
+    def score(self, sides: Sequence[int]) -> Objective:
+        c = self.constraints
+        ct_sum = sum(r for r, side in zip(self.ratings, sides) if side == 0)
+        elo_diff = abs(2 * ct_sum - sum(self.ratings))
+        violations = sum(1 for a, b in self.together if sides[a] != sides[b])
+        violations += sum(1 for a, b in self.apart if sides[a] == sides[b])
+        top_ct = sum(1 for i in self.top if sides[i] == 0)
+        spread_excess = max(0, abs(2 * top_ct - len(self.top)) - len(self.top) % 2) // 2
+        changes = sum(1 for i, side in self.current.items() if sides[i] != side)
+        change_excess = max(0, changes - c.max_changes) if c.max_changes is not None else 0
+        total = (
+            c.elo_weight * elo_diff
+            + c.pair_weight * violations
+            + c.spread_weight * spread_excess
+            + c.change_weight * change_excess
+        )
+        return Objective(elo_diff, violations, spread_excess, changes, change_excess, total)
+
+
+def balance(
+    players: Iterable[str],
+    constraints: BalanceConstraints = BalanceConstraints(),
+    current_teams: Optional[Dict[str, str]] = None,
+    rating: Callable[[str], int] = get_elo,
+    *,
+    budget: float = DEFAULT_BUDGET_SECONDS,
+    clock: Callable[[], float] = time.monotonic,
+    rng: Optional[random.Random] = None,
+) -> ConstrainedSplit:
+    """Best CT/T split of ``players`` found within ``budget`` seconds."""
+    started = clock()
+    rng = rng or random.Random()
+    players = list(players)
+    index = {p.upper(): i for i, p in enumerate(players)}
+    ratings = [int(rating(p)) for p in players]
+    ranked = sorted(range(len(players)), key=lambda i: ratings[i], reverse=True)
+    current: Dict[int, int] = {}
+    for name, team in (current_teams or {}).items():
+        i = index.get(name.upper())
+        if i is not None and team in (TEAM_CT, TEAM_T):
+            current[i] = 0 if team == TEAM_CT else 1
+    problem = _Problem(
+        ratings=ratings,
+        together=[(index[a], index[b]) for a, b in constraints.together if a in index and b in index],
+        apart=[(index[a], index[b]) for a, b in constraints.apart if a in index and b in index],
+        top=ranked[: constraints.spread_top] if constraints.spread_top > 1 else [],
+        current=current,
+        constraints=constraints,
+    )
+
+    team1 = set(best_split(players, dict(zip(players, ratings)).__getitem__).team1)
+    sides = [0 if p in team1 else 1 for p in players]
+    flipped = [1 - side for side in sides]
+    best_obj = problem.score(sides)
+    flipped_obj = problem.score(flipped)
+    # Swapping the sides changes only the moves; keep the one with fewer.
+    if (flipped_obj.total, flipped_obj.changes) < (best_obj.total, best_obj.changes):
+        sides, best_obj = flipped, flipped_obj
+
+    best_sides = list(sides)
+    obj = best_obj
+    iterations = 0
+    lower_bound = sum(ratings) % 2 * constraints.elo_weight
+    deadline = started + budget
+    # Without constraints the exact split is already optimal.
+    if team1 and constraints.active:
+        while best_obj.total > lower_bound:
+            now = clock()
+            if now >= deadline:
+                break
+            temperature = START_TEMPERATURE * (deadline - now) / budget
+            ct = [i for i, side in enumerate(sides) if side == 0]
+            t = [i for i, side in enumerate(sides) if side == 1]
+            a, b = rng.choice(ct), rng.choice(t)
+            sides[a], sides[b] = 1, 0
+            candidate = problem.score(sides)
+            iterations += 1
+            delta = candidate.total - obj.total
+            if delta <= 0 or rng.random() < math.exp(-delta / max(temperature, 1e-9)):
+                obj = candidate
+                if obj.total < best_obj.total:
+                    best_obj, best_sides = obj, list(sides)
+            else:
+                sides[a], sides[b] = 0, 1
+
+    return ConstrainedSplit(
+        team_ct=[p for p, side in zip(players, best_sides) if side == 0],
+        team_t=[p for p, side in zip(players, best_sides) if side == 1],
+        objective=best_obj,
+        iterations=iterations,
+        elapsed=clock() - started,
+    )
+
@@ -3,7 +3,7 @@
 
 from __future__ import annotations
 
-import glob
+import argparse
 import json
 import logging
 import os
@@ -11,9 +11,12 @@ import random
 import re
 import sys
 import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Callable, Dict, List, Optional, TextIO
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
+from chat_queue import ChatQueue, Priority
+from checkpoint import Checkpoint, load_checkpoint, save_checkpoint
 from cheers import (
     ACE_MESSAGES,
     CHEER_MESSAGES,
@@ -27,30 +30,53 @@ from cheers import (
     LUCKY_WEAPONS,
     get_accolade_message,
 )
+from events import (
+    INTERESTING_LINE_RE,
+    AccoladeEvent,
+    ChatEvent,
+    ConnectEvent,
+    DisconnectEvent,
+    GameOverEvent,
+    KillEvent,
+    MapChangeEvent,
+    MatchStatusEvent,
+    PlayerTeamEvent,
+    RoundStartEvent,
+    TeamJoinEvent,
+    EventBus,
+    parse_line,
+    parse_log_time,
+)
+from log_follower import LogDirIndex, LogFollower
+from match_journal import MatchJournal, build_record, replay_journal, save_and_compact
 from messages import ROUND_EVENTS, SILENCE_MESSAGES, ONE_V_ONE_MESSAGES, SCORE_FLOW_MESSAGES, ROUND_CONTEXT_MESSAGES
+from persistence import JsonWriter, install_writer
+from player_store import install_store, open_sqlite_store
 from player_elo import get_all_elo, get_elo, load_elo, save_elo, update_elo
 from player_stats import (
     PLAYER_STATS,
-    TARGETS,
     load_stats,
     load_targets,
+    get_steam_id,
+    remember_player,
     save_stats,
     save_targets,
-    is_bot,
 )
+from player_registry import PLAYERS, is_bot
+from roster import Roster
 from state import MatchState
 from runtime_config import RuntimeConfig, load_runtime_config
+from scheduler import Scheduler, Timer
 from taunts import TAUNT_MESSAGES
 from tactics import get_tactic, normalize_map_name
+from constrained_balance import BalanceConstraints, balance, parse_pairs
+from team_balance import best_split
 from team_utils import (
     assign_teams,
     elo_shuffle,
     predict_winrate,
-    smart_shuffle_balanced,
 )
 
-PLAYER_TEAM_RE = re.compile(r'"(?P<name>[^<]+)<\d+><(?P<steam_id>[^>]+)><(?P<team>CT|TERRORIST)>"')
-MATCH_STATUS_RE = re.compile(r'MatchStatus: Score: \d+:\d+ on map ".*?" RoundsPlayed: (\d+)', re.IGNORECASE)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 # Configure module logger.
 logger = logging.getLogger(__name__)
@@ -64,53 +90,26 @@ formatter = logging.Formatter("[%(asctime)s] %(levelname)s: %(message)s")
 file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 
-# Patterns
-KILL_REGEX = re.compile(
-    r'"(?P<killer>[^"<]+)<\d+><(?P<killer_steam_id>[^>]+)><(?P<killer_team>CT|TERRORIST)>".*?'
-    r'killed.*?"(?P<victim>[^"<]+)<\d+><(?P<victim_steam_id>[^>]+)><(?P<victim_team>CT|TERRORIST)>".*?'
-    r'with "(?P<weapon>[^"]+)"',
-    re.IGNORECASE,
-)
-
-ACCOLADE_RE = re.compile(
-    r'ACCOLADE, FINAL: \{(?P<type>[^}]+)\},\s+(?P<player>[^<]+)<\d+>,\s+VALUE: (?P<value>[\d.]+)',
-    re.IGNORECASE,
-)
-
-DISCONNECT_RE = re.compile(
-    r'"(?P<name>[^"<]+)<\d+><(?P<steam_id>[^>]+)><(?P<team>CT|TERRORIST)>" disconnected'
-)
-
-CONNECT_RE = re.compile(
-    r'"(?P<name>[^"<]+)<\d+><(?P<steam_id>\[U:1:\d+\])><[^>]*>" connected.*'
-)
-
-STATUS_RE = re.compile(r'^\s*\d+\s+"(?P<name>.+?)"\s+\[(?P<steam_id>U:1:\d+)\]')
-
-MATCH_STATUS_RE = re.compile(r'MatchStatus: Score: \d+:\d+ on map ".*?" RoundsPlayed: (\d+)', re.IGNORECASE)
-
-MAP_CHANGE_RE = re.compile(r'Loading map "([^\"]+)"')
-ROUND_START_RE = re.compile(r'Round_Start|Starting Freeze period', re.IGNORECASE)
-CHAT_CMD_RE = re.compile(
-    r'L \d+/\d+/\d+ - \d+:\d+:\d+: "([^<]+)<\d+><(\[U:1:\d+\])><(CT|TERRORIST)>" say "!?(\w+)(?:\s+(.*))?"'
-)
-GAME_OVER_RE = re.compile(r'Game Over: .*?score\s+(\d+):(\d+)', re.IGNORECASE)
-
-TEAM_ASSIGN_RE = re.compile(
-    r'"(?P<name>.+?)<\d+><(?P<steam_id>[^>]+)><[^>]*>" joined team "(?P<team>CT|TERRORIST)"'
-)
-
-CHAT_RE = re.compile(
-    r'"(?P<name>.+?)<\d+><(?P<steamid>\[U:1:(?P<accountid>\d+)\])><(?P<team>\w+)>" say "(?P<text>.+)"'
-)
+STATUS_RE = re.compile(r'^\s*#?\s*(?:\d+\s+)+"(?P<name>.+?)"\s+\[(?P<steam_id>U:1:\d+)\]')
+# Header line of status output, e.g. "players  : 0 humans, 2 bots (10 max)".
+STATUS_HUMANS_RE = re.compile(r"^\s*players\s*:\s*(?P<humans>\d+) humans", re.MULTILINE)
 
 TEAM_T = "TERRORIST"
 TEAM_CT = "CT"
 
+# Upper bound on how long the follower sleeps without log input; the wait
+# is cut shorter when a scheduled action is due sooner.
+IDLE_WAKE_SECONDS = 1.0
+# The status refresh runs 1.5s after "Live on 3! GLHF!" (3s into the lo3).
+LO3_STATUS_DELAY_SECONDS = 4.5
+# Lower bound for the silence/idle deadlines, so a zero setting cannot make
+# the idle cheer re-arm itself in a tight loop while on cooldown.
+COMMENTARY_TIMER_MIN_SECONDS = 1.0
+
 
 class Controller:
     current_log_path: Optional[str] = None
-    log_fp: Optional[TextIO] = None
+    follower: Optional[LogFollower] = None
 
     """Documentation."""
 
@@ -120,34 +119,109 @@ class Controller:
         say_func: Callable[[str], None],
         state: Optional[MatchState] = None,
         settings: Optional[RuntimeConfig] = None,
+        rcon_many_func: Optional[Callable[[List[str]], List[Optional[str]]]] = None,
+        outbox: Optional[ChatQueue] = None,
+        scheduler: Optional[Scheduler] = None,
+        rcon_query_func: Optional[Callable[[str, Callable[[Optional[str]], None]], None]] = None,
+        clock: Optional[Callable[[], float]] = None,
     ) -> None:
         """Documentation."""
         self.rcon = rcon_func
-        self.say = say_func
+        # Wall clock for work outside a log line (timers); handlers use now().
+        self.clock = clock or time.time
+        self._event_time: Optional[float] = None
+        # Without a batch sender, fall back to one rcon_func call per command.
+        self.rcon_many = rcon_many_func or (lambda commands: [self.rcon(cmd) for cmd in commands])
+        # rcon_query(cmd, callback) hands the command output to callback.  The
+        # default calls back immediately; the asyncio runtime calls back once
+        # the response arrives, so handlers never wait on RCON.
+        self.rcon_query = rcon_query_func or (lambda cmd, callback: callback(self.rcon(cmd)))
+        # With an outbox, say() only enqueues; the queue's worker sends.
+        self.outbox = outbox
+        self.say_priority = Priority.MATCH
+        self._say_func = self._enqueue_say if outbox is not None else say_func
+        self.say = self._say
+        # While catching up (resumed log tail, or lines far behind wall
+        # time) state is still updated but say() output and chat commands
+        # are dropped; see catching_up.
+        self.resuming = False
+        self.lagging = False
+        self.suppressed_says = 0
         self.state = state or MatchState()
         self.settings = settings or load_runtime_config()
         self.state.WIN_ROUNDS = self.settings.max_rounds // 2 + 1
         self.json_buffer: List[str] = []
         self.in_json_block: bool = False
-        self.event_handlers: List[tuple[re.Pattern[str], Callable[[re.Match[str], str], None]]] = []
+        self.log_index = LogDirIndex(self.settings.log_dir)
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.lo3_timers: List[Timer] = []
+        # Deadlines for silence/idle commentary; see _arm_commentary_timers.
+        self._silence_timer: Optional[Timer] = None
+        self._idle_timer: Optional[Timer] = None
+        # (state.last_kill_time, scheduler clock when it was set): the timers
+        # measure silence on the scheduler's clock, not the log's.
+        self._last_kill_stamp: Optional[Tuple[float, float]] = None
+        self._checkpoint_due = False
+        # (log path, offset just past the line being handled) for checkpoints
+        # written in the middle of a batch.
+        self._handled_position: Optional[Tuple[str, int]] = None
+        self.matches_finished = 0
+        # Opened by start(); without it results are saved without journaling.
+        self.journal: Optional[MatchJournal] = None
+        # Who is on the server now; shuffles pick from it instead of TARGETS.
+        self.roster = Roster()
+        self.bus = EventBus()
         self.setup_event_listeners()
 
     def setup_event_listeners(self) -> None:
-        """Initialize the log event dispatcher table."""
-        self.event_handlers = [
-            (ROUND_START_RE, self._handle_round_start_event),
-            (KILL_REGEX, self._handle_kill_event),
-            (CHAT_RE, self._handle_chat_identity_event),
-            (CONNECT_RE, self._handle_connect_event),
-            (ACCOLADE_RE, self._handle_accolade_event),
-            (MATCH_STATUS_RE, self._handle_match_status_event),
-            (GAME_OVER_RE, self._handle_game_over_event),
-            (MAP_CHANGE_RE, self._handle_map_change_event),
-            (CHAT_CMD_RE, self._handle_chat_command_event),
-            (PLAYER_TEAM_RE, self._handle_player_team_event),
-            (TEAM_ASSIGN_RE, self._handle_team_assign_event),
-            (DISCONNECT_RE, self._handle_disconnect_event),
-        ]
+        """Subscribe handlers to log events.
+
+        Every subscriber of an event type sees each event, in the order
+        registered here; identity capture runs before the handlers that
+        depend on it.
+        """
+        bus = EventBus()
+        bus.subscribe(RoundStartEvent, self._handle_round_start_event)
+        bus.subscribe(KillEvent, self._handle_kill_event)
+        bus.subscribe(ChatEvent, self._handle_identity_event)
+        bus.subscribe(ChatEvent, self._handle_chat_team_event)
+        bus.subscribe(ChatEvent, self._handle_chat_command_event)
+        bus.subscribe(ConnectEvent, self._handle_identity_event)
+        bus.subscribe(ConnectEvent, self._handle_connect_event)
+        bus.subscribe(AccoladeEvent, self._handle_accolade_event)
+        bus.subscribe(MatchStatusEvent, self._handle_match_status_event)
+        bus.subscribe(GameOverEvent, self._handle_game_over_event)
+        bus.subscribe(MapChangeEvent, self._handle_map_change_event)
+        bus.subscribe(PlayerTeamEvent, self._handle_identity_event)
+        bus.subscribe(PlayerTeamEvent, self._handle_player_team_event)
+        bus.subscribe(TeamJoinEvent, self._handle_identity_event)
+        bus.subscribe(TeamJoinEvent, self._handle_team_assign_event)
+        bus.subscribe(DisconnectEvent, self._handle_disconnect_event)
+        self.bus = bus
+
+    @property
+    def catching_up(self) -> bool:
+        return self.resuming or self.lagging
+
+    def _say(self, message: str) -> None:
+        if self.catching_up:
+            self.suppressed_says += 1
+            return
+        self._say_func(message)
+
+    def _enqueue_say(self, message: str) -> None:
+        assert self.outbox is not None
+        self.outbox.put(message, self.say_priority)
+
+    @contextmanager
+    def speaking_as(self, priority: Priority) -> Iterator[None]:
+        """Send every say() inside the block with ``priority``."""
+        previous = self.say_priority
+        self.say_priority = priority
+        try:
+            yield
+        finally:
+            self.say_priority = previous
 
     def ensure_rcon_alive(self) -> None:
         """Best-effort health check for the RCON connection."""
@@ -178,26 +252,42 @@ class Controller:
 
     # --- small helpers ---
     def get_random_warning_target(self, exclude_name: str) -> Optional[str]:
-        """Documentation."""
-        exclude_id = TARGETS.get(exclude_name.upper())
-        candidates = [
-            name for name, steam_id in TARGETS.items()
-            if steam_id != exclude_id
-        ]
+        """Random player on the server other than ``exclude_name``."""
+        exclude = exclude_name.upper()
+        candidates = sorted(name for name in self.roster.names if name.upper() != exclude)
         return random.choice(candidates) if candidates else None
 
+    def balance_constraints(self) -> BalanceConstraints:
+        """!smartshuffle constraints from the balance_* settings."""
+        settings = self.settings
+        return BalanceConstraints(
+            together=parse_pairs(settings.balance_together),
+            apart=parse_pairs(settings.balance_apart),
+            spread_top=settings.balance_spread_top,
+            max_changes=settings.balance_max_changes if settings.balance_max_changes >= 0 else None,
+        )
+
     def parse_status_output(self, output: str) -> None:
         """Documentation."""
         logger.debug("parse_status_output start")
+        seen: List[str] = []
+        present: List[Tuple[str, str]] = []
         for line in output.splitlines():
             match = STATUS_RE.match(line)
             if match:
                 name = match.group("name")
                 steam_id = f"[{match.group('steam_id')}]"
-                TARGETS[name.upper()] = steam_id
-                self.state.name_to_steam[name] = steam_id
-                self.state.steam_to_name[steam_id] = name
-        save_targets()
+                remember_player(name, steam_id)
+                seen.append(name.upper())
+                present.append((name, steam_id))
+        humans = STATUS_HUMANS_RE.search(output)
+        if present or (humans is not None and humans.group("humans") == "0"):
+            self.roster.sync(present, self.now())
+        else:
+            # No player line parsed on a server that is not known to be
+            # empty: keep the roster rather than treat everyone as gone.
+            logger.debug("status からプレイヤー行を取得できないため roster を維持します")
+        save_targets(seen)
         logger.info("rcon status から TARGETS を更新しました")
 
     def today_str(self) -> str:
@@ -211,9 +301,10 @@ class Controller:
             values = [v.strip() for v in stats_str.split(",")]
             player_data = dict(zip(fields, values))
 
-            name = self.state.accountid_to_name.get(player_data.get("accountid", "").strip())
-            if not name:
+            identity = PLAYERS.by_account_id(player_data.get("accountid", "").strip())
+            if identity is None:
                 continue
+            name = identity.name
 
             # Optional flavor message.
             if (
@@ -249,6 +340,7 @@ class Controller:
                 self._comment_on_score_flow(prev_ct=prev_ct, prev_t=prev_t)
 
                 self.handle_round_stats(json_data)
+                self._checkpoint_due = True
 
             except Exception:  # pragma: no cover - defensive
                 logger.exception("JSON処理に失敗しました")
@@ -274,7 +366,7 @@ class Controller:
         if once_per_round and key in self.state.round_comment_keys:
             return False
 
-        now = time.time()
+        now = self.now()
         cooldown = (
             self.settings.commentary_cooldown_seconds
             if cooldown_seconds is None
@@ -284,7 +376,8 @@ class Controller:
         if cooldown > 0 and now - last_at < cooldown:
             return False
 
-        self.say(message)
+        with self.speaking_as(Priority.COMMENTARY):
+            self.say(message)
         self.state.last_comment_at[key] = now
         if once_per_round:
             self.state.round_comment_keys.add(key)
@@ -514,12 +607,12 @@ class Controller:
         else:
             self.say("試合終了")
 
-    def handle_round_start(self, line: str) -> None:
+    def handle_round_start(self, line: str = "") -> None:
         """Documentation."""
         if not self.state.live_started:
             return
 
-        self.state.round_start_time = time.time()
+        self.state.round_start_time = self.now()
         self.state.headshot_kills.clear()
         self.state.kill_streaks.clear()
         self.state.round_kills.clear()
@@ -532,8 +625,9 @@ class Controller:
         self.state.clutch_player = None
         self.state.clutch_enemy_count = 0
         self.state.one_v_one_announced = False
-        self.state.last_kill_time = time.time()
+        self._mark_last_kill()
         self.state.round_awp_taunt_sent = False
+        self._arm_commentary_timers()
 
         if self.state.round_number == self.settings.max_rounds + 1:
             self.say(random.choice(ROUND_EVENTS.get("overtime_start", [])))
@@ -591,12 +685,10 @@ class Controller:
         if not self.should_commentate():
             return
 
-        if not self.state.round_start_time or not self.state.last_kill_time:
+        silence_duration = self._seconds_since_kill()
+        if not self.state.round_start_time or silence_duration is None:
             return
 
-        now = time.time()
-        silence_duration = now - self.state.last_kill_time
-
         if silence_duration >= self.settings.silence_seconds and not self.state.silence_comment_given:
             ct = len(self.state.alive_ct)
             t = len(self.state.alive_t)
@@ -621,23 +713,23 @@ class Controller:
             ):
                 self.state.silence_comment_given = True
 
-    def handle_kill(self, line: str, match: re.Match) -> None:
+    def handle_kill(self, event: KillEvent) -> None:
         """Documentation."""
-        killer = match.group("killer")
-        killer_steam_id = match.group("killer_steam_id")
-        killer_team = match.group("killer_team")
+        killer = event.killer
+        killer_steam_id = event.killer_steam_id
+        killer_team = event.killer_team
 
-        victim = match.group("victim")
-        victim_steam_id = match.group("victim_steam_id")
-        victim_team = match.group("victim_team")
+        victim = event.victim
+        victim_steam_id = event.victim_steam_id
+        victim_team = event.victim_team
 
-        weapon = match.group("weapon")
+        weapon = event.weapon
 
         if self.should_commentate():
-            if self.state.round_start_time and time.time() - self.state.round_start_time <= 15:
+            if self.state.round_start_time and self.now() - self.state.round_start_time <= 15:
                 self.say(f"{victim} が開幕15秒以内にダウン")
 
-            if "headshot" in line.lower():
+            if event.headshot:
                 self.state.headshot_streaks[killer] = self.state.headshot_streaks.get(killer, 0) + 1
                 if self.state.headshot_streaks[killer] == 3:
                     message = random.choice(HEADSHOT_STREAK_MESSAGES).format(player=killer)
@@ -645,7 +737,12 @@ class Controller:
             else:
                 self.state.headshot_streaks[killer] = 0
 
-            if killer_team == victim_team and killer != victim and "BOT" not in line:
+            if (
+                killer_team == victim_team
+                and killer != victim
+                and killer_steam_id != "BOT"
+                and victim_steam_id != "BOT"
+            ):
                 message = random.choice(TEAM_KILL_MESSAGES).format(player=killer)
                 self.say(message)
                 return
@@ -695,7 +792,8 @@ class Controller:
                 ace_message = random.choice(ACE_MESSAGES).format(player=killer)
                 self.say(ace_message)
 
-        self.state.last_kill_time = time.time()
+        self._mark_last_kill()
+        self._arm_commentary_timers()
 
         # Check clutch transition.
         ct_alive = len(self.state.alive_ct)
@@ -704,39 +802,18 @@ class Controller:
         self._announce_clutch_state(ct_alive=ct_alive, t_alive=t_alive)
 
     def get_team(self, steam_id: str) -> str:
-        # Try lookup by steam_id first (may be like '[U:1:6111605]' or 'BOT')
-        """Documentation."""
-    
-        team = self.state.player_teams.get(steam_id)
+        """Team of the player behind ``steam_id`` (or a name), else "UNKNOWN"."""
+        # player_teams is keyed by the name the player currently uses.
+        identity = PLAYERS.get(steam_id)
+        team = self.state.player_teams.get(identity.name if identity is not None else steam_id)
         if team is not None:
             return team
-        # If not found, try resolving steam_id -> name and lookup by name
-        name = self.state.steam_to_name.get(steam_id)
-        if name:
-            team = self.state.player_teams.get(name)
-            if team is not None:
-                return team
         self.debug_print(f"[WARN] get_team: team not found for '{steam_id}'")
         return "UNKNOWN"
 
     def latest_log(self) -> Optional[str]:
         """Documentation."""
-        files = glob.glob(os.path.join(self.settings.log_dir, "*.log"))
-        valid_files = []
-
-        for f in files:
-            try:
-                if os.path.getsize(f) > 0:
-                    valid_files.append(f)
-            except OSError:
-                continue
-
-        if not valid_files:
-            return None
-
-        # Sort by modified time desc.
-        valid_files.sort(key=os.path.getmtime, reverse=True)
-        return valid_files[0]
+        return self.log_index.latest()
 
     def debug_print(self, message: str) -> None:
         """Documentation."""
@@ -814,19 +891,14 @@ class Controller:
             return
 
         if cmd == "rdy":
+            both_ready = self._mark_ready(team)
             if team == "CT":
-                self.state.rdy_ct = True
                 self.say("CT チーム ready")
             elif team == "TERRORIST":
-                self.state.rdy_t = True
                 self.say("T チーム ready")
-            if self.state.rdy_ct and self.state.rdy_t:
+            if both_ready:
                 self.say("両チーム ready。!lo3 で開始できます")
-                output = self.rcon("status")
-                logger.debug(f"[DEBUG] rcon status output: {output}")
-                self.state.match_finished = False
-                self.state.round_number = 0
-                self.state.side_switch_announced = False
+                self.rcon_query("status", lambda output: logger.debug(f"[DEBUG] rcon status output: {output}"))
             return
 
         if cmd == "rcon":
@@ -852,62 +924,35 @@ class Controller:
             return
 
         if cmd == "lo3":
-            self.state.match_finished = False
-            self.state.live_started = True
+            self._start_match_state()
             self.say("試合を Live on 3 で開始します")
             self.rcon("mp_warmup_end")
-            load_stats()
-            load_elo()
-            save_stats()
-            self.state.ct_players = list(self.state.alive_ct)
-            self.state.t_players = list(self.state.alive_t)
-            ct_players = [p for p, team in self.state.player_teams.items() if team == TEAM_CT]
-            t_players = [p for p, team in self.state.player_teams.items() if team == TEAM_T]
             self.say("Live on 3... 準備してください")
 
-            self.state.player_teams = self.state.temp_player_teams.copy()
-
-            for i in range(3, 0, -1):
-                self.rcon("mp_restartgame 1")
-                time.sleep(1)
-            self.say("Live on 3! GLHF!")
-            self.rcon("mp_unpause_match")
-            self.state.match_finished = False
-            self.state.live_started = True
-
-            # Refresh status after lo3.
-            time.sleep(1.5)
-            output = self.rcon("status")
-            if output:
-                self.parse_status_output(output)
-                logger.info("lo3後のstatus取得に成功し、TARGETSを更新しました")
-            else:
-                logger.warning("lo3 後の status 取得に失敗しました")
-
+            # Three restarts one second apart, then go live; log lines keep
+            # being handled in between.
+            self.cancel_lo3()
+            self.rcon("mp_restartgame 1")
+            self.lo3_timers = [
+                self.scheduler.call_later(1, self.rcon, "mp_restartgame 1"),
+                self.scheduler.call_later(2, self.rcon, "mp_restartgame 1"),
+                self.scheduler.call_later(3, self._finish_lo3),
+                self.scheduler.call_later(LO3_STATUS_DELAY_SECONDS, self._refresh_status_after_lo3),
+            ]
             return
 
         if cmd == "cancel":
             if steam_id == self.settings.admin_steamid:
                 self.say("試合開始をキャンセルしました")
-                self.state.rdy_ct = False
-                self.state.rdy_t = False
-                self.state.live_started = False
-                self.state.first_round_announced = False
-                self.state.match_finished = False
-                self.state.round_number = 0
-                self.state.ct_players = []
-                self.state.t_players = []
-                self.state.alive_ct.clear()
-                self.state.alive_t.clear()
-                self.state.player_teams = self.state.temp_player_teams.copy()
+                self.cancel_lo3()
+                self._cancel_match_state()
             else:
                 self.say("このコマンドは管理者専用です")
             return
 
         if cmd == "shuffle":
             self.say("チームをランダムでシャッフルします")
-            self.rcon("mp_scrambleteams 1")
-            self.rcon("mp_restartgame 1")
+            self.rcon_many(["mp_scrambleteams 1", "mp_restartgame 1"])
             return
 
         if cmd == "omikuji":
@@ -950,7 +995,7 @@ class Controller:
 
             stats["last_omikuji_date"] = today
             stats["last_omikuji_weapon"] = weapon
-            save_stats()
+            save_stats([name])
             return
 
         if cmd == "elo":
@@ -963,7 +1008,7 @@ class Controller:
             return
 
         if cmd == "eloshuffle":
-            players = list(TARGETS.keys())
+            players = sorted(self.roster.names)
             if len(players) < 2:
                 self.say("プレイヤー数が足りません")
                 return
@@ -972,7 +1017,7 @@ class Controller:
             self.say("CT (Elo): " + ", ".join(team_ct))
             self.say("T (Elo): " + ", ".join(team_t))
 
-            assign_teams(team_ct, team_t)
+            assign_teams(team_ct, team_t, self.rcon_many)
             return
 
         if cmd == "top" and arg.strip().lower() == "elo":
@@ -989,15 +1034,29 @@ class Controller:
             return
 
         if cmd == "smartshuffle":
-            players = list(TARGETS.keys())
+            players = sorted(self.roster.names)
             if len(players) < 2:
                 self.say("プレイヤー数が足りません")
                 return
 
-            team_ct, team_t = smart_shuffle_balanced(players)
-            self.say("CT (Smart): " + ", ".join(team_ct))
-            self.say("T (Smart): " + ", ".join(team_t))
-            assign_teams(team_ct, team_t)
+            current = dict(self.state.player_teams)
+            result = balance(
+                players,
+                self.balance_constraints(),
+                current,
+                get_elo,
+                budget=self.settings.balance_budget_ms / 1000,
+            )
+            logger.info(
+                "smartshuffle: %s (%d iterations, %.1f ms)",
+                result.objective.describe(),
+                result.iterations,
+                result.elapsed * 1000,
+            )
+            self.say("CT (Smart): " + ", ".join(result.team_ct))
+            self.say("T (Smart): " + ", ".join(result.team_t))
+            self.say(result.objective.describe())
+            assign_teams(result.team_ct, result.team_t, self.rcon_many, current_teams=current)
             return
 
         if cmd == "balancecheck":
@@ -1011,10 +1070,13 @@ class Controller:
             ct_elo = sum(get_elo(p) for p in ct_players)
             t_elo = sum(get_elo(p) for p in t_players)
             diff = abs(ct_elo - t_elo)
+            best = best_split(ct_players + t_players, get_elo)
 
             self.say(f"CT Elo合計: {ct_elo}")
             self.say(f"T Elo合計: {t_elo}")
             self.say(f"チーム間の Elo 差: {diff}")
+            if best.diff < diff:
+                self.say(f"最適な分け方なら Elo 差: {best.diff} (!smartshuffle)")
             return
 
         if cmd == "simulate":
@@ -1085,6 +1147,141 @@ class Controller:
             self.say(f"{team}蛛ｴ ({map_name}): {tactic}")
             return
 
+    def apply_command_state(self, steam_id: str, team: str, command: str) -> bool:
+        """Apply only the MatchState part of a match-flow command.
+
+        Used while catching up, where replayed commands must not talk to
+        the server or chat but a missed !lo3 would otherwise leave the
+        match unrecorded.  Returns False for commands without one.
+        """
+        cmd = command.lower()
+        is_admin = steam_id == self.settings.admin_steamid
+        if cmd == "rdy":
+            self._mark_ready(team)
+        elif cmd == "lo3":
+            self._start_match_state()
+        elif cmd == "cancel" and is_admin:
+            self._cancel_match_state()
+        elif cmd == "reset" and is_admin:
+            self.state.reset()
+        else:
+            return False
+        return True
+
+    def _mark_ready(self, team: str) -> bool:
+        """Mark ``team`` ready; True (and the match re-armed) once both are."""
+        if team == "CT":
+            self.state.rdy_ct = True
+        elif team == "TERRORIST":
+            self.state.rdy_t = True
+        if not (self.state.rdy_ct and self.state.rdy_t):
+            return False
+        self.state.match_finished = False
+        self.state.round_number = 0
+        self.state.side_switch_announced = False
+        return True
+
+    def _start_match_state(self) -> None:
+        self.state.match_finished = False
+        self.state.live_started = True
+        self.state.ct_players = list(self.state.alive_ct)
+        self.state.t_players = list(self.state.alive_t)
+        self.state.player_teams = self.state.temp_player_teams.copy()
+
+    def _cancel_match_state(self) -> None:
+        self.state.rdy_ct = False
+        self.state.rdy_t = False
+        self.state.live_started = False
+        self.state.first_round_announced = False
+        self.state.match_finished = False
+        self.state.round_number = 0
+        self.state.ct_players = []
+        self.state.t_players = []
+        self.state.alive_ct.clear()
+        self.state.alive_t.clear()
+        self.state.player_teams = self.state.temp_player_teams.copy()
+
+    def cancel_lo3(self) -> None:
+        """Cancel a lo3 countdown that is still running."""
+        for timer in self.lo3_timers:
+            timer.cancel()
+        self.lo3_timers = []
+
+    def _finish_lo3(self) -> None:
+        self.say("Live on 3! GLHF!")
+        self.rcon("mp_unpause_match")
+        self.state.match_finished = False
+        self.state.live_started = True
+
+    def _refresh_status_after_lo3(self) -> None:
+        self.lo3_timers = []
+        self.rcon_query("status", self._apply_lo3_status)
+
+    def _apply_lo3_status(self, output: Optional[str]) -> None:
+        if output:
+            self.parse_status_output(output)
+            logger.info("lo3後のstatus取得に成功し、TARGETSを更新しました")
+        else:
+            logger.warning("lo3 後の status 取得に失敗しました")
+
+    def _arm_commentary_timers(self) -> None:
+        """Make sure the silence and idle deadlines are scheduled.
+
+        Called on every kill and round start, so it only schedules a timer
+        when none is pending.  A pending timer is not moved when a kill
+        pushes the deadline back; it re-checks last_kill_time when it fires
+        and re-arms itself for the remainder.
+        """
+        if self._silence_timer is None:
+            self._silence_timer = self.scheduler.call_later(
+                max(self.settings.silence_seconds, COMMENTARY_TIMER_MIN_SECONDS), self._on_silence_due
+            )
+        if self._idle_timer is None:
+            self._idle_timer = self.scheduler.call_later(
+                max(self.settings.idle_comment_seconds, COMMENTARY_TIMER_MIN_SECONDS), self._on_idle_due
+            )
+
+    def _mark_last_kill(self) -> None:
+        self.state.last_kill_time = self.now()
+        self._last_kill_stamp = (self.state.last_kill_time, self.scheduler.clock())
+
+    def _seconds_since_kill(self) -> Optional[float]:
+        """Seconds since the last kill (or round start), or None when unset.
+
+        Measured on the scheduler's clock from when the kill was handled, so
+        catch-up, a log clock in another timezone or whole-second log stamps
+        do not shift the deadlines.  A last_kill_time this process did not
+        set (restored from a checkpoint) falls back to log time.
+        """
+        if not self.state.last_kill_time:
+            return None
+        if self._last_kill_stamp is not None and self._last_kill_stamp[0] == self.state.last_kill_time:
+            return self.scheduler.clock() - self._last_kill_stamp[1]
+        return self.now() - self.state.last_kill_time
+
+    def _remaining(self, seconds: float) -> float:
+        elapsed = self._seconds_since_kill()
+        return 0.0 if elapsed is None else seconds - elapsed
+
+    def _on_silence_due(self) -> None:
+        remaining = self._remaining(self.settings.silence_seconds)
+        if remaining > 0:
+            self._silence_timer = self.scheduler.call_later(remaining, self._on_silence_due)
+            return
+        self._silence_timer = None
+        self.check_silence()
+
+    def _on_idle_due(self) -> None:
+        remaining = self._remaining(self.settings.idle_comment_seconds)
+        if remaining > 0:
+            self._idle_timer = self.scheduler.call_later(remaining, self._on_idle_due)
+            return
+        self._idle_timer = None
+        self.check_idle()
+        if self.should_commentate() and self.state.last_kill_time:
+            # Cheer again after another idle period (or retry after a cooldown).
+            self._arm_commentary_timers()
+
     def extract_json_content(self, line: str) -> str:
         """Documentation."""
         if ": " not in line:
@@ -1097,52 +1294,52 @@ class Controller:
 
         return ""
 
-    def _handle_round_start_event(self, _match: re.Match[str], line: str) -> None:
-        self.handle_round_start(line)
+    def _handle_round_start_event(self, _event: RoundStartEvent) -> None:
+        self.handle_round_start()
 
-    def _handle_kill_event(self, match: re.Match[str], line: str) -> None:
-        self.handle_kill(line, match)
+    def _handle_kill_event(self, event: KillEvent) -> None:
+        with self.speaking_as(Priority.COMMENTARY):
+            self.handle_kill(event)
 
-    def _handle_chat_identity_event(self, match: re.Match[str], _line: str) -> None:
-        name = match.group("name").strip()
-        accountid = match.group("accountid").strip()
-        self.state.accountid_to_name[accountid] = name
-        self.debug_print(f"[CHAT] {name} accountid {accountid} を保存")
+    def _handle_identity_event(self, event: Any) -> None:
+        """Remember the account id behind any player line that carries one."""
+        known = PLAYERS.get(event.steam_id)
+        if known is not None and known.name == event.name:
+            return
+        identity = PLAYERS.observe(event.name, event.steam_id)
+        if identity is not None and not identity.is_bot:
+            self.debug_print(f"[ID] {event.name} accountid {identity.account_id} を保存")
 
-    def _handle_connect_event(self, match: re.Match[str], _line: str) -> None:
-        name = match.group("name")
-        steam_id = match.group("steam_id")
+    def _handle_connect_event(self, event: ConnectEvent) -> None:
+        name = event.name
+        steam_id = event.steam_id
         logger.info("CONNECT_RE 荳閾ｴ: %s (%s)", name, steam_id)
-        self.state.name_to_steam[name] = steam_id
-        self.state.steam_to_name[steam_id] = name
-        TARGETS[name.upper()] = steam_id
+        remember_player(name, steam_id)
+        self.roster.join(name, steam_id, self.now())
         logger.debug("TARGETS譖ｴ譁ｰ: %s => %s", name.upper(), steam_id)
         try:
-            save_targets()
+            save_targets([name.upper()])
             logger.info("TARGETSを保存しました")
         except Exception:
             logger.exception("TARGETS保存に失敗しました")
         logger.info("%s が接続しました (%s)", name, steam_id)
 
-    def _handle_accolade_event(self, match: re.Match[str], _line: str) -> None:
-        accolade_type = match.group("type")
-        player = match.group("player").strip()
-        value = float(match.group("value"))
-        self.state.accolades.append((accolade_type, player, value))
+    def _handle_accolade_event(self, event: AccoladeEvent) -> None:
+        self.state.accolades.append((event.accolade_type, event.player, event.value))
 
-    def _handle_match_status_event(self, match: re.Match[str], _line: str) -> None:
-        self.state.rounds_played = int(match.group(1))
+    def _handle_match_status_event(self, event: MatchStatusEvent) -> None:
+        self.state.rounds_played = event.rounds_played
         self.debug_print(f"ラウンド数(MatchStatus): {self.state.rounds_played}")
 
-    def _handle_game_over_event(self, match: re.Match[str], _line: str) -> None:
+    def _handle_game_over_event(self, event: GameOverEvent) -> None:
         if self.state.match_finished:
             return
 
         self.state.match_finished = True
         self.state.live_started = False
 
-        ct_score = int(match.group(1))
-        t_score = int(match.group(2))
+        ct_score = event.ct_score
+        t_score = event.t_score
         if ct_score > t_score:
             winner = "CT"
         elif t_score > ct_score:
@@ -1151,9 +1348,17 @@ class Controller:
             logger.warning("引き分けスコアを検出したため試合終了処理を中断します")
             return
 
-        output = self.rcon("status")
-        if output:
-            self.parse_status_output(output)
+        # Refresh TARGETS from status before the result is recorded.
+        self.rcon_query("status", lambda output: self._finish_game_over(winner, output, (ct_score, t_score)))
+
+    def _finish_game_over(
+        self,
+        winner: str,
+        status_output: Optional[str],
+        score: Tuple[int, int] = (0, 0),
+    ) -> None:
+        if status_output:
+            self.parse_status_output(status_output)
 
         # Keep full team assignments collected during the match.
         # If assignment tracking is empty for some reason, fall back to alive players.
@@ -1187,17 +1392,29 @@ class Controller:
             )
 
         logger.debug("[DEBUG] CT: %s, T: %s", ct_players, t_players)
-        self.record_match_result(winner, ct_players, t_players)
-        update_elo(winner, ct_players, t_players)
-        save_elo()
+        self._commit_match_result(winner, ct_players, t_players, score)
 
         logger.info("MATCH END: %s の結果を保存しました", winner)
         if not self.state.accolades:
             self.say("アコレード情報はありませんでした")
         self.state.accolades.clear()
 
-        logger.info("試合終了 -> プロセスを終了します")
-        sys.exit(0)
+        self._reset_for_next_match()
+        self.matches_finished += 1
+        logger.info("試合終了 -> 状態をリセットして次の試合を待機します")
+
+    def _reset_for_next_match(self) -> None:
+        """Clear per-match state, keeping the map and the known player ids."""
+        keep_map = self.state.current_map
+        self.cancel_lo3()
+        for timer in (self._silence_timer, self._idle_timer):
+            if timer is not None:
+                timer.cancel()
+        self._silence_timer = None
+        self._idle_timer = None
+        self.state.reset()
+        self.state.current_map = keep_map
+        self._checkpoint_due = True
 
     def _collect_team_players(self, team_name: str) -> List[str]:
         players: set[str] = set()
@@ -1206,72 +1423,92 @@ class Controller:
             for key, team in source.items():
                 if team != team_name:
                     continue
-                name = self.state.steam_to_name.get(key, key)
-                if name.startswith("[U:1:"):
-                    continue
-                if name.upper().startswith("BOT"):
+                identity = PLAYERS.get(key)
+                name = identity.name if identity is not None else key
+                if name.startswith("[U:1:") or is_bot(name):
                     continue
                 players.add(name)
 
         return sorted(players)
 
-    def _handle_map_change_event(self, match: re.Match[str], _line: str) -> None:
-        new_map = match.group(1)
+    def _handle_map_change_event(self, event: MapChangeEvent) -> None:
+        new_map = event.map_name
         logger.info("マップ変更検知: %s -> 状態をリセット", new_map)
         self.state.reset()
         self.state.current_map = normalize_map_name(new_map)
         self.setup_event_listeners()
         self.ensure_rcon_alive()
         self.reset_command_flags()
+        self._checkpoint_due = True
 
-    def _handle_chat_command_event(self, match: re.Match[str], _line: str) -> None:
-        player_name, steam_id, team, command, arg = match.groups()
-        arg = arg or ""
+    def _handle_chat_team_event(self, event: ChatEvent) -> None:
         # Keep team/mapping fresh from chat lines as an additional source of truth.
-        self.state.player_teams[player_name] = team
-        self.state.temp_player_teams[player_name] = team
-        self.state.name_to_steam[player_name] = steam_id
-        self.state.steam_to_name[steam_id] = player_name
+        if event.team not in (TEAM_CT, TEAM_T):
+            return
+        self.state.player_teams[event.name] = event.team
+        self.state.temp_player_teams[event.name] = event.team
+        PLAYERS.observe(event.name, event.steam_id)
+
+    def _handle_chat_command_event(self, event: ChatEvent) -> None:
+        if event.command is None:
+            return
+        player_name, steam_id, team = event.name, event.steam_id, event.team
+        command, arg = event.command, event.arg
+        if self.catching_up:
+            if self.apply_command_state(steam_id, team, command):
+                logger.info("追いつき中: %s !%s の状態変更のみ適用", player_name, command)
+            else:
+                logger.info("追いつき中のため古いコマンドを無視: %s !%s %s", player_name, command, arg)
+            return
         logger.info("CHAT_CMD: %s (%s) [%s]: !%s %s", player_name, team, steam_id, command, arg)
-        self.handle_chat_command(player_name, steam_id, team, command, arg)
+        with self.speaking_as(Priority.ADMIN):
+            self.handle_chat_command(player_name, steam_id, team, command, arg)
 
-    def _handle_player_team_event(self, match: re.Match[str], _line: str) -> None:
-        name = match.group("name")
-        steam_id = match.group("steam_id")
-        team = match.group("team")
+    def _handle_player_team_event(self, event: PlayerTeamEvent) -> None:
+        name = event.name
+        steam_id = event.steam_id
+        team = event.team
         self.state.temp_player_teams[name] = team
         self.state.player_teams[name] = team
-        self.state.name_to_steam[name] = steam_id
-        self.state.steam_to_name[steam_id] = name
+        PLAYERS.observe(name, steam_id)
+        self.roster.join(name, steam_id, self.now())
 
-    def _handle_team_assign_event(self, match: re.Match[str], _line: str) -> None:
-        name = match.group("name")
-        steam_id = match.group("steam_id")
-        team = match.group("team")
+    def _handle_team_assign_event(self, event: TeamJoinEvent) -> None:
+        name = event.name
+        steam_id = event.steam_id
+        team = event.team
         self.state.player_teams[name] = team
-        self.state.name_to_steam[name] = steam_id
-        self.state.steam_to_name[steam_id] = name
+        PLAYERS.observe(name, steam_id)
+        self.roster.join(name, steam_id, self.now())
         logger.info("チーム割当: %s (%s) -> %s", name, steam_id, team)
 
-    def _handle_disconnect_event(self, match: re.Match[str], _line: str) -> None:
-        name = match.group("name")
-        steam_id = match.group("steam_id")
+    def _handle_disconnect_event(self, event: DisconnectEvent) -> None:
+        name = event.name
+        steam_id = event.steam_id
         self.state.alive_ct.discard(name)
         self.state.alive_t.discard(name)
         self.state.player_teams.pop(name, None)
         self.state.player_teams.pop(steam_id, None)
-        self.state.name_to_steam.pop(name, None)
-        self.state.steam_to_name.pop(steam_id, None)
+        self.roster.leave(steam_id, self.now())
         logger.info("%s (%s) が切断しました", name, steam_id)
 
     def _dispatch_line_event(self, line: str) -> bool:
-        for pattern, handler in self.event_handlers:
-            match = pattern.match(line) if pattern is CHAT_RE else pattern.search(line)
-            if not match:
-                continue
-            handler(match, line)
-            return True
-        return False
+        event = parse_line(line)
+        if event is None:
+            return False
+        self._event_time = event.timestamp
+        try:
+            return self.bus.publish(event) > 0
+        finally:
+            self._event_time = None
+
+    def now(self) -> float:
+        """Server time of the event being handled, else the controller clock.
+
+        Using the log's own time keeps "opening 15 seconds" and silence
+        windows right when lines are handled late or replayed fast.
+        """
+        return self._event_time if self._event_time is not None else self.clock()
 
     def handle_line(self, line: str) -> None:
         if "JSON_BEGIN" in line:
@@ -1329,7 +1566,134 @@ class Controller:
 
         self.debug_print(f"[DEBUG] 未処理行: {line}")
 
-    def record_match_result(self, winner: str, ct_players: List[str], t_players: List[str]) -> None:
+    def handle_lines(self, lines: Sequence[bytes]) -> None:
+        """Dispatch a batch of raw log lines read by the follower.
+
+        Lines are only decoded once the byte prefilter says some handler
+        could care about them (or while a JSON block is being collected).
+        Debug mode keeps every line so unhandled ones still get logged.
+        """
+        if self.follower is not None and self.settings.catch_up_lag_seconds > 0:
+            self._update_lag(lines)
+        keep_all = self.state.debug_enabled
+        path = self.follower.current_path if self.follower is not None else None
+        position = self.follower.offset - sum(len(raw) + 1 for raw in lines) if path else 0
+        for raw in lines:
+            position += len(raw) + 1
+            if not (keep_all or self.in_json_block or INTERESTING_LINE_RE.search(raw)):
+                continue
+            if path:
+                self._handled_position = (path, position)
+            self.handle_line(raw.decode("utf-8", errors="ignore").strip())
+        if self.follower is None:
+            return
+        self._handled_position = None
+        if self.resuming and self.follower.at_eof:
+            self.resuming = False
+            logger.info("チェックポイントからの追いつき完了 (抑制したチャット %d 件)", self.suppressed_says)
+        if self._checkpoint_due and not self.in_json_block:
+            self.write_checkpoint()
+
+    def _update_lag(self, lines: Sequence[bytes]) -> None:
+        """Enter or leave lag catch-up from the newest timestamp in ``lines``.
+
+        Entered when the batch is more than ``catch_up_lag_seconds`` behind
+        wall time and left only once it is back under half of that, so a
+        lag hovering around the threshold does not flap.
+        """
+        for raw in reversed(lines):
+            log_time = parse_log_time(raw)
+            if log_time is not None:
+                break
+        else:
+            return
+        lag = self.clock() - log_time
+        threshold = self.settings.catch_up_lag_seconds
+        if not self.lagging and lag > threshold:
+            self.lagging = True
+            logger.warning("ログ処理が %.0f 秒遅れています -> 追いつきモード (チャット抑制)", lag)
+        elif self.lagging and lag < threshold / 2:
+            self.lagging = False
+            logger.info("ログに追いつきました (遅延 %.1f 秒, 抑制したチャット %d 件)", lag, self.suppressed_says)
+
+    def write_checkpoint(self, durable: bool = False) -> None:
+        """Save the follower position and MatchState for a later resume.
+
+        Between batches the follower offset matches MatchState.  Inside a
+        batch the position just past the line being handled is used, so
+        the lines after it are replayed on resume.  ``durable`` writes the
+        file before returning instead of queueing it.
+        """
+        self._checkpoint_due = False
+        if not self.settings.checkpoint_file or self.follower is None or not self.follower.current_path:
+            return
+        path, offset = self._handled_position or (self.follower.current_path, self.follower.offset)
+        checkpoint = Checkpoint(path, offset, self.state.to_dict())
+        try:
+            save_checkpoint(self.settings.checkpoint_file, checkpoint, durable=durable)
+        except OSError as e:
+            logger.warning("チェックポイントの保存に失敗しました: %s", e)
+
+    def _resume_from_checkpoint(self) -> None:
+        assert self.follower is not None
+        if not self.settings.checkpoint_file:
+            return
+        checkpoint = load_checkpoint(self.settings.checkpoint_file)
+        if checkpoint is None:
+            return
+        if not self.follower.resume(checkpoint.log_path, checkpoint.offset):
+            logger.info("チェックポイントのログ %s を再開できないため最新ログの末尾から開始します", checkpoint.log_path)
+            return
+        self.state = MatchState.from_dict(checkpoint.state)
+        self.state.WIN_ROUNDS = self.settings.max_rounds // 2 + 1
+        self.current_log_path = checkpoint.log_path
+        self.resuming = True
+        logger.info(
+            "チェックポイントから再開: %s @ %d (round=%d CT=%d T=%d)",
+            checkpoint.log_path,
+            checkpoint.offset,
+            self.state.round_number,
+            self.state.ct_score,
+            self.state.t_score,
+        )
+
+    def _commit_match_result(
+        self,
+        winner: str,
+        ct_players: List[str],
+        t_players: List[str],
+        score: Tuple[int, int],
+    ) -> None:
+        """Apply a result to stats and elo, journal it, then save snapshots.
+
+        The journal append is the commit point: stats and elo snapshots
+        written after it can always be brought back in sync from it.
+        """
+        names = [player.upper() for player in ct_players + t_players]
+        stats_before = {name: dict(PLAYER_STATS.get(name, {})) for name in names}
+        elo_before = {name: get_elo(name) for name in names}
+        self.record_match_result(winner, ct_players, t_players, save=False)
+        update_elo(winner, ct_players, t_players, save=False)
+        if self.journal is not None:
+            record = build_record(
+                winner, self.state.current_map, score, ct_players, t_players, stats_before, elo_before
+            )
+            self.journal.append(record)
+            # Past the Game Over line on disk now: a crash must not replay it
+            # and journal the match a second time.
+            self.write_checkpoint(durable=True)
+            save_and_compact(self.journal, names)
+        else:
+            save_stats(names)
+            save_elo(names)
+
+    def record_match_result(
+        self,
+        winner: str,
+        ct_players: List[str],
+        t_players: List[str],
+        save: bool = True,
+    ) -> None:
         logger.debug(f"[DEBUG] Winner: {winner}")
         logger.debug(f"[DEBUG] CT: {ct_players}")
         logger.debug(f"[DEBUG] T: {t_players}")
@@ -1338,7 +1702,7 @@ class Controller:
             if is_bot(player):
                 continue
             name = player.upper()
-            steam_id = TARGETS.get(name)
+            steam_id = get_steam_id(name)
             stats = PLAYER_STATS.setdefault(name, {"wins": 0, "losses": 0})
             if steam_id:
                 stats["steam_id"] = steam_id
@@ -1352,7 +1716,7 @@ class Controller:
             if is_bot(player):
                 continue
             name = player.upper()
-            steam_id = TARGETS.get(name)
+            steam_id = get_steam_id(name)
             stats = PLAYER_STATS.setdefault(name, {"wins": 0, "losses": 0})
             if steam_id:
                 stats["steam_id"] = steam_id
@@ -1362,12 +1726,16 @@ class Controller:
                 stats["losses"] += 1
             logger.debug(f"[STATS] {name}: {stats}")
 
-        save_stats()
-        logger.info("試合結果を保存しました")
+        if save:
+            save_stats([player.upper() for player in ct_players + t_players])
+            logger.info("試合結果を保存しました")
 
 
-    def run(self) -> None:
-        """Documentation."""
+    def start(self) -> None:
+        """Log settings, load persisted data and open the log follower.
+
+        Shared by run() and the asyncio runtime.
+        """
         logger.info("CS2 controller start")
         logger.info("config source: %s", self.settings.config_source)
         logger.info(
@@ -1380,48 +1748,67 @@ class Controller:
         load_stats()
         load_elo()
         load_targets()
+        if self.settings.match_journal_file:
+            self.journal = MatchJournal(self.settings.match_journal_file)
+            replayed = replay_journal(self.journal)
+            if replayed:
+                save_and_compact(self.journal, replayed)
 
         self.current_log_path = None
-        self.log_fp = None
+        self.follower = LogFollower(self.settings.log_dir, self.log_index)
+        logger.info("log follower backend: %s", self.follower.backend)
+        self._resume_from_checkpoint()
+        # Players already on the server never log a connect line.
+        self.rcon_query("status", self._seed_roster)
+
+    def _seed_roster(self, output: Optional[str]) -> None:
+        """Fill the roster from the status reply sent by start()."""
+        if output:
+            self.parse_status_output(output)
+            logger.info("status から接続中のプレイヤーを取得しました: %d人", len(self.roster))
+
+    def run(self) -> None:
+        """Documentation."""
+        self.start()
 
         wait_time = 0
-        while True:
-            latest = self.latest_log()
-            if not latest:
-                if wait_time == 0:
-                    logger.info("ログファイルを待機中...")
-                time.sleep(1)
-                wait_time += 1
-                if wait_time > 30:
-                    logger.error("30秒待機してもログファイルが見つからないため終了します")
-                    return
-                continue
+        try:
+            while True:
+                if self.follower.refresh():
+                    self.current_log_path = self.follower.current_path
+                    logger.info("ログ監視切り替え: %s", self.current_log_path)
+
+                if self.follower.current_path is None:
+                    if wait_time == 0:
+                        logger.info("ログファイルを待機中...")
+                    time.sleep(1)
+                    wait_time += 1
+                    if wait_time > 30:
+                        logger.error("30秒待機してもログファイルが見つからないため終了します")
+                        # Non-zero so launcher.py restarts us to wait again.
+                        sys.exit(1)
+                    continue
 
-            if latest != self.current_log_path:
-                if self.log_fp:
-                    self.log_fp.close()
-                self.current_log_path = latest
-                self.log_fp = open(latest, "r", encoding="utf-8", errors="ignore")
-                self.log_fp.seek(0, os.SEEK_END)
-                logger.info("ログ監視切り替え: %s", latest)
-
-            line = self.log_fp.readline()
-            if not line:
-                self.check_idle()
-                self.check_silence()
-                time.sleep(0.1)
-                continue
+                lines = self.follower.read_lines()
+                if lines:
+                    self.handle_lines(lines)
+                self.scheduler.run_due()
+                if not lines:
+                    self.follower.wait(self._wait_timeout())
+        finally:
+            self.follower.close()
 
-            logger.debug("Read line: %s", line.strip())
-            self.handle_line(line.strip())
-            self.check_silence()
+    def _wait_timeout(self) -> float:
+        next_delay = self.scheduler.next_delay()
+        return IDLE_WAKE_SECONDS if next_delay is None else min(IDLE_WAKE_SECONDS, next_delay)
 
     def check_idle(self) -> None:
         if not self.should_commentate():
             return
-        if not self.state.last_kill_time:
+        idle = self._seconds_since_kill()
+        if idle is None:
             return
-        if time.time() - self.state.last_kill_time >= self.settings.idle_comment_seconds:
+        if idle >= self.settings.idle_comment_seconds:
             alive_players = list(self.state.alive_ct | self.state.alive_t)
             if alive_players:
                 target = random.choice(alive_players)
@@ -1431,23 +1818,112 @@ class Controller:
                     "idle_cheer",
                     cooldown_seconds=self.settings.commentary_cooldown_seconds,
                 ):
-                    self.state.last_kill_time = time.time()
+                    self._mark_last_kill()
 
 
-def main() -> None:
-    logger.debug("main() start")
-    from rcon_utils import rcon as _rcon_func, say as _say_func
+@contextmanager
+def data_files(settings: RuntimeConfig) -> Iterator[None]:
+    """Set up the player store and background JSON writer for a live run.
 
+    On exit pending JSON writes are flushed and the store is closed.
+    """
+    store = open_sqlite_store(settings.player_db_file) if settings.player_store == "sqlite" else None
+    writer = JsonWriter(window=settings.persistence_flush_seconds)
+    install_writer(writer)
+    writer.start()
+    try:
+        yield
+    finally:
+        writer.stop()
+        install_writer(None)
+        logger.info("json writer: %s", writer.summary())
+        if store is not None:
+            store.close()
+            install_store(None)
+
+
+def _speed_arg(raw: str) -> Optional[float]:
+    # Imported here: replay imports this module.
+    from replay import parse_speed
+
+    try:
+        return parse_speed(raw)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a positive number or 'max', got {raw!r}") from None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="CS2 server controller")
+    parser.add_argument("--replay", metavar="PATH", help="replay a recorded log offline and print a report")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="run log tailing, RCON, chat and timers as asyncio tasks",
+    )
+    parser.add_argument(
+        "--speed",
+        default="max",
+        type=_speed_arg,
+        metavar="N|max",
+        help="replay speed multiplier based on log timestamps (default: max)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logger.debug("main() start")
+    args = parse_args(argv)
     settings = load_runtime_config()
-    controller = Controller(_rcon_func, _say_func, MatchState(), settings=settings)
-    controller.run()
+
+    if args.replay:
+        from replay import run_replay
+
+        logger.setLevel(logging.WARNING)
+        report = run_replay(args.replay, args.speed, settings=settings)
+        report.print()
+        return
+
+    if args.use_async:
+        import asyncio
+
+        from async_runtime import run_async
+
+        asyncio.run(run_async(settings))
+        return
+
+    from rcon_utils import rcon as _rcon_func, rcon_many as _rcon_many_func, say as _say_func
+
+    outbox = ChatQueue(
+        _say_func,
+        max_size=settings.chat_queue_size,
+        rate_per_second=settings.chat_rate_per_second,
+        commentary_max_age=settings.commentary_max_age_seconds,
+    )
+    controller = Controller(
+        _rcon_func,
+        _say_func,
+        MatchState(),
+        settings=settings,
+        rcon_many_func=_rcon_many_func,
+        outbox=outbox,
+    )
+    with data_files(settings):
+        outbox.start()
+        try:
+            controller.run()
+        finally:
+            # Flush queued chat before the data files are closed.
+            outbox.stop()
+            logger.info("chat queue: %s", outbox.summary())
 
 if __name__ == "__main__":
     try:
         main()
     except Exception as e:
+        # launcher.py restarts the controller after a non-zero exit.
         logger.exception("エラーが発生しました: %s", e)
-        input("エラーが発生しました。Enterキーで終了します。")
+        sys.exit(1)
 
 
 
@@ -0,0 +1,336 @@
+"""Log line patterns, the typed events parsed from them, and the event bus.
+
+Each interesting server log line is parsed exactly once by ``parse_line``
+into a small slotted record, which ``EventBus.publish`` then hands to every
+subscriber of that event type in subscription order.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Patterns.  The server writes these keywords with fixed casing, so they are
+# matched case-sensitively, like the LINE_CLASSES markers that select them.
+KILL_REGEX = re.compile(
+    r'"(?P<killer>[^"<]+)<\d+><(?P<killer_steam_id>[^>]+)><(?P<killer_team>CT|TERRORIST)>".*?'
+    r'killed.*?"(?P<victim>[^"<]+)<\d+><(?P<victim_steam_id>[^>]+)><(?P<victim_team>CT|TERRORIST)>".*?'
+    r'with "(?P<weapon>[^"]+)"(?:\s*\((?P<flags>[^)]*)\))?'
+)
+
+ACCOLADE_RE = re.compile(
+    r'ACCOLADE, FINAL: \{(?P<type>[^}]+)\},\s+(?P<player>[^<]+)<\d+>,\s+VALUE: (?P<value>[\d.]+)'
+)
+
+DISCONNECT_RE = re.compile(
+    r'"(?P<name>[^"<]+)<\d+><(?P<steam_id>[^>]+)><(?P<team>CT|TERRORIST)>" disconnected'
+)
+
+CONNECT_RE = re.compile(
+    r'"(?P<name>[^"<]+)<\d+><(?P<steam_id>\[U:1:\d+\])><[^>]*>" connected.*'
+)
+
+MATCH_STATUS_RE = re.compile(r'MatchStatus: Score: \d+:\d+ on map ".*?" RoundsPlayed: (\d+)')
+
+MAP_CHANGE_RE = re.compile(r'Loading map "([^\"]+)"')
+ROUND_START_RE = re.compile(r'Round_Start|Starting Freeze period')
+# Applied to the text of a chat line (CHAT_RE "text" group).
+CHAT_COMMAND_TEXT_RE = re.compile(r'!?(\w+)(?:\s+(.*))?', re.DOTALL)
+GAME_OVER_RE = re.compile(r'Game Over: .*?score\s+(\d+):(\d+)')
+
+TEAM_ASSIGN_RE = re.compile(
+    r'"(?P<name>.+?)<\d+><(?P<steam_id>[^>]+)><[^>]*>" joined team "(?P<team>CT|TERRORIST)"'
+)
+
+CHAT_RE = re.compile(
+    r'"(?P<name>.+?)<\d+><(?P<steamid>\[U:1:(?P<accountid>\d+)\])><(?P<team>\w+)>" say "(?P<text>.+)"'
+)
+
+PLAYER_TEAM_RE = re.compile(r'"(?P<name>[^<]+)<\d+><(?P<steam_id>[^>]+)><(?P<team>CT|TERRORIST)>"')
+
+# "L MM/DD/YYYY - HH:MM:SS: " prefix of every server log line.
+LOG_TIMESTAMP_RE = re.compile(r"L (\d\d)/(\d\d)/(\d{4}) - (\d\d):(\d\d):(\d\d)")
+LOG_TIMESTAMP_LEN = len("L 01/03/2026 - 18:20:00")
+
+# Byte-level prefilter run before a raw log line is decoded.  Every pattern
+# above (and the JSON block markers) needs at least one of these substrings,
+# so lines without any of them can be dropped without decoding.
+INTERESTING_LINE_RE = re.compile(
+    rb'JSON_|Round_Start|Freeze period|killed|say "|connected|ACCOLADE|MatchStatus|Game Over'
+    rb'|Loading map|joined team|><CT>"|><TERRORIST>"'
+)
+
+
+@lru_cache(maxsize=256)
+def _parse_stamp(stamp: str) -> Optional[float]:
+    match = LOG_TIMESTAMP_RE.fullmatch(stamp)
+    if not match:
+        return None
+    month, day, year, hour, minute, second = (int(g) for g in match.groups())
+    try:
+        return datetime(year, month, day, hour, minute, second).timestamp()
+    except ValueError:
+        # Well-formed digits but not a real date/time (month 13, day 32...).
+        return None
+
+
+def line_time(line: str) -> Optional[float]:
+    """Return the server timestamp of a log line (local time), or None.
+
+    Lines arrive in bursts that share a second, so the parsed prefix is
+    cached and only the first line of each second pays for the parse.
+    """
+    return _parse_stamp(line[:LOG_TIMESTAMP_LEN])
+
+
+def parse_log_time(raw: bytes) -> Optional[float]:
+    """``line_time`` for a raw, undecoded log line."""
+    return _parse_stamp(raw[:LOG_TIMESTAMP_LEN].decode("latin-1"))
+
+
+@dataclass(slots=True)
+class LogEvent:
+    """Base class for parsed log events.
+
+    ``timestamp`` is the server time from the line's ``L ...`` prefix, or
+    None when the line had none.
+    """
+
+    timestamp: Optional[float] = field(default=None, kw_only=True, compare=False)
+
+
+@dataclass(slots=True)
+class RoundStartEvent(LogEvent):
+    pass
+
+
+@dataclass(slots=True)
+class KillEvent(LogEvent):
+    killer: str
+    killer_steam_id: str
+    killer_team: str
+    victim: str
+    victim_steam_id: str
+    victim_team: str
+    weapon: str
+    headshot: bool = False
+    penetrated: bool = False
+
+
+@dataclass(slots=True)
+class ChatEvent(LogEvent):
+    """A ``say`` line.  ``command`` is set when a CT/T player typed one."""
+
+    name: str
+    steam_id: str
+    account_id: str
+    team: str
+    text: str
+    command: Optional[str] = None
+    arg: str = ""
+
+
+@dataclass(slots=True)
+class ConnectEvent(LogEvent):
+    name: str
+    steam_id: str
+
+
+@dataclass(slots=True)
+class DisconnectEvent(LogEvent):
+    name: str
+    steam_id: str
+    team: str
+
+
+@dataclass(slots=True)
+class TeamJoinEvent(LogEvent):
+    name: str
+    steam_id: str
+    team: str
+
+
+@dataclass(slots=True)
+class PlayerTeamEvent(LogEvent):
+    """Any other player line that carries the player's current CT/T tag."""
+
+    name: str
+    steam_id: str
+    team: str
+
+
+@dataclass(slots=True)
+class AccoladeEvent(LogEvent):
+    accolade_type: str
+    player: str
+    value: float
+
+
+@dataclass(slots=True)
+class MatchStatusEvent(LogEvent):
+    rounds_played: int
+
+
+@dataclass(slots=True)
+class GameOverEvent(LogEvent):
+    ct_score: int
+    t_score: int
+
+
+@dataclass(slots=True)
+class MapChangeEvent(LogEvent):
+    map_name: str
+
+
+Parser = Callable[[str], Optional[LogEvent]]
+
+
+def _parse_round_start(line: str) -> Optional[LogEvent]:
+    return RoundStartEvent() if ROUND_START_RE.search(line) else None
+
+
+def _parse_kill(line: str) -> Optional[LogEvent]:
+    m = KILL_REGEX.search(line)
+    if not m:
+        return None
+    flags = (m.group("flags") or "").lower().split()
+    return KillEvent(
+        m.group("killer"),
+        m.group("killer_steam_id"),
+        m.group("killer_team"),
+        m.group("victim"),
+        m.group("victim_steam_id"),
+        m.group("victim_team"),
+        m.group("weapon"),
+        headshot="headshot" in flags,
+        penetrated="penetrated" in flags,
+    )
+
+
+def _parse_chat(line: str) -> Optional[LogEvent]:
+    m = CHAT_RE.search(line)
+    if not m:
+        return None
+    team = m.group("team")
+    text = m.group("text")
+    event = ChatEvent(
+        m.group("name").strip(),
+        m.group("steamid"),
+        m.group("accountid").strip(),
+        team,
+        text,
+    )
+    if team in ("CT", "TERRORIST"):
+        cmd = CHAT_COMMAND_TEXT_RE.fullmatch(text)
+        if cmd:
+            event.command = cmd.group(1)
+            event.arg = cmd.group(2) or ""
+    return event
+
+
+def _parse_connect(line: str) -> Optional[LogEvent]:
+    m = CONNECT_RE.search(line)
+    return ConnectEvent(m.group("name"), m.group("steam_id")) if m else None
+
+
+def _parse_disconnect(line: str) -> Optional[LogEvent]:
+    m = DISCONNECT_RE.search(line)
+    return DisconnectEvent(m.group("name"), m.group("steam_id"), m.group("team")) if m else None
+
+
+def _parse_team_join(line: str) -> Optional[LogEvent]:
+    m = TEAM_ASSIGN_RE.search(line)
+    return TeamJoinEvent(m.group("name"), m.group("steam_id"), m.group("team")) if m else None
+
+
+def _parse_player_team(line: str) -> Optional[LogEvent]:
+    m = PLAYER_TEAM_RE.search(line)
+    return PlayerTeamEvent(m.group("name"), m.group("steam_id"), m.group("team")) if m else None
+
+
+def _parse_accolade(line: str) -> Optional[LogEvent]:
+    m = ACCOLADE_RE.search(line)
+    if not m:
+        return None
+    return AccoladeEvent(m.group("type"), m.group("player").strip(), float(m.group("value")))
+
+
+def _parse_match_status(line: str) -> Optional[LogEvent]:
+    m = MATCH_STATUS_RE.search(line)
+    return MatchStatusEvent(int(m.group(1))) if m else None
+
+
+def _parse_game_over(line: str) -> Optional[LogEvent]:
+    m = GAME_OVER_RE.search(line)
+    return GameOverEvent(int(m.group(1)), int(m.group(2))) if m else None
+
+
+def _parse_map_change(line: str) -> Optional[LogEvent]:
+    m = MAP_CHANGE_RE.search(line)
+    return MapChangeEvent(m.group(1)) if m else None
+
+
+# Cheap substring markers checked in order before any regex runs.  The first
+# marker found in a line selects the only parsers worth trying for it.
+LINE_CLASSES: List[Tuple[str, Tuple[Parser, ...]]] = [
+    (' say "', (_parse_chat,)),
+    (" killed ", (_parse_kill,)),
+    ("disconnected", (_parse_disconnect,)),
+    ("connected", (_parse_connect,)),
+    ("joined team", (_parse_team_join,)),
+    ("ACCOLADE", (_parse_accolade,)),
+    ("MatchStatus", (_parse_match_status,)),
+    ("Game Over", (_parse_game_over,)),
+    ("Loading map", (_parse_map_change,)),
+    ("Round_Start", (_parse_round_start,)),
+    ("Freeze period", (_parse_round_start,)),
+]
+# Any other player line ("purchased", "attacked", ...) can still refresh the
+# player's team, but only if it carries a CT/T team tag.
+TEAM_TAG_MARKERS = ('><CT>"', '><TERRORIST>"')
+
+
+def parse_line(line: str) -> Optional[LogEvent]:
+    """Parse one decoded log line into an event, or None if nothing cares."""
+    event = _parse_event(line)
+    if event is not None:
+        event.timestamp = line_time(line)
+    return event
+
+
+def _parse_event(line: str) -> Optional[LogEvent]:
+    for marker, parsers in LINE_CLASSES:
+        if marker in line:
+            for parser in parsers:
+                event = parser(line)
+                if event is not None:
+                    return event
+            break
+    if TEAM_TAG_MARKERS[0] in line or TEAM_TAG_MARKERS[1] in line:
+        return _parse_player_team(line)
+    return None
+
+
+Subscriber = Callable[[LogEvent], None]
+
+
+class EventBus:
+    """Publish each event to every subscriber of its type, in order."""
+
+    def __init__(self) -> None:
+        self.subscribers: Dict[type, List[Subscriber]] = {}
+
+    def subscribe(self, event_type: type, handler: Subscriber) -> None:
+        self.subscribers.setdefault(event_type, []).append(handler)
+
+    def publish(self, event: LogEvent) -> int:
+        """Deliver ``event``; returns the number of subscribers that saw it."""
+        handlers = self.subscribers.get(type(event))
+        if not handlers:
+            return 0
+        for handler in handlers:
+            handler(event)
+        return len(handlers)
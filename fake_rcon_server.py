@@ -0,0 +1,163 @@
+"""Minimal Source RCON server for tests and benchmarks.
+
+Speaks enough of the protocol for ``rcon_utils.RconSession``: login (with the
+empty response CS2 sends before the auth result), command execution and the
+empty-packet probe used for fragmented responses.  ``latency`` delays every
+reply by that long after its request arrived, like a network round-trip:
+requests sent back-to-back are answered back-to-back.
+"""
+
+from __future__ import annotations
+
+import queue
+import socket
+import struct
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+
+def encode_packet(request_id: int, packet_type: int, payload: bytes) -> bytes:
+    body = struct.pack("<ii", request_id, packet_type) + payload + b"\x00\x00"
+    return struct.pack("<i", len(body)) + body
+
+
+def _recv_exact(conn: socket.socket, size: int) -> Optional[bytes]:
+    data = b""
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def read_packet(conn: socket.socket) -> Optional[Tuple[int, int, bytes]]:
+    header = _recv_exact(conn, 4)
+    if header is None:
+        return None
+    (size,) = struct.unpack("<i", header)
+    body = _recv_exact(conn, size)
+    if body is None:
+        return None
+    request_id, packet_type = struct.unpack("<ii", body[:8])
+    return request_id, packet_type, body[8:-2]
+
+
+class FakeRconServer:
+    """Threaded RCON server on 127.0.0.1; use as a context manager."""
+
+    def __init__(
+        self,
+        password: str = "secret",
+        handler: Optional[Callable[[str], str]] = None,
+        *,
+        latency: float = 0.0,
+    ) -> None:
+        self.password = password
+        self.handler = handler or (lambda cmd: "")
+        self.latency = latency
+        self.connections = 0
+        self.commands: List[str] = []
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(("127.0.0.1", 0))
+        self._listener.listen()
+        self.host, self.port = self._listener.getsockname()
+        self._clients: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True)
+
+    def __enter__(self) -> "FakeRconServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._closed = True
+        self._listener.close()
+        self.drop_clients()
+
+    def drop_clients(self) -> None:
+        """Close every open client connection, as a server restart would."""
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for conn in clients:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
+
+    def _accept_loop(self) -> None:
+        while not self._closed:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self.connections += 1
+                self._clients.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _sender(self, conn: socket.socket, outbox: "queue.Queue[Optional[Tuple[float, bytes]]]") -> None:
+        while (item := outbox.get()) is not None:
+            due, data = item
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                conn.sendall(data)
+            except OSError:
+                return
+
+    def _serve(self, conn: socket.socket) -> None:
+        outbox: "queue.Queue[Optional[Tuple[float, bytes]]]" = queue.Queue()
+        sender = threading.Thread(target=self._sender, args=(conn, outbox), daemon=True)
+        sender.start()
+
+        def reply(data: bytes) -> None:
+            outbox.put((time.monotonic() + self.latency, data))
+
+        authed = False
+        try:
+            while True:
+                packet = read_packet(conn)
+                if packet is None:
+                    return
+                request_id, packet_type, payload = packet
+                if packet_type == SERVERDATA_AUTH:
+                    authed = payload.decode() == self.password
+                    reply(
+                        encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, b"")
+                        + encode_packet(request_id if authed else -1, SERVERDATA_AUTH_RESPONSE, b""),
+                    )
+                elif not authed:
+                    return
+                elif packet_type == SERVERDATA_EXECCOMMAND:
+                    command = payload.decode()
+                    with self._lock:
+                        self.commands.append(command)
+                    output = self.handler(command)
+                    reply(encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, output.encode()))
+                else:
+                    # Fragmentation probe: mirror it, then the 0x01 terminator.
+                    reply(
+                        encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, b"")
+                        + encode_packet(request_id, SERVERDATA_RESPONSE_VALUE, b"\x00\x01\x00\x00"),
+                    )
+        except OSError:
+            return
+        finally:
+            outbox.put(None)
+            sender.join()
+            conn.close()
@@ -1,14 +1,48 @@
+"""Crash supervisor for controller.py.
+
+The controller keeps running across matches; this only restarts it when it
+exits with an error, waiting longer after each quick crash.
+"""
+
+import logging
 import subprocess
+import sys
 import time
-import logging
+from typing import Callable, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Restart delay doubles per consecutive crash, up to the cap.
+BACKOFF_INITIAL_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+# A run at least this long counts as healthy and resets the delay.
+HEALTHY_RUN_SECONDS = 60.0
+
 
-# ログ設定（任意）
-logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s")
+def supervise(
+    command: Sequence[str],
+    *,
+    popen: Callable[[List[str]], "subprocess.Popen"] = subprocess.Popen,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> int:
+    """Run ``command`` until it exits cleanly; returns its exit code (0)."""
+    delay = BACKOFF_INITIAL_SECONDS
+    while True:
+        logger.info("🚀 controller.py を起動します")
+        started = clock()
+        code = popen(list(command)).wait()
+        if code == 0:
+            logger.info("controller.py が正常終了しました")
+            return code
+        if clock() - started >= HEALTHY_RUN_SECONDS:
+            delay = BACKOFF_INITIAL_SECONDS
+        logger.warning("🔁 controller.py が異常終了しました (code=%s) -> %.0f 秒後に再起動します", code, delay)
+        sleep(delay)
+        delay = min(delay * 2, BACKOFF_MAX_SECONDS)
 
-while True:
-    logging.info("🚀 controller.py を起動します")
-    proc = subprocess.Popen(["python", "controller.py"])
-    proc.wait()  # 終了を待つ
 
-    logging.info("🔁 試合終了 → controller.py を再起動します")
-    time.sleep(2)  # 少し待ってから再起動
+if __name__ == "__main__":
+    # ログ設定（任意）
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s")
+    sys.exit(supervise([sys.executable, "controller.py", *sys.argv[1:]]))
@@ -0,0 +1,308 @@
+"""Event-driven tailing of the newest CS2 log file."""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from typing import BinaryIO, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants.
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_ROTATION_MASK = IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_Q_OVERFLOW
+_EVENT_HEADER = struct.Struct("iIII")
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class InotifyWatcher:
+    """Directory watcher backed by Linux inotify (via ctypes, no extra dependency)."""
+
+    def __init__(self, directory: str) -> None:
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, f"inotify_add_watch failed for {directory}")
+        self.fd = fd
+
+    def read_events(self, timeout: Optional[float]) -> List[Tuple[int, str]]:
+        """Block up to ``timeout`` seconds and return ``(mask, name)`` pairs."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        events: List[Tuple[int, str]] = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                raw_name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                events.append((mask, os.fsdecode(raw_name)))
+            if len(data) < 64 * 1024:
+                break
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def open_watcher(directory: str) -> Optional[InotifyWatcher]:
+    """Return an inotify watcher for ``directory`` or None when unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return InotifyWatcher(directory)
+    except (OSError, AttributeError) as e:
+        logger.warning("inotify unavailable for %s, falling back to polling: %s", directory, e)
+        return None
+
+
+class LogDirIndex:
+    """Cached answer to "which ``*.log`` in ``log_dir`` is newest?".
+
+    The directory is only rescanned when it was explicitly invalidated (a
+    directory event) or when its own mtime changed, and that check runs at
+    most once per ``check_interval`` seconds.  Between checks ``latest()``
+    is a constant-time lookup regardless of how many logs have piled up.
+    """
+
+    def __init__(
+        self,
+        log_dir: str,
+        *,
+        check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.log_dir = log_dir
+        self.check_interval = check_interval
+        self._clock = clock
+        self._latest: Optional[str] = None
+        self._empty: List[str] = []
+        self._dir_mtime: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self.scan_count = 0
+
+    def invalidate(self) -> None:
+        """Force a rescan on the next ``latest()`` call."""
+        self._dir_mtime = None
+        self._checked_at = None
+
+    def latest(self) -> Optional[str]:
+        now = self._clock()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._latest
+        self._checked_at = now
+
+        try:
+            dir_mtime = os.stat(self.log_dir).st_mtime_ns
+        except OSError:
+            self._latest = None
+            self._dir_mtime = None
+            return None
+
+        if dir_mtime != self._dir_mtime or self._empty_file_grew():
+            self._dir_mtime = dir_mtime
+            self._scan()
+        return self._latest
+
+    def _empty_file_grew(self) -> bool:
+        # The server creates the next log before writing to it; appends do
+        # not touch the directory mtime, so watch those few files directly.
+        for path in self._empty:
+            try:
+                if os.path.getsize(path) > 0:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _scan(self) -> None:
+        self.scan_count += 1
+        newest: Optional[str] = None
+        newest_mtime = -1
+        empty: List[str] = []
+        try:
+            entries = list(os.scandir(self.log_dir))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if not entry.name.endswith(".log"):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if st.st_size <= 0:
+                empty.append(entry.path)
+                continue
+            if st.st_mtime_ns > newest_mtime:
+                newest = entry.path
+                newest_mtime = st.st_mtime_ns
+        self._latest = newest
+        self._empty = empty
+
+
+class LogFollower:
+    """Follow the newest ``*.log`` file in ``log_dir``.
+
+    On Linux the follower sleeps on inotify and wakes as soon as the server
+    appends to the file; new or renamed files in the directory trigger a
+    rotation check.  Elsewhere it falls back to polling every
+    ``poll_interval`` seconds.
+
+    The file is read as bytes in large chunks and split on newlines.  A
+    trailing line that the server has not finished writing yet is kept in
+    a buffer until its newline arrives, so callers only ever see complete
+    lines.
+    """
+
+    def __init__(
+        self,
+        log_dir: str,
+        index: Optional[LogDirIndex] = None,
+        *,
+        poll_interval: float = 0.1,
+        use_inotify: bool = True,
+    ) -> None:
+        self.log_dir = log_dir
+        self.poll_interval = poll_interval
+        self.current_path: Optional[str] = None
+        self.index = index or LogDirIndex(log_dir)
+        self._fp: Optional[BinaryIO] = None
+        self._partial = b""
+        self._watcher = open_watcher(log_dir) if use_inotify else None
+        self._rescan = True
+        # Set by resume(): stay on the resumed file until it is read to the end.
+        self._hold_rotation = False
+        # Whether the last read_lines() reached the end of the file.
+        self.at_eof = True
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._watcher is not None else "polling"
+
+    def refresh(self) -> bool:
+        """Switch to the newest log when a rotation is pending.
+
+        Returns True when a different file was opened.
+        """
+        if not self._rescan or self._hold_rotation:
+            return False
+        # The polling backend has no directory events, so it asks the index
+        # on every wake; the index itself bounds how often it touches disk.
+        latest = self.index.latest()
+        self._rescan = self._watcher is None or latest is None
+        if not latest or latest == self.current_path:
+            return False
+        self._open(latest)
+        return True
+
+    def _open(self, path: str, offset: Optional[int] = None) -> None:
+        if self._fp:
+            self._fp.close()
+        self._fp = open(path, "rb")
+        if offset is None:
+            self._fp.seek(0, os.SEEK_END)
+        else:
+            self._fp.seek(offset)
+        self._partial = b""
+        self.current_path = path
+
+    def resume(self, path: str, offset: int) -> bool:
+        """Follow ``path`` from byte ``offset`` instead of the newest log's end.
+
+        Returns False, leaving the follower as it was, when the file is gone
+        or shorter than ``offset`` (it was truncated or replaced).  A newer
+        log is not switched to until the resumed file has been read to its
+        end, so the tail written while the controller was down is not lost.
+        """
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        if size < offset:
+            return False
+        self._open(path, offset)
+        self._hold_rotation = True
+        self.at_eof = False
+        return True
+
+    @property
+    def offset(self) -> int:
+        """Byte offset just past the last complete line returned so far."""
+        if self._fp is None:
+            return 0
+        return self._fp.tell() - len(self._partial)
+
+    def read_lines(self) -> List[bytes]:
+        """Return the complete raw lines available right now (may be empty).
+
+        Lines are returned without their line terminator and are not
+        decoded; call again while it keeps returning lines to drain a
+        backlog.
+        """
+        if self._fp is None:
+            return []
+        chunk = self._fp.read(READ_CHUNK_SIZE)
+        self.at_eof = len(chunk) < READ_CHUNK_SIZE
+        if self.at_eof:
+            self._hold_rotation = False
+        if not chunk:
+            return []
+        data = self._partial + chunk if self._partial else chunk
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        return lines
+
+    def wait(self, timeout: float) -> None:
+        """Block until the log directory changes or ``timeout`` elapses."""
+        if self._watcher is None:
+            time.sleep(min(timeout, self.poll_interval))
+            return
+
+        current_name = os.path.basename(self.current_path) if self.current_path else None
+        for mask, name in self._watcher.read_events(timeout):
+            if mask & IN_Q_OVERFLOW or (
+                name.endswith(".log") and (mask & _ROTATION_MASK or name != current_name)
+            ):
+                # A new file, or writes to a file we are not following (the
+                # server creates the next log empty and fills it later).
+                self._rescan = True
+                self.index.invalidate()
+
+    def close(self) -> None:
+        if self._fp:
+            self._fp.close()
+            self._fp = None
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
@@ -0,0 +1,227 @@
+"""Append-only journal of finished matches.
+
+Each finished match is one JSON line, appended and fsynced before the stats
+and elo snapshots are saved, so the journal is the commit point for a
+result.  Records are numbered; each snapshot stores the number of the
+newest record it contains (``JOURNAL_SEQ`` in ``player_stats`` and
+``player_elo``, keyed by journal path).  At startup the snapshots are
+loaded and the later records' ``wins``/``losses`` and elo deltas are added
+on top of them; other fields of a stats row are left alone.
+
+Once the snapshots holding every journaled match have been written, the
+journal is compacted down to the records appended since.  This happens on
+the persistence writer thread (see ``persistence.after_writes``), so the
+replay at startup stays short.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List
+
+import player_elo
+import player_stats
+from persistence import after_writes
+
+logger = logging.getLogger(__name__)
+
+# Compact once this many records have piled up since the last compaction.
+COMPACT_AFTER_RECORDS = 20
+
+
+@dataclass
+class MatchRecord:
+    winner: str
+    map_name: str
+    ct_score: int
+    t_score: int
+    ct_players: List[str]
+    t_players: List[str]
+    # name -> {"wins": d, "losses": d} and name -> elo change.
+    stats_deltas: Dict[str, Dict[str, int]]
+    elo_deltas: Dict[str, int]
+    # name -> value after the match, for reading the journal; replay
+    # applies the deltas.
+    stats_after: Dict[str, Dict[str, Any]]
+    elo_after: Dict[str, int]
+    finished_at: float = field(default_factory=time.time)
+    # Assigned by MatchJournal.append(); 1 for the first record ever.
+    seq: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MatchRecord":
+        return cls(**data)
+
+
+class MatchJournal:
+    """One ``MatchRecord`` per line in ``path``."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._repair()
+        records = self.read()
+        self.records = len(records)
+        # Newest record number handed out; raised by replay_journal() to the
+        # snapshots' number so it keeps counting after a full compaction.
+        self.seq = max((record.seq for record in records), default=0)
+
+    def _repair(self) -> None:
+        # A crash mid-append leaves a line without its newline; drop it so
+        # the next append starts on a fresh line.
+        try:
+            with open(self.path, "rb+") as f:
+                data = f.read()
+                if data and not data.endswith(b"\n"):
+                    f.truncate(data.rfind(b"\n") + 1)
+                    logger.warning("dropped a partial record at the end of %s", self.path)
+        except FileNotFoundError:
+            pass
+
+    def append(self, record: MatchRecord) -> None:
+        """Number ``record``, append it and fsync; it is durable on return.
+
+        The in-memory stats and elo must already include it.
+        """
+        with self._lock:
+            record.seq = self.seq + 1
+            line = json.dumps(asdict(record), ensure_ascii=False) + "\n"
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.seq = record.seq
+            self.records += 1
+        mark_applied(self.path, record.seq, stats=True, elo=True)
+
+    def read(self) -> List[MatchRecord]:
+        records: List[MatchRecord] = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return records
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(MatchRecord.from_dict(json.loads(line)))
+            except (ValueError, TypeError) as e:
+                logger.warning("skipping unreadable journal line %s:%d: %s", self.path, number, e)
+        return records
+
+    def compact(self, upto: int) -> None:
+        """Drop records up to number ``upto``; they are in the saved snapshots."""
+        with self._lock:
+            records = self.read()
+            kept = [record for record in records if record.seq > upto]
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(asdict(record), ensure_ascii=False) + "\n" for record in kept)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.records = len(kept)
+        logger.info("compacted match journal: dropped %d records, %d left", len(records) - len(kept), self.records)
+
+
+def build_record(
+    winner: str,
+    map_name: str,
+    score: tuple,
+    ct_players: List[str],
+    t_players: List[str],
+    stats_before: Dict[str, Dict[str, Any]],
+    elo_before: Dict[str, int],
+) -> MatchRecord:
+    """Describe the change from ``*_before`` to the current in-memory values."""
+    stats_deltas: Dict[str, Dict[str, int]] = {}
+    stats_after: Dict[str, Dict[str, Any]] = {}
+    for name, before in stats_before.items():
+        after = player_stats.PLAYER_STATS.get(name)
+        if after is None:
+            continue
+        stats_after[name] = dict(after)
+        stats_deltas[name] = {
+            key: after.get(key, 0) - before.get(key, 0) for key in ("wins", "losses")
+        }
+    elo_deltas: Dict[str, int] = {}
+    elo_after: Dict[str, int] = {}
+    for name, before_elo in elo_before.items():
+        if name not in player_elo.PLAYER_ELO:
+            continue
+        elo_after[name] = player_elo.PLAYER_ELO[name]
+        elo_deltas[name] = elo_after[name] - before_elo
+    return MatchRecord(
+        winner=winner,
+        map_name=map_name,
+        ct_score=int(score[0]),
+        t_score=int(score[1]),
+        ct_players=list(ct_players),
+        t_players=list(t_players),
+        stats_deltas=stats_deltas,
+        elo_deltas=elo_deltas,
+        stats_after=stats_after,
+        elo_after=elo_after,
+    )
+
+
+def apply_record(record: MatchRecord, *, stats: bool = True, elo: bool = True) -> None:
+    """Add the ``wins``/``losses`` and elo changes of ``record`` in memory."""
+    if stats:
+        for name, deltas in record.stats_deltas.items():
+            row = player_stats.PLAYER_STATS.setdefault(name, {"wins": 0, "losses": 0})
+            for key, delta in deltas.items():
+                row[key] = row.get(key, 0) + delta
+    if elo:
+        for name, delta in record.elo_deltas.items():
+            player_elo.PLAYER_ELO[name] = player_elo.PLAYER_ELO.get(name, 1000) + delta
+
+
+def mark_applied(key: str, seq: int, *, stats: bool, elo: bool) -> None:
+    """Record that the in-memory stats/elo include record ``seq`` of journal ``key``."""
+    if stats:
+        player_stats.JOURNAL_SEQ[key] = max(player_stats.JOURNAL_SEQ.get(key, 0), seq)
+    if elo:
+        player_elo.JOURNAL_SEQ[key] = max(player_elo.JOURNAL_SEQ.get(key, 0), seq)
+
+
+def replay_journal(journal: MatchJournal) -> List[str]:
+    """Apply the journaled matches the loaded snapshots do not contain yet.
+
+    Returns the names whose rows changed; once those are saved again the
+    journal can be compacted.
+    """
+    stats_seq = player_stats.JOURNAL_SEQ.get(journal.path, 0)
+    elo_seq = player_elo.JOURNAL_SEQ.get(journal.path, 0)
+    names: Dict[str, None] = {}
+    replayed = 0
+    for record in journal.read():
+        stats, elo = record.seq > stats_seq, record.seq > elo_seq
+        if not (stats or elo):
+            continue
+        apply_record(record, stats=stats, elo=elo)
+        mark_applied(journal.path, record.seq, stats=stats, elo=elo)
+        if stats:
+            names.update(dict.fromkeys(record.stats_deltas))
+        if elo:
+            names.update(dict.fromkeys(record.elo_deltas))
+        replayed += 1
+    journal.seq = max(journal.seq, stats_seq, elo_seq)
+    if replayed:
+        logger.info("replayed %d journaled matches from %s", replayed, journal.path)
+    return list(names)
+
+
+def save_and_compact(journal: MatchJournal, names: List[str]) -> None:
+    """Save the snapshots for ``names``; compact once they are on disk."""
+    player_stats.save_stats(names)
+    player_elo.save_elo(names)
+    upto = journal.seq
+    if journal.records >= COMPACT_AFTER_RECORDS:
+        after_writes(lambda: journal.compact(upto))
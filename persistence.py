@@ -0,0 +1,189 @@
+"""Atomic JSON writes for the data files, optionally from a background thread.
+
+``player_stats`` and ``player_elo`` build a snapshot of their dicts on the
+caller's thread and hand it to ``write_json``.  Without an installed
+``JsonWriter`` the file is written (and fsynced) right away.  With one, the
+write is queued: saves of the same file within ``window`` seconds collapse
+into a single write of the newest snapshot, and the controller loop never
+waits on the disk.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write_json(path: str, payload: Any) -> None:
+    directory = os.path.dirname(os.path.abspath(path)) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@dataclass
+class JsonWriterMetrics:
+    submitted: int = 0
+    writes: int = 0
+    coalesced: int = 0
+    errors: int = 0
+
+
+class JsonWriter:
+    """Single background thread that owns every data-file write."""
+
+    def __init__(
+        self,
+        *,
+        window: float = 1.0,
+        write: Callable[[str, Any], None] = atomic_write_json,
+    ) -> None:
+        self.window = window
+        self._write = write
+        self._pending: Dict[str, Any] = {}
+        self._callbacks: List[Callable[[], None]] = []
+        # Paths whose newest write failed; callbacks are dropped until they succeed.
+        self._failed: Set[str] = set()
+        self._cond = threading.Condition()
+        # Held while writing, so write_now() cannot be overtaken by an older
+        # snapshot of the same file that flush() already took.
+        self._io_lock = threading.Lock()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.metrics = JsonWriterMetrics()
+
+    def submit(self, path: str, payload: Any) -> None:
+        """Queue ``payload`` for ``path``, replacing a queued older snapshot."""
+        with self._cond:
+            self.metrics.submitted += 1
+            if path in self._pending:
+                self.metrics.coalesced += 1
+            self._pending[path] = payload
+            self._cond.notify()
+
+    def write_now(self, path: str, payload: Any) -> None:
+        """Write ``payload`` on the calling thread, dropping a queued older one."""
+        with self._io_lock:
+            with self._cond:
+                self._pending.pop(path, None)
+            self._write(path, payload)
+            self.metrics.writes += 1
+            self._failed.discard(path)
+
+    def after_writes(self, callback: Callable[[], None]) -> None:
+        """Run ``callback`` on the writer thread after everything queued so far.
+
+        If a file could not be written, the callback is dropped instead: it
+        may depend on data that never reached the disk.
+        """
+        with self._cond:
+            self._callbacks.append(callback)
+            self._cond.notify()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="json-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the thread and write whatever is still queued."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> None:
+        """Write every queued snapshot now, on the calling thread."""
+        with self._cond:
+            batch, self._pending = self._pending, {}
+            callbacks, self._callbacks = self._callbacks, []
+        with self._io_lock:
+            for path, payload in batch.items():
+                try:
+                    self._write(path, payload)
+                    self.metrics.writes += 1
+                    self._failed.discard(path)
+                except Exception:
+                    self.metrics.errors += 1
+                    self._failed.add(path)
+                    logger.exception("failed to write %s", path)
+        if self._failed and callbacks:
+            logger.warning(
+                "skipping %d after-write callbacks: %s not written", len(callbacks), ", ".join(sorted(self._failed))
+            )
+            return
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("after-write callback failed: %r", callback)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._callbacks and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                # Let the rest of a burst arrive before writing.
+                self._cond.wait_for(lambda: self._stopping, self.window)
+                if self._stopping:
+                    return
+            self.flush()
+
+    def summary(self) -> str:
+        m = self.metrics
+        return f"submitted={m.submitted} writes={m.writes} coalesced={m.coalesced} errors={m.errors}"
+
+
+_writer: Optional[JsonWriter] = None
+
+
+def install_writer(writer: Optional[JsonWriter]) -> None:
+    """Route write_json() through ``writer`` (None: write synchronously)."""
+    global _writer
+    _writer = writer
+
+
+def write_json(path: str, payload: Any, *, durable: bool = False) -> None:
+    """Write ``payload`` to ``path`` now, or queue it on the installed writer.
+
+    ``payload`` must be a snapshot the caller will not mutate afterwards.
+    With ``durable`` it is on disk when this returns, writer or not.
+    """
+    if _writer is None:
+        atomic_write_json(path, payload)
+    elif durable:
+        _writer.write_now(path, payload)
+    else:
+        _writer.submit(path, payload)
+
+
+def after_writes(callback: Callable[[], None]) -> None:
+    """Run ``callback`` once every write queued so far is on disk.
+
+    Without an installed writer writes are already done, so it runs now.
+    """
+    if _writer is not None:
+        _writer.after_writes(callback)
+    else:
+        callback()
@@ -1,30 +1,21 @@
 import json
 import logging
 import os
-import tempfile
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Optional
+
+import player_store
+from persistence import write_json
+from player_registry import is_bot
 
 logger = logging.getLogger(__name__)
 
 PLAYER_ELO: Dict[str, int] = {}
+# Journal path -> newest match_journal record included in PLAYER_ELO.
+JOURNAL_SEQ: Dict[str, int] = {}
 PLAYER_ELO_FILE = "player_elo.json"
 PLAYER_ELO_SCHEMA_VERSION = 2
 
 
-def _atomic_write_json(path: str, payload: dict) -> None:
-    directory = os.path.dirname(os.path.abspath(path)) or "."
-    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
-    try:
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2, ensure_ascii=False)
-            f.flush()
-            os.fsync(f.fileno())
-        os.replace(tmp_path, path)
-    finally:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
-
-
 def _normalize_elo_payload(raw: Any) -> Dict[str, int]:
     if not isinstance(raw, dict):
         return {}
@@ -51,6 +42,14 @@ def _normalize_elo_payload(raw: Any) -> Dict[str, int]:
 def load_elo() -> None:
     """Load ELO ratings from disk with legacy compatibility."""
     global PLAYER_ELO
+    store = player_store.get_store()
+    if store is not None:
+        PLAYER_ELO.clear()
+        PLAYER_ELO.update(store.load_elo())
+        JOURNAL_SEQ.clear()
+        JOURNAL_SEQ.update(store.load_journal_seq("player_elo"))
+        return
+    JOURNAL_SEQ.clear()
     if not os.path.exists(PLAYER_ELO_FILE):
         PLAYER_ELO.clear()
         return
@@ -60,24 +59,43 @@ def load_elo() -> None:
 
     PLAYER_ELO.clear()
     PLAYER_ELO.update(_normalize_elo_payload(raw))
+    if isinstance(raw, dict) and "ratings" in raw and isinstance(raw.get("journal_seq"), dict):
+        JOURNAL_SEQ.update({str(k): int(v) for k, v in raw["journal_seq"].items()})
+
 
+def save_elo(names: Optional[Iterable[str]] = None) -> None:
+    """Save ELO ratings as schema-versioned JSON.
 
-def save_elo() -> None:
-    """Save ELO ratings as schema-versioned JSON."""
+    With the SQLite store only the rows for ``names`` (all when None) are
+    merged into the database, and the merged ratings are read back.
+    """
+    store = player_store.get_store()
+    if store is not None:
+        rows = {k: v for k, v in player_store.select(PLAYER_ELO, names).items() if not is_bot(k)}
+        PLAYER_ELO.update(store.save_elo(rows, JOURNAL_SEQ))
+        logger.debug("saved ELO: %d players", len(rows))
+        return
     filtered = {k: v for k, v in PLAYER_ELO.items() if not is_bot(k)}
     payload = {
         "schema_version": PLAYER_ELO_SCHEMA_VERSION,
         "ratings": filtered,
+        "journal_seq": dict(JOURNAL_SEQ),
     }
-    _atomic_write_json(PLAYER_ELO_FILE, payload)
-    logger.debug("saved ELO: %s", json.dumps(payload, indent=2, ensure_ascii=False))
+    write_json(PLAYER_ELO_FILE, payload)
+    logger.debug("saved ELO: %d players", len(filtered))
 
 
 def get_elo(player: str) -> int:
     return PLAYER_ELO.get(player.upper(), 1000)
 
 
-def update_elo(winner_team: str, ct_players: list[str], t_players: list[str], k: int = 25) -> None:
+def update_elo(
+    winner_team: str,
+    ct_players: list[str],
+    t_players: list[str],
+    k: int = 25,
+    save: bool = True,
+) -> None:
     winner_team = winner_team.upper()
     ct_players = [p for p in ct_players if not is_bot(p)]
     t_players = [p for p in t_players if not is_bot(p)]
@@ -93,13 +111,10 @@ def update_elo(winner_team: str, ct_players: list[str], t_players: list[str], k:
         PLAYER_ELO[name] += k if winner_team == "TERRORIST" else -k
 
     logger.debug("ELO updated: %s", PLAYER_ELO)
-    save_elo()
+    if save:
+        save_elo([p.upper() for p in ct_players + t_players])
 
 
 def get_all_elo() -> Dict[str, int]:
     return PLAYER_ELO.copy()
 
-
-def is_bot(name: str) -> bool:
-    u = name.upper()
-    return u.startswith("BOT") or u == "BOT"
@@ -0,0 +1,140 @@
+"""One in-memory identity per player, keyed by the Steam account id.
+
+Log lines name players as ``name<slot><[U:1:ACCOUNT]><team>``; round_stats
+uses the bare account id; ``player_stats``/``player_elo`` key rows by the
+upper-cased name.  ``PLAYERS`` indexes the same ``PlayerIdentity`` under all
+three, so every lookup is a single dict hit.  Names are interned, a rename
+keeps the old name as an alias (still resolvable until someone else takes
+it), and the bot flag is decided once when the identity is created.
+
+Bots all share the steam id ``BOT``; each bot name gets its own negative
+account id instead.
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Union
+
+BOT_STEAM_ID = "BOT"
+STEAM_ID_PREFIX = "[U:1:"
+
+
+def account_id_of(steam_id: str) -> Optional[int]:
+    """``[U:1:1001]`` -> 1001; None for bots and anything else."""
+    if not (steam_id.startswith(STEAM_ID_PREFIX) and steam_id.endswith("]")):
+        return None
+    try:
+        return int(steam_id[len(STEAM_ID_PREFIX):-1])
+    except ValueError:
+        return None
+
+
+@dataclass(eq=False)
+class PlayerIdentity:
+    account_id: int
+    name: str
+    steam_id: str
+    is_bot: bool
+    aliases: List[str] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        """Row key used by PLAYER_STATS, PLAYER_ELO and TARGETS."""
+        return self.name.upper()
+
+
+class PlayerRegistry:
+    def __init__(self) -> None:
+        self._by_account: Dict[int, PlayerIdentity] = {}
+        self._by_steam: Dict[str, PlayerIdentity] = {}
+        self._by_name: Dict[str, PlayerIdentity] = {}
+        self._next_bot_id = -1
+
+    def __len__(self) -> int:
+        return len(self._by_account)
+
+    def __iter__(self) -> Iterator[PlayerIdentity]:
+        return iter(self._by_account.values())
+
+    def clear(self) -> None:
+        self._by_account.clear()
+        self._by_steam.clear()
+        self._by_name.clear()
+        self._next_bot_id = -1
+
+    def observe(self, name: str, steam_id: str, *, rename: bool = True) -> Optional[PlayerIdentity]:
+        """Record that ``name`` plays as ``steam_id`` and return the identity.
+
+        With ``rename=False`` an already known account keeps its current
+        name (used when seeding from the upper-cased keys on disk).
+        Returns None for steam ids that are neither ``[U:1:N]`` nor ``BOT``.
+        """
+        key = name.upper()
+        account_id = account_id_of(steam_id)
+        if account_id is None:
+            if steam_id != BOT_STEAM_ID:
+                return None
+            identity = self._by_name.get(key)
+            if identity is None or not identity.is_bot:
+                identity = PlayerIdentity(self._next_bot_id, sys.intern(name), BOT_STEAM_ID, True)
+                self._next_bot_id -= 1
+                self._by_account[identity.account_id] = identity
+                self._by_name[key] = identity
+            return identity
+
+        identity = self._by_account.get(account_id)
+        if identity is None:
+            identity = PlayerIdentity(account_id, sys.intern(name), sys.intern(steam_id), False)
+            self._by_account[account_id] = identity
+            self._by_steam[identity.steam_id] = identity
+        elif identity.name != name:
+            if rename:
+                alias, identity.name = identity.name, sys.intern(name)
+            else:
+                alias = sys.intern(name)
+            if alias.upper() != identity.key and alias not in identity.aliases:
+                identity.aliases.append(alias)
+            if not rename:
+                self._by_name.setdefault(key, identity)
+                return identity
+        self._by_name[key] = identity
+        return identity
+
+    def by_account_id(self, account_id: Union[int, str]) -> Optional[PlayerIdentity]:
+        try:
+            return self._by_account.get(int(account_id))
+        except ValueError:
+            return None
+
+    def by_steam_id(self, steam_id: str) -> Optional[PlayerIdentity]:
+        return self._by_steam.get(steam_id)
+
+    def by_name(self, name: str) -> Optional[PlayerIdentity]:
+        return self._by_name.get(name.upper())
+
+    def get(self, player: str) -> Optional[PlayerIdentity]:
+        """Resolve a name or a ``[U:1:N]`` steam id."""
+        if player.startswith(STEAM_ID_PREFIX):
+            return self._by_steam.get(player)
+        return self._by_name.get(player.upper())
+
+    def steam_id(self, player: str) -> Optional[str]:
+        identity = self.get(player)
+        return identity.steam_id if identity is not None else None
+
+    def is_bot(self, player: str) -> bool:
+        """Known players use the cached flag; unknown ones go by the ``BOT`` prefix."""
+        identity = self.get(player)
+        if identity is not None:
+            return identity.is_bot
+        return player.upper().startswith(BOT_STEAM_ID)
+
+
+PLAYERS = PlayerRegistry()
+
+
+def is_bot(player: str) -> bool:
+    """Shared bot rule for stats, elo and team collection."""
+    return PLAYERS.is_bot(player)
@@ -1,33 +1,25 @@
 import json
 import logging
 import os
-import tempfile
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import player_store
+from persistence import write_json
+from player_registry import PLAYERS, PlayerIdentity
 
 logger = logging.getLogger(__name__)
 
 PLAYER_STATS: Dict[str, Dict[str, Any]] = {}
 TARGETS: Dict[str, str] = {}
+# Journal path -> newest match_journal record included in PLAYER_STATS;
+# saved with the snapshot so replay skips what it already holds.
+JOURNAL_SEQ: Dict[str, int] = {}
 
 PLAYER_STATS_FILE = "player_stats.json"
 TARGETS_FILE = "targets.json"
 PLAYER_STATS_SCHEMA_VERSION = 2
 
 
-def _atomic_write_json(path: str, payload: dict) -> None:
-    directory = os.path.dirname(os.path.abspath(path)) or "."
-    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
-    try:
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2, ensure_ascii=False)
-            f.flush()
-            os.fsync(f.fileno())
-        os.replace(tmp_path, path)
-    finally:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
-
-
 def _normalize_stats_payload(raw: Any) -> Dict[str, Dict[str, Any]]:
     if not isinstance(raw, dict):
         return {}
@@ -49,6 +41,16 @@ def _normalize_stats_payload(raw: Any) -> Dict[str, Dict[str, Any]]:
 def load_stats() -> None:
     """Load player stats from disk with legacy compatibility."""
     global PLAYER_STATS
+    store = player_store.get_store()
+    if store is not None:
+        PLAYER_STATS.clear()
+        PLAYER_STATS.update(store.load_stats())
+        JOURNAL_SEQ.clear()
+        JOURNAL_SEQ.update(store.load_journal_seq("player_stats"))
+        _register_rows((name, row.get("steam_id")) for name, row in PLAYER_STATS.items())
+        logger.info("loaded player stats from %s: %d players", store.path, len(PLAYER_STATS))
+        return
+    JOURNAL_SEQ.clear()
     if not os.path.exists(PLAYER_STATS_FILE):
         PLAYER_STATS.clear()
         logger.info("player stats file not found; starting with empty stats")
@@ -59,22 +61,46 @@ def load_stats() -> None:
 
     PLAYER_STATS.clear()
     PLAYER_STATS.update(_normalize_stats_payload(raw))
+    if isinstance(raw, dict) and "players" in raw and isinstance(raw.get("journal_seq"), dict):
+        JOURNAL_SEQ.update({str(k): int(v) for k, v in raw["journal_seq"].items()})
+    _register_rows((name, row.get("steam_id")) for name, row in PLAYER_STATS.items())
     logger.info("loaded player stats: %d players", len(PLAYER_STATS))
 
 
-def save_stats() -> None:
-    """Save stats as schema-versioned JSON."""
+def save_stats(names: Optional[Iterable[str]] = None) -> None:
+    """Save stats as schema-versioned JSON.
+
+    With the SQLite store only the rows for ``names`` (upper-case keys;
+    all players when None) are merged into the database, and the merged
+    counters are read back into ``PLAYER_STATS``.
+    """
+    store = player_store.get_store()
+    if store is not None:
+        rows = player_store.select(PLAYER_STATS, names)
+        # Pick up results other controllers saved for the same players.
+        for name, row in store.save_stats(rows, JOURNAL_SEQ).items():
+            PLAYER_STATS[name].update(row)
+        logger.info("saved player stats: %d players", len(rows))
+        return
     payload = {
         "schema_version": PLAYER_STATS_SCHEMA_VERSION,
-        "players": PLAYER_STATS,
+        "players": {name: dict(stats) for name, stats in PLAYER_STATS.items()},
+        "journal_seq": dict(JOURNAL_SEQ),
     }
-    _atomic_write_json(PLAYER_STATS_FILE, payload)
+    write_json(PLAYER_STATS_FILE, payload)
     logger.info("saved player stats: %d players", len(PLAYER_STATS))
 
 
 def load_targets() -> None:
     """Load name->steam mapping used for player resolution."""
     global TARGETS
+    store = player_store.get_store()
+    if store is not None:
+        TARGETS.clear()
+        TARGETS.update(store.load_targets())
+        _register_rows(TARGETS.items())
+        logger.info("loaded targets from %s: %d entries", store.path, len(TARGETS))
+        return
     if not os.path.exists(TARGETS_FILE):
         TARGETS.clear()
         logger.info("targets file not found; starting with empty targets")
@@ -86,28 +112,42 @@ def load_targets() -> None:
     if isinstance(data, dict):
         # Normalize keys to uppercase for stable lookups.
         TARGETS.update({str(k).upper(): str(v) for k, v in data.items()})
+    _register_rows(TARGETS.items())
     logger.info("loaded targets: %d entries", len(TARGETS))
 
 
-def save_targets() -> None:
-    """Save name->steam mapping."""
+def _register_rows(rows: Iterable[Tuple[str, Any]]) -> None:
+    # Seed PLAYERS from saved rows; names seen in the log take precedence.
+    for name, steam_id in rows:
+        if steam_id:
+            PLAYERS.observe(name, str(steam_id), rename=False)
+
+
+def remember_player(name: str, steam_id: str) -> Optional[PlayerIdentity]:
+    """Register ``name``/``steam_id`` and update its targets row (not saved)."""
+    identity = PLAYERS.observe(name, steam_id)
+    if identity is not None:
+        TARGETS[identity.key] = identity.steam_id
+    else:
+        TARGETS[name.upper()] = steam_id
+    return identity
+
+
+def save_targets(names: Optional[Iterable[str]] = None) -> None:
+    """Save name->steam mapping (only ``names`` with the SQLite store)."""
     try:
-        _atomic_write_json(TARGETS_FILE, TARGETS)
+        store = player_store.get_store()
+        if store is not None:
+            rows = player_store.select(TARGETS, names)
+            store.save_targets(rows)
+            logger.info("saved targets: %d entries", len(rows))
+            return
+        write_json(TARGETS_FILE, dict(TARGETS))
         logger.info("saved targets: %d entries", len(TARGETS))
     except Exception as e:  # pragma: no cover - defensive
         logger.exception("failed to save targets: %s", e)
 
 
 def get_steam_id(player: str) -> str | None:
-    """Get steam id for player from stats first, then targets fallback."""
-    name = player.upper()
-    stats = PLAYER_STATS.get(name)
-    if stats:
-        return stats.get("steam_id")
-    return TARGETS.get(name)
-
-
-def is_bot(player: str) -> bool:
-    """Best-effort bot detection."""
-    steam_id = get_steam_id(player)
-    return steam_id == "BOT" or steam_id is None
+    """Steam id for a player name (or None when never seen)."""
+    return PLAYERS.steam_id(player)
@@ -0,0 +1,240 @@
+"""Optional SQLite backend for player stats, elo and targets.
+
+With ``player_store: sqlite`` the ``load_*``/``save_*`` functions in
+``player_stats`` and ``player_elo`` read and write ``player_db_file``
+instead of the JSON files.  The in-memory dicts stay the source for the
+``get_*`` helpers; saves only upsert the rows of the players named by the
+caller, so recording a match costs O(players in the match).
+
+The database runs in WAL mode with a busy timeout, so several controllers
+can share one file.  Saves are read-modify-write under ``BEGIN IMMEDIATE``:
+``wins``/``losses`` and elo are written as the current row plus what this
+process changed since it last loaded or saved that row, so concurrent
+results from other controllers are kept.  On first open the existing
+schema-v2 JSON files are imported once; they are left in place as a backup.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+PLAYER_STORE_SCHEMA_VERSION = 1
+BUSY_TIMEOUT_MS = 5000
+# Stats fields saved as increments; other fields are set from the caller's row.
+STAT_COUNTERS = ("wins", "losses")
+DEFAULT_ELO = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS player_stats (name TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS player_elo (name TEXT PRIMARY KEY, rating INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS targets (name TEXT PRIMARY KEY, steam_id TEXT NOT NULL);
+"""
+
+
+class SqlitePlayerStore:
+    """Player tables in one SQLite file; safe to call from any thread."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        # Values as last loaded or saved by this process; a save writes the
+        # difference from these on top of the current row.
+        self._stats_base: Dict[str, Dict[str, int]] = {}
+        self._elo_base: Dict[str, int] = {}
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        # WAL + NORMAL: commits do not fsync; a power loss can only drop the
+        # newest transactions, never corrupt the file.
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(PLAYER_STORE_SCHEMA_VERSION),),
+            )
+
+    @property
+    def migrated(self) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone()
+        return row is not None
+
+    def import_json(
+        self,
+        stats: Mapping[str, Dict[str, Any]],
+        elo: Mapping[str, int],
+        targets: Mapping[str, str],
+        stats_journal_seq: Optional[Mapping[str, int]] = None,
+        elo_journal_seq: Optional[Mapping[str, int]] = None,
+    ) -> None:
+        """Import the contents of the JSON files once, in one transaction."""
+        with self._lock, self._conn:
+            self._upsert_stats(stats)
+            self._upsert_elo(elo)
+            self._upsert_targets(targets)
+            self._set_journal_seq("player_stats", stats_journal_seq)
+            self._set_journal_seq("player_elo", elo_journal_seq)
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', '1')")
+        logger.info(
+            "imported JSON data into %s: stats=%d elo=%d targets=%d",
+            self.path,
+            len(stats),
+            len(elo),
+            len(targets),
+        )
+
+    def load_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT name, data FROM player_stats").fetchall()
+            stats = {name: json.loads(data) for name, data in rows}
+            self._stats_base = {name: _counters(row) for name, row in stats.items()}
+        return stats
+
+    def load_elo(self) -> Dict[str, int]:
+        with self._lock:
+            ratings = dict(self._conn.execute("SELECT name, rating FROM player_elo").fetchall())
+            self._elo_base = dict(ratings)
+        return ratings
+
+    def load_journal_seq(self, table: str) -> Dict[str, int]:
+        """Newest journal record per journal included in ``table``."""
+        prefix = f"journal_seq:{table}:"
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM meta").fetchall()
+        return {key[len(prefix):]: int(value) for key, value in rows if key.startswith(prefix)}
+
+    def load_targets(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT name, steam_id FROM targets").fetchall())
+
+    def save_stats(
+        self,
+        stats: Mapping[str, Dict[str, Any]],
+        journal_seq: Optional[Mapping[str, int]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Merge ``stats`` into the stored rows; returns the rows as written."""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            merged: Dict[str, Dict[str, Any]] = {}
+            for name, row in stats.items():
+                found = self._conn.execute("SELECT data FROM player_stats WHERE name = ?", (name,)).fetchone()
+                current = json.loads(found[0]) if found else {}
+                base = self._stats_base.get(name, {})
+                merged[name] = {**current, **row}
+                for key in STAT_COUNTERS:
+                    if key in row:
+                        merged[name][key] = current.get(key, 0) + row[key] - base.get(key, 0)
+            self._upsert_stats(merged)
+            self._set_journal_seq("player_stats", journal_seq)
+        for name, row in merged.items():
+            self._stats_base[name] = _counters(row)
+        return merged
+
+    def save_elo(
+        self,
+        ratings: Mapping[str, int],
+        journal_seq: Optional[Mapping[str, int]] = None,
+    ) -> Dict[str, int]:
+        """Add this process's elo changes to the stored ratings; returns them."""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            merged: Dict[str, int] = {}
+            for name, rating in ratings.items():
+                found = self._conn.execute("SELECT rating FROM player_elo WHERE name = ?", (name,)).fetchone()
+                current = found[0] if found else DEFAULT_ELO
+                merged[name] = current + rating - self._elo_base.get(name, DEFAULT_ELO)
+            self._upsert_elo(merged)
+            self._set_journal_seq("player_elo", journal_seq)
+        self._elo_base.update(merged)
+        return merged
+
+    def save_targets(self, targets: Mapping[str, str]) -> None:
+        with self._lock, self._conn:
+            self._upsert_targets(targets)
+
+    def _upsert_stats(self, stats: Mapping[str, Dict[str, Any]]) -> None:
+        self._conn.executemany(
+            "INSERT INTO player_stats (name, data) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET data = excluded.data",
+            [(name, json.dumps(row, ensure_ascii=False)) for name, row in stats.items()],
+        )
+
+    def _upsert_elo(self, ratings: Mapping[str, int]) -> None:
+        self._conn.executemany(
+            "INSERT INTO player_elo (name, rating) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET rating = excluded.rating",
+            list(ratings.items()),
+        )
+
+    def _set_journal_seq(self, table: str, journal_seq: Optional[Mapping[str, int]]) -> None:
+        # Same transaction as the rows, so the number never runs ahead of them.
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(f"journal_seq:{table}:{key}", str(seq)) for key, seq in (journal_seq or {}).items()],
+        )
+
+    def _upsert_targets(self, targets: Mapping[str, str]) -> None:
+        self._conn.executemany(
+            "INSERT INTO targets (name, steam_id) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET steam_id = excluded.steam_id",
+            list(targets.items()),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _counters(row: Mapping[str, Any]) -> Dict[str, int]:
+    return {key: row[key] for key in STAT_COUNTERS if key in row}
+
+
+_store: Optional[SqlitePlayerStore] = None
+
+
+def get_store() -> Optional[SqlitePlayerStore]:
+    return _store
+
+
+def install_store(store: Optional[SqlitePlayerStore]) -> None:
+    """Make load_*/save_* use ``store`` (None: back to the JSON files)."""
+    global _store
+    _store = store
+
+
+def open_sqlite_store(path: str) -> SqlitePlayerStore:
+    """Open ``path``, import the JSON files on first use, and install it."""
+    # Imported here: both modules import this one.
+    import player_elo
+    import player_stats
+
+    store = SqlitePlayerStore(path)
+    if not store.migrated:
+        install_store(None)
+        player_stats.load_stats()
+        player_elo.load_elo()
+        player_stats.load_targets()
+        store.import_json(
+            player_stats.PLAYER_STATS,
+            player_elo.PLAYER_ELO,
+            player_stats.TARGETS,
+            player_stats.JOURNAL_SEQ,
+            player_elo.JOURNAL_SEQ,
+        )
+    install_store(store)
+    return store
+
+
+def select(source: Mapping[str, Any], names: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """Rows of ``source`` for ``names`` (all rows when None), skipping unknown names."""
+    if names is None:
+        return dict(source)
+    return {name: source[name] for name in names if name in source}
@@ -1,11 +1,296 @@
 """rcon utilities"""
+import asyncio
 import logging
+import socket
+import threading
+from typing import BinaryIO, List, Optional, Sequence
 
-from rcon.source import Client  # type: ignore
-from config import RCON_HOST, RCON_PORT, RCON_PASSWORD
+from rcon.exceptions import EmptyResponse, SessionTimeout, WrongPassword  # type: ignore
+from rcon.source.proto import LittleEndianSignedInt32, Packet, Type  # type: ignore
+from config import RCON_HOST, RCON_PORT, RCON_PASSWORD, RCON_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
+# Errors after which the connection is considered dead and is reopened.
+_CONNECTION_ERRORS = (OSError, EmptyResponse, SessionTimeout)
+
+# Responses at least this long may continue in further packets (see
+# rcon.source.Client.read).
+FRAG_THRESHOLD = 4096
+
+
+class RconSession:
+    """
+    再利用される RCON 接続。
+
+    最初のコマンドで接続・認証し、以降は同じ TCP 接続を使い回します。
+    接続が切れていた場合は再接続・再認証して 1 回だけ再送します。
+    複数スレッドからの呼び出しはロックで直列化されます。
+
+    rcon.source.Client は読み込みのたびに新しいバッファを作るため、
+    まとめて届いたパケットを取りこぼすことがあります。ここでは接続ごとに
+    1 つの読み込みバッファを持ち、パケットの組み立てだけを rcon に任せます。
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str,
+        *,
+        timeout: Optional[float] = RCON_TIMEOUT,
+        retries: int = 1,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.retries = retries
+        self.connects = 0
+        self._sock: Optional[socket.socket] = None
+        self._reader: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def _connect(self) -> None:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+        try:
+            login = Packet.make_login(self.password)
+            self._send(login)
+            # CS2 sends an empty RESPONSE_VALUE before the auth response.
+            while (response := self._read()).type != Type.SERVERDATA_AUTH_RESPONSE:
+                pass
+            if response.id == -1:
+                raise WrongPassword()
+        except BaseException:
+            self._drop()
+            raise
+        self.connects += 1
+        logger.debug("RCON connected to %s:%s", self.host, self.port)
+
+    def _drop(self) -> None:
+        if self._sock is not None:
+            for closeable in (self._reader, self._sock):
+                try:
+                    closeable.close()  # type: ignore[union-attr]
+                except OSError:
+                    pass
+            self._sock = None
+            self._reader = None
+
+    def _send(self, packet: Packet) -> None:
+        assert self._sock is not None
+        self._sock.sendall(bytes(packet))
+
+    def _read(self) -> Packet:
+        assert self._reader is not None
+        return Packet.read(self._reader)
+
+    def _exchange_many(self, commands: Sequence[str], received: List[str]) -> None:
+        requests = [Packet.make_command(cmd) for cmd in commands]
+        assert self._sock is not None
+        self._sock.sendall(b"".join(bytes(request) for request in requests))
+        # The server answers in order.  A long answer may continue in more
+        # packets with the same id, so keep one packet of lookahead.
+        pending: Optional[Packet] = None
+        for index, request in enumerate(requests):
+            response = pending if pending is not None else self._read()
+            pending = None
+            while response.id != request.id:
+                logger.debug("RCON: skipping stale packet id=%s", response.id)
+                response = self._read()
+            if len(response.payload) >= FRAG_THRESHOLD:
+                if index == len(requests) - 1:
+                    self._send(Packet.make_empty_response())
+                while (successor := self._read()).id == response.id:
+                    response += successor
+                pending = successor
+            received.append(response.payload.decode("utf-8"))
+
+    def run_many(self, commands: Sequence[str]) -> List[str]:
+        """Send ``commands`` back-to-back and return their outputs in order.
+
+        All requests go out in one write, so the batch costs about one
+        round-trip.  A dead connection is retried only while no response
+        has arrived yet; after that some commands may already have run.
+        """
+        if not commands:
+            return []
+        with self._lock:
+            attempt = 0
+            while True:
+                received: List[str] = []
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._exchange_many(commands, received)
+                    return received
+                except WrongPassword:
+                    raise
+                except TimeoutError:
+                    # The commands may already have run; do not send them twice.
+                    self._drop()
+                    raise
+                except _CONNECTION_ERRORS as e:
+                    self._drop()
+                    if received or attempt >= self.retries:
+                        raise
+                    attempt += 1
+                    logger.warning("RCON 接続が切れました。再接続します: %s", e)
+
+    def run(self, cmd: str) -> str:
+        """Run ``cmd``; raises if it still fails after reconnecting."""
+        return self.run_many([cmd])[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._drop()
+
+
+class AsyncRconSession:
+    """
+    asyncio 版の再利用 RCON 接続。
+
+    RconSession と同じく接続を使い回し、切断時は再接続して再送します。
+    呼び出しは asyncio.Lock で直列化されます。
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str,
+        *,
+        timeout: Optional[float] = RCON_TIMEOUT,
+        retries: int = 1,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.retries = retries
+        self.connects = 0
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        try:
+            login = Packet.make_login(self.password)
+            self._writer.write(bytes(login))
+            while (response := await self._read()).type != Type.SERVERDATA_AUTH_RESPONSE:
+                pass
+            if response.id == -1:
+                raise WrongPassword()
+        except BaseException:
+            await self._drop()
+            raise
+        self.connects += 1
+        logger.debug("RCON (async) connected to %s:%s", self.host, self.port)
+
+    async def _drop(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _read(self) -> Packet:
+        assert self._reader is not None
+        try:
+            header = await asyncio.wait_for(self._reader.readexactly(4), self.timeout)
+            size = LittleEndianSignedInt32.from_bytes(header, "little", signed=True)
+            body = await asyncio.wait_for(self._reader.readexactly(size), self.timeout)
+        except asyncio.IncompleteReadError as e:
+            raise EmptyResponse() from e
+        return Packet(
+            LittleEndianSignedInt32(int.from_bytes(body[:4], "little", signed=True)),
+            Type(LittleEndianSignedInt32(int.from_bytes(body[4:8], "little", signed=True))),
+            body[8:-2],
+            body[-2:],
+        )
+
+    async def _exchange_many(self, commands: Sequence[str], received: List[str]) -> None:
+        # Same protocol handling as RconSession._exchange_many.
+        requests = [Packet.make_command(cmd) for cmd in commands]
+        assert self._writer is not None
+        self._writer.write(b"".join(bytes(request) for request in requests))
+        pending: Optional[Packet] = None
+        for index, request in enumerate(requests):
+            response = pending if pending is not None else await self._read()
+            pending = None
+            while response.id != request.id:
+                logger.debug("RCON: skipping stale packet id=%s", response.id)
+                response = await self._read()
+            if len(response.payload) >= FRAG_THRESHOLD:
+                if index == len(requests) - 1:
+                    self._writer.write(bytes(Packet.make_empty_response()))
+                while (successor := await self._read()).id == response.id:
+                    response += successor
+                pending = successor
+            received.append(response.payload.decode("utf-8"))
+
+    async def run_many(self, commands: Sequence[str]) -> List[str]:
+        """Send ``commands`` back-to-back and return their outputs in order."""
+        if not commands:
+            return []
+        async with self._lock:
+            attempt = 0
+            while True:
+                received: List[str] = []
+                try:
+                    if self._writer is None:
+                        await self._connect()
+                    await self._exchange_many(commands, received)
+                    return received
+                except WrongPassword:
+                    raise
+                except asyncio.TimeoutError:
+                    # The commands may already have run; do not send them twice.
+                    await self._drop()
+                    raise
+                except _CONNECTION_ERRORS as e:
+                    await self._drop()
+                    if received or attempt >= self.retries:
+                        raise
+                    attempt += 1
+                    logger.warning("RCON 接続が切れました。再接続します: %s", e)
+
+    async def run(self, cmd: str) -> str:
+        return (await self.run_many([cmd]))[0]
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._drop()
+
+
+_session: Optional[RconSession] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> RconSession:
+    """Return the process-wide RCON session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = RconSession(RCON_HOST, RCON_PORT, RCON_PASSWORD)
+        return _session
+
 
 def rcon(cmd):
     """
@@ -18,14 +303,32 @@ def rcon(cmd):
     Optional[str]: コマンドの出力。エラーが発生した場合は None を返します。
     """
     try:
-        with Client(RCON_HOST, RCON_PORT, passwd=RCON_PASSWORD) as c:
-            logger.debug("RCON: %s", cmd)
-            return c.run(cmd)
+        logger.debug("RCON: %s", cmd)
+        return get_session().run(cmd)
     except Exception as e:
         logger.exception("RCON ERROR: %s", e)
         return None
 
 
+def rcon_many(commands):
+    """
+    複数の RCON コマンドを 1 つの接続でまとめて送信します。
+
+    引数:
+    commands (Sequence[str]): 実行するコマンドのリスト。
+
+    戻り値:
+    List[Optional[str]]: 各コマンドの出力。エラーが発生した場合はすべて None になります。
+    """
+    commands = list(commands)
+    try:
+        logger.debug("RCON batch: %s", commands)
+        return get_session().run_many(commands)
+    except Exception as e:
+        logger.exception("RCON ERROR: %s", e)
+        return [None] * len(commands)
+
+
 def say(msg):
     # サーバーにチャットメッセージを送信
     # メッセージ内の二重引用符をエスケープして安全に送信
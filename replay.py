@@ -0,0 +1,184 @@
+"""Offline replay of a recorded CS2 log through the controller.
+
+Usage::
+
+    py -3 controller.py --replay path/to/server.log [--speed N|max]
+
+RCON and chat are replaced by recorders, persistence is redirected to a
+temporary directory, and a throughput/handler-timing report is printed at
+the end.
+"""
+
+from __future__ import annotations
+
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, TextIO
+
+import player_elo
+import player_stats
+from controller import Controller
+from events import parse_log_time
+from runtime_config import RuntimeConfig
+from scheduler import Scheduler
+from state import MatchState
+
+# Log time added after the last line so pending timed actions still run.
+REPLAY_TAIL_SECONDS = 60.0
+
+
+def parse_speed(raw: str) -> Optional[float]:
+    """Parse ``--speed``: ``max`` (no pacing) or a positive multiplier."""
+    if raw.lower() == "max":
+        return None
+    speed = float(raw)
+    if speed <= 0:
+        raise ValueError("speed must be positive or 'max'")
+    return speed
+
+
+@dataclass
+class HandlerTiming:
+    calls: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class ReplayReport:
+    path: str
+    lines: int = 0
+    elapsed: float = 0.0
+    matches_finished: int = 0
+    handler_timings: Dict[str, HandlerTiming] = field(default_factory=dict)
+    chat_messages: List[str] = field(default_factory=list)
+    rcon_commands: List[str] = field(default_factory=list)
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.elapsed if self.elapsed > 0 else 0.0
+
+    def print(self, out: Optional[TextIO] = None) -> None:
+        def emit(text: str = "") -> None:
+            print(text, file=out)
+
+        emit(f"replay: {self.path}")
+        emit(f"lines: {self.lines}  elapsed: {self.elapsed:.3f}s  lines/sec: {self.lines_per_second:,.0f}")
+        emit(f"matches finished: {self.matches_finished}")
+        emit()
+        emit("handler                              calls    total ms    avg us")
+        ranked = sorted(self.handler_timings.items(), key=lambda item: item[1].seconds, reverse=True)
+        for name, timing in ranked:
+            avg_us = timing.seconds / timing.calls * 1e6 if timing.calls else 0.0
+            emit(f"{name:<34} {timing.calls:>7} {timing.seconds * 1e3:>11.2f} {avg_us:>9.1f}")
+        emit()
+        emit(f"chat messages ({len(self.chat_messages)}):")
+        for message in self.chat_messages:
+            emit(f"  say {message}")
+        emit()
+        emit(f"rcon commands ({len(self.rcon_commands)}):")
+        for command in self.rcon_commands:
+            emit(f"  {command}")
+
+
+class ReplayController(Controller):
+    """Controller whose event subscribers are wrapped with timers."""
+
+    def __init__(self, report: ReplayReport, *args, **kwargs) -> None:
+        self.report = report
+        super().__init__(*args, **kwargs)
+
+    def setup_event_listeners(self) -> None:
+        super().setup_event_listeners()
+        for handlers in self.bus.subscribers.values():
+            handlers[:] = [self._timed(handler) for handler in handlers]
+
+    def _timed(self, handler: Callable) -> Callable:
+        name = getattr(handler, "__name__", repr(handler))
+        timing = self.report.handler_timings.setdefault(name, HandlerTiming())
+
+        def wrapper(*args):
+            started = time.perf_counter()
+            try:
+                return handler(*args)
+            finally:
+                timing.calls += 1
+                timing.seconds += time.perf_counter() - started
+
+        wrapper.__name__ = name
+        return wrapper
+
+
+def run_replay(
+    path: str,
+    speed: Optional[float] = None,
+    settings: Optional[RuntimeConfig] = None,
+) -> ReplayReport:
+    """Feed ``path`` through a recording controller and return the report.
+
+    ``speed`` paces lines by their log timestamps (``2.0`` = twice real
+    time); ``None`` replays as fast as possible.  Stats, elo and targets are
+    loaded from the live files but written to a temporary directory.
+    """
+    report = ReplayReport(path=path)
+
+    def record_rcon(cmd: str) -> str:
+        report.rcon_commands.append(cmd)
+        return ""
+
+    player_stats.load_stats()
+    player_elo.load_elo()
+    player_stats.load_targets()
+
+    saved_paths = (
+        player_stats.PLAYER_STATS_FILE,
+        player_stats.TARGETS_FILE,
+        player_elo.PLAYER_ELO_FILE,
+    )
+    with tempfile.TemporaryDirectory(prefix="cs2_replay_") as scratch:
+        player_stats.PLAYER_STATS_FILE = f"{scratch}/player_stats.json"
+        player_stats.TARGETS_FILE = f"{scratch}/targets.json"
+        player_elo.PLAYER_ELO_FILE = f"{scratch}/player_elo.json"
+        try:
+            # Timed actions (e.g. the lo3 countdown) and the controller's own
+            # notion of "now" follow the log's clock, whatever the speed.
+            log_clock = [0.0]
+            controller = ReplayController(
+                report,
+                record_rcon,
+                report.chat_messages.append,
+                MatchState(),
+                settings=settings or RuntimeConfig(config_source="replay"),
+                scheduler=Scheduler(clock=lambda: log_clock[0]),
+                clock=lambda: log_clock[0],
+            )
+            with open(path, "rb") as f:
+                raw_lines = f.read().splitlines()
+
+            first_log_time: Optional[float] = None
+            started = time.perf_counter()
+            for raw in raw_lines:
+                log_time = parse_log_time(raw)
+                if log_time is not None:
+                    log_clock[0] = log_time
+                    if first_log_time is None:
+                        first_log_time = log_time
+                    if speed is not None:
+                        delay = (log_time - first_log_time) / speed - (time.perf_counter() - started)
+                        if delay > 0:
+                            time.sleep(delay)
+                controller.handle_lines((raw,))
+                controller.scheduler.run_due()
+                report.lines += 1
+            # Let actions still pending at the end of the log run.
+            log_clock[0] += REPLAY_TAIL_SECONDS
+            controller.scheduler.run_due()
+            report.elapsed = time.perf_counter() - started
+            report.matches_finished = controller.matches_finished
+        finally:
+            (
+                player_stats.PLAYER_STATS_FILE,
+                player_stats.TARGETS_FILE,
+                player_elo.PLAYER_ELO_FILE,
+            ) = saved_paths
+    return report
@@ -0,0 +1,91 @@
+"""Players connected to the server right now.
+
+TARGETS holds every player ever seen; shuffles and balance checks want the
+people actually on the server.  ``Roster`` is kept up to date from connect,
+disconnect and team lines, and resynced from ``status`` output, so its
+size is bounded by the server's slots rather than by history.  Entries are
+keyed by SteamID, so a rename mid-session does not count as a new player.
+Bots are not tracked.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from player_registry import STEAM_ID_PREFIX
+
+# How many departed players to remember (for join/leave times).
+LEFT_HISTORY = 64
+
+
+@dataclass
+class RosterEntry:
+    name: str
+    steam_id: str
+    joined_at: float
+    left_at: Optional[float] = None
+
+
+class Roster:
+    def __init__(self, history: int = LEFT_HISTORY) -> None:
+        self._present: Dict[str, RosterEntry] = {}
+        self._left: "OrderedDict[str, RosterEntry]" = OrderedDict()
+        self._history = history
+        self._names: Optional[FrozenSet[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._present)
+
+    def __contains__(self, steam_id: object) -> bool:
+        return steam_id in self._present
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        """Names of the players on the server (cached until the roster changes)."""
+        if self._names is None:
+            self._names = frozenset(entry.name for entry in self._present.values())
+        return self._names
+
+    def entries(self) -> List[RosterEntry]:
+        return list(self._present.values())
+
+    def recently_left(self) -> List[RosterEntry]:
+        """Departed players, most recent last."""
+        return list(self._left.values())
+
+    def join(self, name: str, steam_id: str, at: float) -> bool:
+        """Mark ``steam_id`` present; True when they were not already."""
+        if not steam_id.startswith(STEAM_ID_PREFIX):
+            return False
+        entry = self._present.get(steam_id)
+        if entry is not None:
+            if entry.name != name:
+                entry.name = name
+                self._names = None
+            return False
+        self._left.pop(steam_id, None)
+        self._present[steam_id] = RosterEntry(name, steam_id, at)
+        self._names = None
+        return True
+
+    def leave(self, steam_id: str, at: float) -> Optional[RosterEntry]:
+        entry = self._present.pop(steam_id, None)
+        if entry is None:
+            return None
+        entry.left_at = at
+        self._left[steam_id] = entry
+        while len(self._left) > self._history:
+            self._left.popitem(last=False)
+        self._names = None
+        return entry
+
+    def sync(self, players: Iterable[Tuple[str, str]], at: float) -> None:
+        """Make the roster exactly ``players`` ((name, steam_id) from status)."""
+        seen = set()
+        for name, steam_id in players:
+            self.join(name, steam_id, at)
+            seen.add(steam_id)
+        for steam_id in [s for s in self._present if s not in seen]:
+            self.leave(steam_id, at)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from config import ADMIN_STEAMID, AVAILABLE_MAPS, LOG_DIR, MAX_ROUNDS, TAUNT_CHANCE
 
@@ -19,6 +19,20 @@ class RuntimeConfig:
     commentary_cooldown_seconds: int = 10
     score_flow_cooldown_seconds: int = 8
     round_context_enabled: bool = True
+    chat_queue_size: int = 64
+    chat_rate_per_second: float = 5.0
+    commentary_max_age_seconds: float = 5.0
+    checkpoint_file: str = "controller_checkpoint.json"
+    catch_up_lag_seconds: float = 15.0
+    persistence_flush_seconds: float = 1.0
+    player_store: str = "json"
+    player_db_file: str = "players.db"
+    match_journal_file: str = "match_journal.jsonl"
+    balance_together: Tuple[str, ...] = ()
+    balance_apart: Tuple[str, ...] = ()
+    balance_spread_top: int = 0
+    balance_max_changes: int = -1
+    balance_budget_ms: int = 50
     config_source: str = "config.py(defaults)"
 
     def __post_init__(self) -> None:
@@ -101,5 +115,19 @@ def load_runtime_config(path: str = "config.yaml") -> RuntimeConfig:
         commentary_cooldown_seconds=int(parsed.get("commentary_cooldown_seconds", 10)),
         score_flow_cooldown_seconds=int(parsed.get("score_flow_cooldown_seconds", 8)),
         round_context_enabled=bool(parsed.get("round_context_enabled", True)),
+        chat_queue_size=int(parsed.get("chat_queue_size", 64)),
+        chat_rate_per_second=float(parsed.get("chat_rate_per_second", 5.0)),
+        commentary_max_age_seconds=float(parsed.get("commentary_max_age_seconds", 5.0)),
+        checkpoint_file=str(parsed.get("checkpoint_file", "controller_checkpoint.json")),
+        catch_up_lag_seconds=float(parsed.get("catch_up_lag_seconds", 15.0)),
+        persistence_flush_seconds=float(parsed.get("persistence_flush_seconds", 1.0)),
+        player_store=str(parsed.get("player_store", "json")),
+        player_db_file=str(parsed.get("player_db_file", "players.db")),
+        match_journal_file=str(parsed.get("match_journal_file", "match_journal.jsonl")),
+        balance_together=tuple(str(item) for item in parsed.get("balance_together", [])),
+        balance_apart=tuple(str(item) for item in parsed.get("balance_apart", [])),
+        balance_spread_top=int(parsed.get("balance_spread_top", 0)),
+        balance_max_changes=int(parsed.get("balance_max_changes", -1)),
+        balance_budget_ms=int(parsed.get("balance_budget_ms", 50)),
         config_source=str(cfg_path),
     )
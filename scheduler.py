@@ -0,0 +1,99 @@
+"""Timers for delayed and repeating actions, run from the controller loop.
+
+Nothing here sleeps or starts threads: the owner calls ``run_due()`` and
+uses ``next_delay()`` to bound how long it may block waiting for log input,
+so timed actions run between log lines, in the same thread as the handlers.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(order=True)
+class Timer:
+    when: float
+    seq: int
+    func: Callable[..., Any] = field(compare=False)
+    args: Tuple[Any, ...] = field(compare=False, default=())
+    interval: Optional[float] = field(compare=False, default=None)
+    cancelled: bool = field(compare=False, default=False)
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class Scheduler:
+    """Heap of timers ordered by due time, then by scheduling order."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self._heap: List[Timer] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(1 for timer in self._heap if not timer.cancelled)
+
+    def call_at(self, when: float, func: Callable[..., Any], *args: Any) -> Timer:
+        timer = Timer(when, next(self._seq), func, args)
+        heapq.heappush(self._heap, timer)
+        return timer
+
+    def call_later(self, delay: float, func: Callable[..., Any], *args: Any) -> Timer:
+        return self.call_at(self.clock() + delay, func, *args)
+
+    def call_every(
+        self,
+        interval: float,
+        func: Callable[..., Any],
+        *args: Any,
+        first_delay: Optional[float] = None,
+    ) -> Timer:
+        """Run ``func`` every ``interval`` seconds until cancelled."""
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        timer = self.call_later(interval if first_delay is None else first_delay, func, *args)
+        timer.interval = interval
+        return timer
+
+    def next_delay(self) -> Optional[float]:
+        """Seconds until the next timer is due (0 if overdue), or None."""
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0].when - self.clock())
+
+    def run_due(self) -> int:
+        """Run every timer that is due now; returns how many ran.
+
+        A callback that raises is logged and does not stop the others.
+        Timers scheduled by a callback for "now" run in the same call.
+        """
+        ran = 0
+        now = self.clock()
+        while self._heap and self._heap[0].when <= now:
+            timer = heapq.heappop(self._heap)
+            if timer.cancelled:
+                continue
+            if timer.interval is not None:
+                # Re-arm from the planned time so repeats do not drift, but
+                # skip missed runs instead of bursting to catch up.
+                timer.when += timer.interval
+                if timer.when <= now:
+                    timer.when = now + timer.interval
+                timer.seq = next(self._seq)
+                heapq.heappush(self._heap, timer)
+            try:
+                timer.func(*timer.args)
+            except Exception:
+                logger.exception("scheduled action failed: %r", timer.func)
+            ran += 1
+        return ran
@@ -1,5 +1,5 @@
-from dataclasses import dataclass, field
-from typing import Dict, Set, List, Optional, Tuple
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Set, List, Optional, Tuple
 from config import MAX_ROUNDS
 
 
@@ -83,12 +83,6 @@ class MatchState:
     debug_enabled: bool = False
     accolades: List[Tuple[str, str, float]] = field(default_factory=list)
 
-    # Account mappings
-    accountid_to_name: Dict[str, str] = field(default_factory=dict)
-    accountid_to_steamid: Dict[str, str] = field(default_factory=dict)
-    name_to_steam: Dict[str, str] = field(default_factory=dict)
-    steam_to_name: Dict[str, str] = field(default_factory=dict)
-
     # Player lists used for match recording
     ct_players: List[str] = field(default_factory=list)
     t_players: List[str] = field(default_factory=list)
@@ -115,6 +109,38 @@ class MatchState:
         """
         self.WIN_ROUNDS = MAX_ROUNDS // 2 + 1
 
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON に書ける dict のスナップショットを返します (set はソート済み list になります)。"""
+        data: Dict[str, Any] = {}
+        for f in fields(self):
+            if not f.init:
+                continue
+            value = getattr(self, f.name)
+            if isinstance(value, set):
+                value = sorted(value)
+            elif isinstance(value, (dict, list)):
+                # Copy so the result can be written from another thread.
+                value = value.copy()
+            data[f.name] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MatchState":
+        """to_dict() の出力から復元します。未知のキーは無視します。"""
+        state = cls()
+        for f in fields(cls):
+            if not f.init or f.name not in data:
+                continue
+            current = getattr(state, f.name)
+            value = data[f.name]
+            if isinstance(current, set):
+                # JSON turns the tuples in past_1v1_pairs into lists.
+                value = {tuple(item) if isinstance(item, list) else item for item in value}
+            elif f.name == "accolades":
+                value = [tuple(item) for item in value]
+            setattr(state, f.name, value)
+        return state
+
     def reset(self) -> None:
         """新しい一致のために状態をデフォルトにリセットします (構成から派生したフィールドを保持します)。"""
         self.first_round_announced = False
@@ -177,11 +203,6 @@ class MatchState:
         self.debug_enabled = False
         self.accolades.clear()
 
-        self.accountid_to_name.clear()
-        self.accountid_to_steamid.clear()
-        self.name_to_steam.clear()
-        self.steam_to_name.clear()
-
         self.ct_players.clear()
         self.t_players.clear()
 
@@ -0,0 +1,222 @@
+"""Split a roster into two teams with the smallest Elo sum difference.
+
+Ratings are looked up once per player and handled as plain ints.  Up to
+``EXACT_MAX_PLAYERS`` the split is exact: meet-in-the-middle enumerates the
+subsets of each half of the roster (2^(n/2) each instead of C(n, n/2)
+combinations) and binary-searches the other half for the best partner.
+Larger rosters start from a greedy split and improve it with pairwise swaps
+until nothing improves or ``budget`` seconds have passed.
+
+``top_splits`` returns the ``k`` most even splits instead of just one, so
+callers can pick among them for variety; meet-in-the-middle keeps the ``k``
+best per half.  ``use_numpy=True`` (NumPy installed, at most
+``NUMPY_MAX_PLAYERS``) scores every bitmask at once instead: the subset sums
+are built in one array by doubling (``sums[2^b:2^(b+1)] = sums[:2^b] +
+r[b]``) and ``argpartition`` picks the top ``k``.  It touches all 2^n
+splits, so it is not the default; see ``bench_balance.py``.
+
+Team sizes always differ by at most one player.
+"""
+
+from __future__ import annotations
+
+import heapq
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from player_elo import get_elo
+
+try:
+    import numpy as np
+except ImportError:  # optional; only used with use_numpy=True
+    np = None
+
+# 2^12 subsets per half; a 24-player split takes a few ms.
+EXACT_MAX_PLAYERS = 24
+FALLBACK_BUDGET_SECONDS = 0.05
+# 2^20 int64 subset sums (8 MB) at most.
+NUMPY_MAX_PLAYERS = 20
+TOP_K = 8
+
+
+@dataclass
+class Split:
+    team1: List[str]
+    team2: List[str]
+    sum1: int
+    sum2: int
+    # False when the time-budgeted search produced it.
+    exact: bool = True
+
+    @property
+    def diff(self) -> int:
+        return abs(self.sum1 - self.sum2)
+
+
+def best_split(
+    players: Iterable[str],
+    rating: Callable[[str], int] = get_elo,
+    *,
+    budget: float = FALLBACK_BUDGET_SECONDS,
+    clock: Callable[[], float] = time.monotonic,
+) -> Split:
+    """Most even split of ``players``; ``team1`` is never the larger team."""
+    return top_splits(players, rating, 1, budget=budget, clock=clock)[0]
+
+
+def top_splits(
+    players: Iterable[str],
+    rating: Callable[[str], int] = get_elo,
+    k: int = TOP_K,
+    *,
+    budget: float = FALLBACK_BUDGET_SECONDS,
+    clock: Callable[[], float] = time.monotonic,
+    use_numpy: bool = False,
+) -> List[Split]:
+    """Up to ``k`` most even splits, best first.
+
+    A split and its mirror image (teams swapped) are listed once.  Rosters
+    above ``EXACT_MAX_PLAYERS`` get a single budgeted split.
+    """
+    players = list(players)
+    if len(players) < 2:
+        return [Split([], [], 0, 0)]
+    ratings = [int(rating(p)) for p in players]
+    n = len(players)
+    exact = n <= EXACT_MAX_PLAYERS
+    if not exact:
+        masks = [_swap_search(ratings, clock() + budget, clock)]
+    elif use_numpy and np is not None and n <= NUMPY_MAX_PLAYERS:
+        masks = _numpy_top(ratings, k)
+    else:
+        masks = _exact_top(ratings, k)
+    return [_make_split(players, ratings, mask, exact) for mask in masks]
+
+
+def _make_split(players: Sequence[str], ratings: Sequence[int], mask: int, exact: bool) -> Split:
+    team1: List[str] = []
+    team2: List[str] = []
+    sum1 = 0
+    for bit, (player, r) in enumerate(zip(players, ratings)):
+        if mask >> bit & 1:
+            team1.append(player)
+            sum1 += r
+        else:
+            team2.append(player)
+    return Split(team1, team2, sum1, sum(ratings) - sum1, exact)
+
+
+def _subsets(ratings: Sequence[int]) -> Tuple[List[int], List[int]]:
+    """(size, sum) of every subset of ``ratings``, indexed by bitmask."""
+    count = 1 << len(ratings)
+    sizes = [0] * count
+    sums = [0] * count
+    for mask in range(1, count):
+        low = mask & -mask
+        rest = mask ^ low
+        sizes[mask] = sizes[rest] + 1
+        sums[mask] = sums[rest] + ratings[low.bit_length() - 1]
+    return sizes, sums
+
+
+def _exact_top(ratings: Sequence[int], k: int) -> List[int]:
+    n = len(ratings)
+    total = sum(ratings)
+    half = n // 2
+    left_sizes, left_sums = _subsets(ratings[:half])
+    right_sizes, right_sums = _subsets(ratings[half:])
+
+    # size -> (sorted sums, masks in the same order) for the right half.
+    by_size: Dict[int, Tuple[List[int], List[int]]] = {}
+    for mask in sorted(range(len(right_sums)), key=right_sums.__getitem__):
+        sums, masks = by_size.setdefault(right_sizes[mask], ([], []))
+        sums.append(right_sums[mask])
+        masks.append(mask)
+
+    team_size = n // 2
+    # Equal sizes: keep player 0 in team1 so mirror images are skipped.
+    mirror = n % 2 == 0
+    # Max-heap (by diff) of the k best (-diff, -mask) seen so far.
+    best: List[Tuple[int, int]] = []
+    for left_mask, left_sum in enumerate(left_sums):
+        if mirror and not left_mask & 1:
+            continue
+        group = by_size.get(team_size - left_sizes[left_mask])
+        if group is None:
+            continue
+        sums, masks = group
+        # team1 sums closest to total / 2 sit around i; the k best for this
+        # left subset are within k places either side.
+        i = bisect_left(sums, (total - 2 * left_sum) / 2)
+        for j in range(max(0, i - k), min(len(sums), i + k)):
+            diff = abs(total - 2 * (left_sum + sums[j]))
+            entry = (-diff, -(left_mask | (masks[j] << half)))
+            if len(best) < k:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+        if len(best) == k and -best[0][0] == total % 2:
+            break
+    return [-mask for _, mask in sorted(best, reverse=True)]
+
+
+def _numpy_top(ratings: Sequence[int], k: int) -> List[int]:
+    n = len(ratings)
+    r = np.asarray(ratings, dtype=np.int64)
+    count = 1 << n
+    sums = np.zeros(count, dtype=np.int64)
+    sizes = np.zeros(count, dtype=np.int8)
+    for bit in range(n):
+        step = 1 << bit
+        sums[step:2 * step] = sums[:step] + r[bit]
+        sizes[step:2 * step] = sizes[:step] + 1
+    valid = sizes == n // 2
+    if n % 2 == 0:
+        valid &= (np.arange(count) & 1).astype(bool)
+    masks = np.flatnonzero(valid)
+    diffs = np.abs(int(r.sum()) - 2 * sums[masks])
+    k = min(k, len(masks))
+    top = np.argpartition(diffs, k - 1)[:k]
+    top = top[np.lexsort((masks[top], diffs[top]))]
+    return [int(mask) for mask in masks[top]]
+
+
+def _swap_search(ratings: Sequence[int], deadline: float, clock: Callable[[], float]) -> int:
+    n = len(ratings)
+    order = sorted(range(n), key=ratings.__getitem__, reverse=True)
+    in_team1 = [False] * n
+    size1 = size2 = 0
+    sum1 = sum2 = 0
+    # Greedy: strongest first, to the weaker team that still has room.
+    for k in order:
+        if size1 < n // 2 and (sum1 <= sum2 or size2 >= n - n // 2):
+            in_team1[k] = True
+            size1 += 1
+            sum1 += ratings[k]
+        else:
+            size2 += 1
+            sum2 += ratings[k]
+
+    diff = sum1 - sum2
+    while diff and clock() < deadline:
+        team2 = sorted((ratings[k], k) for k in range(n) if not in_team1[k])
+        team2_ratings = [r for r, _ in team2]
+        best = (abs(diff), -1, -1)
+        for a in range(n):
+            if not in_team1[a]:
+                continue
+            # Swapping a <-> b changes diff by 2 * (r_b - r_a).
+            i = bisect_left(team2_ratings, ratings[a] - diff / 2)
+            for j in (i - 1, i):
+                if 0 <= j < len(team2):
+                    new = abs(diff - 2 * (ratings[a] - team2_ratings[j]))
+                    if new < best[0]:
+                        best = (new, a, team2[j][1])
+        if best[1] < 0:
+            break
+        _, a, b = best
+        in_team1[a], in_team1[b] = False, True
+        diff -= 2 * (ratings[a] - ratings[b])
+    return sum(1 << k for k in range(n) if in_team1[k])
@@ -1,94 +1,68 @@
 # team_utils.py
 import random
-import itertools
-from player_elo import get_elo
 from player_stats import get_steam_id
-from rcon_utils import rcon
+from rcon_utils import rcon_many
+from team_balance import best_split, top_splits
 
 def elo_shuffle(players):
     """
     指定されたプレイヤーをELOに基づいて2つのチームにシャッフルします。
 
-    シャッフルアルゴリズムは以下のとおりです。
-
-    1. プレイヤーをランダムにシャッフルします。
-    2. 2つのチームとそれぞれのスコアを0に初期化します。
-    3. シャッフルされたプレイヤーを反復処理し、各プレイヤーを
-    ELOの合計が低い方のチームに割り当てます。
+    ELO差が最も小さい分け方の上位（team_balance.top_splits）から
+    ランダムに1つを選ぶので、毎回ほぼ互角で違う組み合わせになります。
+    CT/T の割り当てもランダムです。
 
     :param players: シャッフルするプレイヤーのリスト
     :type players: list[str]
     :return: 2つのプレイヤー名のリスト。それぞれがチームを表します。
     :rtype: tuple[list[str], list[str]]
     """
-    players = list(players)
-    random.shuffle(players)
-
-    team1 = []
-    team2 = []
-    score1 = 0
-    score2 = 0
-
-    for p in players:
-        elo = get_elo(p)
-        if score1 <= score2:
-            team1.append(p)
-            score1 += elo
-        else:
-            team2.append(p)
-            score2 += elo
-
-    return team1, team2
+    split = random.choice(top_splits(players))
+    teams = [split.team1, split.team2]
+    random.shuffle(teams)
+    return teams[0], teams[1]
 
 def smart_shuffle_balanced(players):
     """
     指定されたプレイヤーを2つのチームにシャッフルし、2つのチーム間のELO差が最小になるようにします。
 
+    計算は team_balance.best_split に任せます（人数差は最大1人）。
+
     :param players: シャッフルするプレイヤーのリスト
     :type players: list[str]
     :return: 2つのプレイヤー名のリスト（それぞれがチームを表す）
     :rtype: tuple[list[str], list[str]]
     """
-    players = list(players)
-    if len(players) < 2:
-        return [], []
-
-    best_diff = float("inf")
-    best_split = ([], [])
+    split = best_split(players)
+    return split.team1, split.team2
 
-    n = len(players)
-    for i in range(n // 2, n // 2 + 2):
-        for team1 in itertools.combinations(players, i):
-            team2 = [p for p in players if p not in team1]
-
-            elo1 = sum(get_elo(p) for p in team1)
-            elo2 = sum(get_elo(p) for p in team2)
-            diff = abs(elo1 - elo2)
-
-            if diff < best_diff:
-                best_diff = diff
-                best_split = (list(team1), team2)
-
-    return best_split
-
-def assign_teams(team_ct, team_t):
+def assign_teams(team_ct, team_t, rcon_many_func=rcon_many, current_teams=None):
     """
     RCON コマンドを使用して、指定されたチームを CT チームと TERRORIST チームに割り当てます。
 
+    すべての mp_team_assign はまとめて 1 回で送信されます。
+    current_teams を渡すと、すでにそのチームにいるプレイヤーには送信しません。
+
     :param team_ct: CT チームに割り当てるプレイヤー名のリスト
     :type team_ct: list[str]
     :param team_t: TERRORIST チームに割り当てるプレイヤー名のリスト
     :type team_t: list[str]
+    :param rcon_many_func: コマンドをまとめて送信する関数（既定は rcon_utils.rcon_many）
+    :type rcon_many_func: Callable[[list[str]], list[Optional[str]]]
+    :param current_teams: 現在のチーム（プレイヤー名 -> "CT" / "TERRORIST"）
+    :type current_teams: Optional[dict[str, str]]
     """
-    for player in team_ct:
-        steam_id = get_steam_id(player)
-        if steam_id:
-            rcon(f"mp_team_assign {steam_id} ct")
-
-    for player in team_t:
-        steam_id = get_steam_id(player)
-        if steam_id:
-            rcon(f"mp_team_assign {steam_id} t")
+    current = {name.upper(): team for name, team in (current_teams or {}).items()}
+    commands = []
+    for side, team, players in (("ct", "CT", team_ct), ("t", "TERRORIST", team_t)):
+        for player in players:
+            if current.get(player.upper()) == team:
+                continue
+            steam_id = get_steam_id(player)
+            if steam_id:
+                commands.append(f"mp_team_assign {steam_id} {side}")
+    if commands:
+        rcon_many_func(commands)
 
 def predict_winrate(elo_a, elo_b):
     """
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from async_runtime import AsyncRuntime
+from cheers import HELP_MESSAGES
+from fake_rcon_server import FakeRconServer
+from log_follower import LogDirIndex
+from player_registry import PLAYERS
+from rcon_utils import AsyncRconSession
+from runtime_config import RuntimeConfig
+
+STATUS_OUTPUT = '# 2 1 "alice" [U:1:1001] 00:10 50 0 active 786432 127.0.0.1:27005\n'
+
+
+class LogWriter:
+    """Appends lines to a server log the way srcds does."""
+
+    def __init__(self, log_dir: str) -> None:
+        self.path = os.path.join(log_dir, "L0103000.log")
+        # Empty logs are not followed yet, so start with a line like srcds.
+        self.write('Log file started (file "L0103000.log") (game "csgo")')
+
+    def write(self, *lines: str) -> None:
+        with open(self.path, "ab") as f:
+            for line in lines:
+                stamp = time.strftime("%m/%d/%Y - %H:%M:%S")
+                f.write(f"L {stamp}: {line}\n".encode())
+
+
+class AsyncRuntimeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.log_dir = tmp.name
+        for name in ("save_targets", "load_targets", "load_stats", "load_elo"):
+            patcher = mock.patch(f"controller.{name}")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(PLAYERS.clear)
+
+    def run_runtime(self, server: FakeRconServer, scenario) -> AsyncRuntime:
+        async def main() -> AsyncRuntime:
+            settings = RuntimeConfig(log_dir=self.log_dir, chat_rate_per_second=0, checkpoint_file="")
+            session = AsyncRconSession(server.host, server.port, server.password, timeout=2.0)
+            runtime = AsyncRuntime(settings, session, log_index=LogDirIndex(self.log_dir, check_interval=0.0))
+            writer = LogWriter(self.log_dir)
+            task = asyncio.create_task(runtime.run())
+            try:
+                # The follower starts at EOF; write only once it is attached.
+                await self.until(lambda: runtime.controller.current_log_path)
+                await asyncio.wait_for(scenario(runtime, writer), 10)
+            finally:
+                runtime.stop()
+                await task
+            return runtime
+
+        return asyncio.run(main())
+
+    @staticmethod
+    async def until(condition, timeout: float = 5.0) -> None:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError("condition not met")
+            await asyncio.sleep(0.01)
+
+    def test_chat_command_reply_goes_out_over_rcon(self) -> None:
+        with FakeRconServer() as server:
+            async def scenario(runtime: AsyncRuntime, writer: LogWriter) -> None:
+                writer.write('"alice<2><[U:1:1001]><CT>" say "!map"')
+                await self.until(lambda: any(cmd.startswith('say "利用可能マップ') for cmd in server.commands))
+
+            self.run_runtime(server, scenario)
+
+        self.assertEqual(server.connections, 1)
+
+    def test_slow_rcon_does_not_stall_log_handling(self) -> None:
+        with FakeRconServer(latency=0.5, handler=lambda cmd: STATUS_OUTPUT if cmd == "status" else "") as server:
+            async def scenario(runtime: AsyncRuntime, writer: LogWriter) -> None:
+                writer.write(
+                    '"alice<2><[U:1:1001]><CT>" say "!help"',
+                    '"bob<3><[U:1:1002]><>" connected, address ""',
+                )
+                started = time.monotonic()
+                await self.until(lambda: PLAYERS.by_account_id(1002) is not None)
+                # Handled long before the first RCON reply could arrive.
+                self.assertLess(time.monotonic() - started, 0.4)
+                await self.until(lambda: len(server.commands) >= len(HELP_MESSAGES))
+
+            runtime = self.run_runtime(server, scenario)
+
+        self.assertEqual(runtime.outbox.depth, 0)
+        self.assertEqual(runtime.outbox.metrics.sent, len(HELP_MESSAGES))
+
+    def test_query_callback_receives_status_output(self) -> None:
+        with FakeRconServer(handler=lambda cmd: STATUS_OUTPUT if cmd == "status" else "") as server:
+            outputs: list = []
+
+            async def scenario(runtime: AsyncRuntime, writer: LogWriter) -> None:
+                runtime.controller.rcon_query("status", outputs.append)
+                await self.until(lambda: outputs)
+
+            self.run_runtime(server, scenario)
+
+        self.assertEqual(outputs, [STATUS_OUTPUT])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import threading
+import unittest
+from unittest import mock
+
+from chat_queue import ChatQueue, Priority
+from controller import Controller
+from runtime_config import RuntimeConfig
+from state import MatchState
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ChatQueueTests(unittest.TestCase):
+    def make_queue(self, **kwargs) -> tuple[ChatQueue, list[str], FakeClock]:
+        sent: list[str] = []
+        clock = FakeClock()
+        return ChatQueue(sent.append, clock=clock, **kwargs), sent, clock
+
+    def test_sends_by_priority_then_fifo(self) -> None:
+        queue, sent, _ = self.make_queue(rate_per_second=0)
+        queue.put("c1", Priority.COMMENTARY)
+        queue.put("m1", Priority.MATCH)
+        queue.put("a1", Priority.ADMIN)
+        queue.put("m2", Priority.MATCH)
+
+        while queue.send_next():
+            pass
+
+        self.assertEqual(sent, ["a1", "m1", "m2", "c1"])
+        self.assertEqual(queue.depth, 0)
+
+    def test_rate_limit_spaces_sends(self) -> None:
+        queue, sent, clock = self.make_queue(rate_per_second=2)
+        queue.put("one")
+        queue.put("two")
+
+        self.assertTrue(queue.send_next())
+        self.assertFalse(queue.send_next())
+        clock.now += 0.5
+        self.assertTrue(queue.send_next())
+        self.assertEqual(sent, ["one", "two"])
+
+    def test_stale_commentary_is_dropped_but_match_flow_is_not(self) -> None:
+        queue, sent, clock = self.make_queue(rate_per_second=0, commentary_max_age=2.0)
+        queue.put("old cheer", Priority.COMMENTARY)
+        queue.put("round 5", Priority.MATCH)
+        clock.now += 3.0
+
+        while queue.send_next():
+            pass
+
+        self.assertEqual(sent, ["round 5"])
+        self.assertEqual(queue.metrics.dropped_stale, 1)
+        self.assertEqual(queue.metrics.latency_max, 3.0)
+
+    def test_full_queue_evicts_newest_lower_priority_message(self) -> None:
+        queue, sent, _ = self.make_queue(rate_per_second=0, max_size=2)
+        queue.put("c1", Priority.COMMENTARY)
+        queue.put("c2", Priority.COMMENTARY)
+
+        self.assertTrue(queue.put("admin", Priority.ADMIN))
+        self.assertFalse(queue.put("c3", Priority.COMMENTARY))
+        while queue.send_next():
+            pass
+
+        self.assertEqual(sent, ["admin", "c1"])
+        self.assertEqual(queue.metrics.dropped_full, 2)
+        self.assertEqual(queue.metrics.max_depth, 2)
+
+    def test_worker_sends_without_blocking_caller(self) -> None:
+        release = threading.Event()
+        sent: list[str] = []
+
+        def slow_send(message: str) -> None:
+            release.wait(2.0)
+            sent.append(message)
+
+        queue = ChatQueue(slow_send, rate_per_second=0)
+        queue.start()
+        for i in range(3):
+            queue.put(f"msg {i}")
+        self.assertEqual(sent, [])
+        release.set()
+        queue.stop()
+
+        self.assertEqual(sent, ["msg 0", "msg 1", "msg 2"])
+
+
+class ControllerOutboxTests(unittest.TestCase):
+    def test_say_priority_follows_the_handler(self) -> None:
+        outbox = ChatQueue(lambda _msg: None)
+        controller = Controller(lambda _cmd: "", lambda _msg: None, MatchState(), settings=RuntimeConfig(), outbox=outbox)
+
+        with mock.patch.object(outbox, "put") as put:
+            controller.handle_line('L 01/03/2026 - 18:18:05: "alice<2><[U:1:1001]><CT>" say "!map"')
+            controller.say("match flow")
+
+        self.assertEqual(put.call_args_list[0].args[1], Priority.ADMIN)
+        self.assertEqual(put.call_args_list[-1], mock.call("match flow", Priority.MATCH))
+
+
+if __name__ == "__main__":
+    unittest.main()
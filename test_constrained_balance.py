@@ -0,0 +1,75 @@
+import random
+import unittest
+
+from constrained_balance import BalanceConstraints, balance, parse_pairs
+
+RATINGS = {
+    "A": 1400, "B": 1350, "C": 1200, "D": 1100, "E": 1000,
+    "F": 1000, "G": 950, "H": 900, "I": 850, "J": 800,
+}
+
+
+class ConstrainedBalanceTests(unittest.TestCase):
+    def run_balance(self, constraints: BalanceConstraints, current=None):
+        return balance(RATINGS, constraints, current, RATINGS.__getitem__, budget=0.05, rng=random.Random(1))
+
+    def test_without_constraints_returns_exact_split_without_searching(self) -> None:
+        result = self.run_balance(BalanceConstraints())
+
+        self.assertEqual(result.iterations, 0)
+        self.assertEqual(result.objective.elo_diff, 50)
+        self.assertEqual(len(result.team_ct), 5)
+
+    def test_pairs_and_top_spread_are_honoured(self) -> None:
+        constraints = BalanceConstraints(
+            together=parse_pairs(["a+b", "bad"]),
+            apart=parse_pairs(["e+f"]),
+            spread_top=4,
+        )
+
+        result = self.run_balance(constraints)
+
+        ct = set(result.team_ct)
+        self.assertEqual("A" in ct, "B" in ct)
+        self.assertNotEqual("E" in ct, "F" in ct)
+        self.assertEqual(len(ct & {"A", "B", "C", "D"}), 2)
+        self.assertEqual(result.objective.pair_violations, 0)
+        self.assertEqual(result.objective.spread_excess, 0)
+        # Best Elo difference any split meeting all three constraints can reach.
+        self.assertEqual(result.objective.elo_diff, 250)
+
+    def test_max_changes_limits_moves_from_current_teams(self) -> None:
+        current = {p: "CT" if p in "ABCDE" else "TERRORIST" for p in RATINGS}
+
+        result = self.run_balance(BalanceConstraints(max_changes=2, change_weight=10000), current)
+
+        moved = [p for p in RATINGS if (p in result.team_ct) != (current[p] == "CT")]
+        self.assertLessEqual(len(moved), 2)
+        self.assertEqual(result.objective.changes, len(moved))
+        self.assertIn("移動", result.objective.describe())
+
+    def test_start_split_moves_as_few_players_as_possible(self) -> None:
+        exact = self.run_balance(BalanceConstraints())
+        # Current teams are the exact split with the sides swapped.
+        current = {p: "TERRORIST" if p in exact.team_ct else "CT" for p in RATINGS}
+
+        result = self.run_balance(BalanceConstraints(), current)
+
+        self.assertEqual(result.iterations, 0)
+        self.assertEqual(result.objective.changes, 0)
+        self.assertEqual(sorted(result.team_ct), sorted(exact.team_t))
+
+    def test_budget_is_respected(self) -> None:
+        ticks = iter(range(1000))
+        constraints = BalanceConstraints(apart=(("A", "B"), ("B", "C"), ("A", "C")))
+
+        result = balance(
+            RATINGS, constraints, None, RATINGS.__getitem__, budget=10, clock=lambda: next(ticks)
+        )
+
+        self.assertLessEqual(result.iterations, 10)
+        self.assertEqual(result.objective.pair_violations, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,27 @@
+import os
+import tempfile
 import time
 import unittest
 from unittest import mock
 
+import player_elo
+import player_stats
+from checkpoint import Checkpoint, load_checkpoint, save_checkpoint
 from controller import Controller
+from events import line_time
+from persistence import JsonWriter, install_writer
+from player_registry import PLAYERS
 from runtime_config import RuntimeConfig
+from scheduler import Scheduler
 from state import MatchState
 from tactics import normalize_map_name
 
 
 class ControllerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        PLAYERS.clear()
+        self.addCleanup(PLAYERS.clear)
+
     def make_controller(
         self,
         settings: RuntimeConfig | None = None,
@@ -25,6 +38,25 @@ class ControllerTests(unittest.TestCase):
 
         return Controller(fake_rcon, fake_say, MatchState(), settings=settings), rcon_calls, messages
 
+    def use_data_dir(self, data_dir: str) -> None:
+        """Point the stats/elo/targets files at ``data_dir`` for this test."""
+        for module, attr, name in (
+            (player_stats, "PLAYER_STATS_FILE", "player_stats.json"),
+            (player_stats, "TARGETS_FILE", "targets.json"),
+            (player_elo, "PLAYER_ELO_FILE", "player_elo.json"),
+        ):
+            patcher = mock.patch.object(module, attr, os.path.join(data_dir, name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for table in (
+            player_stats.PLAYER_STATS,
+            player_stats.TARGETS,
+            player_elo.PLAYER_ELO,
+            player_stats.JOURNAL_SEQ,
+            player_elo.JOURNAL_SEQ,
+        ):
+            self.addCleanup(table.clear)
+
     def test_map_change_resets_command_flags(self) -> None:
         controller, _, _ = self.make_controller()
         controller.state.coin_used = True
@@ -69,6 +101,433 @@ class ControllerTests(unittest.TestCase):
             "hello world",
         )
 
+    def test_handle_lines_skips_uninteresting_lines_without_dispatch(self) -> None:
+        controller, _, _ = self.make_controller()
+
+        with mock.patch.object(controller, "handle_line") as handler:
+            controller.handle_lines([
+                b'L 01/03/2026 - 18:18:04: server cvar "mp_freezetime" = "15"',
+                b'L 01/03/2026 - 18:18:05: "test_user<2><[U:1:100000]><CT>" say "!help"\r',
+                b"",
+            ])
+
+        handler.assert_called_once_with(
+            'L 01/03/2026 - 18:18:05: "test_user<2><[U:1:100000]><CT>" say "!help"'
+        )
+
+    def test_classifier_routes_disconnect_before_team_tag_fallback(self) -> None:
+        controller, _, _ = self.make_controller()
+        controller.state.player_teams = {"alice": "CT"}
+        controller.state.alive_ct = {"alice"}
+
+        controller.handle_line('L 01/03/2026 - 18:20:00: "alice<2><[U:1:1001]><CT>" disconnected (reason "Disconnect")')
+
+        self.assertNotIn("alice", controller.state.player_teams)
+        self.assertEqual(controller.state.alive_ct, set())
+
+    def test_chat_text_does_not_trigger_other_events(self) -> None:
+        controller, _, _ = self.make_controller()
+
+        with mock.patch.object(controller, "_handle_round_start_event") as round_start, \
+                mock.patch.object(controller, "handle_chat_command") as chat_command:
+            controller.setup_event_listeners()
+            controller.handle_line(
+                'L 01/03/2026 - 18:18:05: "test_user<2><[U:1:100000]><CT>" say "Round_Start connected"'
+            )
+
+        round_start.assert_not_called()
+        chat_command.assert_called_once()
+
+    def test_lo3_countdown_does_not_block_log_handling(self) -> None:
+        now = [0.0]
+        rcon_calls: list[str] = []
+        messages: list[str] = []
+        controller = Controller(
+            lambda cmd: rcon_calls.append(cmd) or "",
+            messages.append,
+            MatchState(),
+            settings=RuntimeConfig(),
+            scheduler=Scheduler(clock=lambda: now[0]),
+        )
+
+        with mock.patch("controller.time.sleep") as sleep:
+            controller.handle_chat_command("alice", "[U:1:1001]", "CT", "lo3", "")
+        # The countdown runs from the scheduler instead of sleeping.
+        sleep.assert_not_called()
+        self.assertEqual(rcon_calls, ["mp_warmup_end", "mp_restartgame 1"])
+
+        # A line arriving mid-countdown is handled right away.
+        with mock.patch("controller.save_targets"):
+            controller.handle_line('L 01/03/2026 - 18:18:01: "bob<3><[U:1:1002]><>" connected, address ""')
+        self.assertEqual(PLAYERS.by_account_id(1002).name, "bob")
+
+        now[0] = 3.0
+        controller.scheduler.run_due()
+        self.assertEqual(rcon_calls[2:], ["mp_restartgame 1", "mp_restartgame 1", "mp_unpause_match"])
+        self.assertEqual(messages[-1], "Live on 3! GLHF!")
+
+        now[0] = 4.5
+        controller.scheduler.run_due()
+        self.assertEqual(rcon_calls[-1], "status")
+
+    def test_cancel_stops_pending_lo3_countdown(self) -> None:
+        controller, rcon_calls, _ = self.make_controller(RuntimeConfig(admin_steamid="[U:1:1]"))
+
+        controller.handle_chat_command("admin", "[U:1:1]", "CT", "lo3", "")
+        controller.handle_chat_command("admin", "[U:1:1]", "CT", "cancel", "")
+
+        self.assertIsNone(controller.scheduler.next_delay())
+        self.assertEqual(rcon_calls, ["mp_warmup_end", "mp_restartgame 1"])
+
+    def test_silence_commentary_fires_at_deadline_pushed_back_by_kills(self) -> None:
+        now = [line_time("L 01/03/2026 - 18:20:00")]
+        messages: list[str] = []
+        controller = Controller(
+            lambda _cmd: "",
+            messages.append,
+            MatchState(),
+            settings=RuntimeConfig(silence_seconds=20, idle_comment_seconds=60),
+            scheduler=Scheduler(clock=lambda: now[0]),
+            clock=lambda: now[0],
+        )
+        controller.state.live_started = True
+        controller.state.commentary_enabled = True
+
+        controller.handle_line('L 01/03/2026 - 18:20:00: World triggered "Round_Start"')
+        controller.state.alive_ct = {"alice", "carol"}
+        controller.state.alive_t = {"bob", "dave"}
+        self.assertEqual(controller.scheduler.next_delay(), 20.0)
+
+        now[0] += 15
+        controller.handle_line(
+            'L 01/03/2026 - 18:20:15: "alice<2><[U:1:1001]><CT>" [1 2 3] killed '
+            '"bob<3><[U:1:1002]><TERRORIST>" [4 5 6] with "ak47"'
+        )
+        messages.clear()
+        now[0] += 5
+        controller.scheduler.run_due()
+        self.assertEqual(messages, [])
+        # Re-armed for the remainder of the window opened by the kill.
+        self.assertEqual(controller.scheduler.next_delay(), 15.0)
+
+        now[0] += 15
+        controller.scheduler.run_due()
+
+        self.assertEqual(len(messages), 1)
+        self.assertTrue(controller.state.silence_comment_given)
+
+    def test_commentary_deadlines_follow_the_scheduler_clock(self) -> None:
+        # The log clock runs an hour ahead of this machine's wall clock.
+        wall = line_time("L 01/03/2026 - 17:20:00")
+        ticks = [100.0]
+        messages: list[str] = []
+        controller = Controller(
+            lambda _cmd: "",
+            messages.append,
+            MatchState(),
+            settings=RuntimeConfig(silence_seconds=20, idle_comment_seconds=60),
+            scheduler=Scheduler(clock=lambda: ticks[0]),
+            clock=lambda: wall,
+        )
+        controller.state.live_started = True
+        controller.state.commentary_enabled = True
+
+        controller.handle_line('L 01/03/2026 - 18:20:00: World triggered "Round_Start"')
+        controller.state.alive_ct = {"alice"}
+        controller.state.alive_t = {"bob"}
+        ticks[0] += 19
+        controller.scheduler.run_due()
+        self.assertEqual(messages, [])
+
+        ticks[0] += 1
+        controller.scheduler.run_due()
+
+        self.assertEqual(len(messages), 1)
+        self.assertTrue(controller.state.silence_comment_given)
+        self.assertEqual(controller.scheduler.next_delay(), 40.0)
+
+    def test_resumes_from_checkpoint_with_chat_suppressed(self) -> None:
+        with tempfile.TemporaryDirectory() as log_dir:
+            log_path = os.path.join(log_dir, "L0103000.log")
+            stamp = time.strftime("%m/%d/%Y - %H:%M:%S").encode()
+            seen = b'L ' + stamp + b': World triggered "Round_Start"\n'
+            missed = (
+                b'L ' + stamp + b': "alice<2><[U:1:1001]><CT>" [1 2 3] killed '
+                b'"bob<3><[U:1:1002]><TERRORIST>" [4 5 6] with "ak47"\n'
+            )
+            with open(log_path, "wb") as f:
+                f.write(seen + missed)
+            saved = MatchState(live_started=True, ct_score=3, t_score=2, round_start_time=time.time())
+            checkpoint_file = os.path.join(log_dir, "checkpoint.json")
+            save_checkpoint(checkpoint_file, Checkpoint(log_path, len(seen), saved.to_dict()))
+
+            settings = RuntimeConfig(log_dir=log_dir, checkpoint_file=checkpoint_file)
+            self.use_data_dir(log_dir)
+            controller, _, messages = self.make_controller(settings)
+            controller.start()
+            try:
+                self.assertTrue(controller.catching_up)
+                controller.handle_lines(controller.follower.read_lines())
+                controller.write_checkpoint()
+            finally:
+                controller.follower.close()
+            resumed = load_checkpoint(checkpoint_file)
+
+        self.assertEqual((controller.state.ct_score, controller.state.t_score), (3, 2))
+        self.assertIsNotNone(controller.state.last_kill_time)
+        self.assertEqual(messages, [])
+        self.assertGreater(controller.suppressed_says, 0)
+        self.assertFalse(controller.catching_up)
+        self.assertEqual(resumed.offset, len(seen) + len(missed))
+
+    def test_crash_after_journaling_does_not_record_the_match_twice(self) -> None:
+        with tempfile.TemporaryDirectory() as log_dir:
+            self.use_data_dir(log_dir)
+            log_path = os.path.join(log_dir, "L0103000.log")
+            stamp = time.strftime("%m/%d/%Y - %H:%M:%S").encode()
+            start = b'L ' + stamp + b': World triggered "Round_Start"\n'
+            game_over = b'L ' + stamp + b': Game Over: competitive mg_active de_mirage score 13:5 after 35 min\n'
+            with open(log_path, "wb") as f:
+                f.write(start + game_over + start)
+            checkpoint_file = os.path.join(log_dir, "checkpoint.json")
+            saved = MatchState(
+                live_started=True, match_finished=False, player_teams={"alice": "CT", "bob": "TERRORIST"}
+            )
+            save_checkpoint(checkpoint_file, Checkpoint(log_path, 0, saved.to_dict()))
+            settings = RuntimeConfig(
+                log_dir=log_dir,
+                checkpoint_file=checkpoint_file,
+                match_journal_file=os.path.join(log_dir, "match_journal.jsonl"),
+            )
+
+            def run_once() -> Controller:
+                controller, _, _ = self.make_controller(settings)
+                controller.start()
+                try:
+                    controller.handle_lines(controller.follower.read_lines())
+                finally:
+                    controller.follower.close()
+                return controller
+
+            # Crash before the background writer flushed anything.
+            writer = JsonWriter(window=60.0)
+            install_writer(writer)
+            self.addCleanup(install_writer, None)
+            self.assertEqual(run_once().matches_finished, 1)
+            self.assertEqual(load_checkpoint(checkpoint_file).offset, len(start + game_over))
+
+            install_writer(None)
+            restarted = run_once()
+            journaled = len(restarted.journal.read())
+
+        self.assertEqual(restarted.matches_finished, 0)
+        self.assertEqual(journaled, 1)
+        self.assertEqual(player_stats.PLAYER_STATS["ALICE"], {"wins": 1, "losses": 0})
+
+    def test_resume_applies_missed_lo3_and_records_the_match(self) -> None:
+        with tempfile.TemporaryDirectory() as log_dir:
+            self.use_data_dir(log_dir)
+            log_path = os.path.join(log_dir, "L0103000.log")
+            stamp = time.strftime("%m/%d/%Y - %H:%M:%S").encode()
+            with open(log_path, "wb") as f:
+                f.write(
+                    b'L ' + stamp + b': "alice<2><[U:1:1001]><CT>" say "!lo3"\n'
+                    b'L ' + stamp + b': Game Over: competitive mg_active de_mirage score 13:5 after 35 min\n'
+                )
+            # Checkpointed before !lo3: the previous match is still finished.
+            checkpoint_file = os.path.join(log_dir, "checkpoint.json")
+            saved = MatchState(temp_player_teams={"alice": "CT", "bob": "TERRORIST"})
+            save_checkpoint(checkpoint_file, Checkpoint(log_path, 0, saved.to_dict()))
+            settings = RuntimeConfig(log_dir=log_dir, checkpoint_file=checkpoint_file, match_journal_file="")
+            controller, rcon_calls, messages = self.make_controller(settings)
+            controller.start()
+            try:
+                controller.handle_lines(controller.follower.read_lines())
+            finally:
+                controller.follower.close()
+
+        self.assertEqual(controller.matches_finished, 1)
+        self.assertEqual(player_stats.PLAYER_STATS["ALICE"]["wins"], 1)
+        self.assertEqual(player_stats.PLAYER_STATS["BOB"]["losses"], 1)
+        self.assertNotIn("mp_warmup_end", rcon_calls)
+        self.assertIsNone(controller.scheduler.next_delay())
+        self.assertEqual(messages, [])
+
+    def test_lagging_log_updates_state_without_chat_until_caught_up(self) -> None:
+        controller, rcon_calls, messages = self.make_controller(RuntimeConfig(catch_up_lag_seconds=10))
+        controller.follower = mock.Mock(at_eof=True, current_path=None)
+        controller.state.live_started = True
+
+        def line(age: float, text: str) -> bytes:
+            stamp = time.strftime("%m/%d/%Y - %H:%M:%S", time.localtime(time.time() - age))
+            return f"L {stamp}: {text}".encode()
+
+        with mock.patch("controller.save_targets"):
+            controller.handle_lines([
+                line(60, 'World triggered "Round_Start"'),
+                line(60, '"alice<2><[U:1:1001]><CT>" say "!map"'),
+                line(59, '"bob<3><[U:1:1002]><>" connected, address ""'),
+            ])
+            self.assertTrue(controller.catching_up)
+            self.assertEqual(PLAYERS.by_account_id(1002).name, "bob")
+            # Still above half the threshold: stay in catch-up.
+            controller.handle_lines([line(7, '"alice<2><[U:1:1001]><CT>" say "!map"')])
+            self.assertTrue(controller.catching_up)
+            self.assertEqual(messages, [])
+
+            controller.handle_lines([line(0, '"alice<2><[U:1:1001]><CT>" say "!map"')])
+
+        self.assertFalse(controller.catching_up)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(rcon_calls, [])
+
+    def test_late_lines_are_timed_by_their_log_timestamp(self) -> None:
+        controller, _, messages = self.make_controller()
+        controller.clock = lambda: line_time("L 01/03/2026 - 18:25:00")
+        controller.state.live_started = True
+
+        controller.handle_line('L 01/03/2026 - 18:20:00: World triggered "Round_Start"')
+        controller.handle_line(
+            'L 01/03/2026 - 18:20:10: "alice<2><[U:1:1001]><CT>" [1 2 3] killed '
+            '"bob<3><[U:1:1002]><TERRORIST>" [4 5 6] with "ak47"'
+        )
+
+        self.assertIn("bob が開幕15秒以内にダウン", messages)
+        self.assertEqual(controller.state.last_kill_time, line_time("L 01/03/2026 - 18:20:10"))
+        self.assertEqual(controller.now(), line_time("L 01/03/2026 - 18:25:00"))
+
+    def test_game_over_records_result_and_keeps_running(self) -> None:
+        controller, _, messages = self.make_controller()
+        controller.state.match_finished = False
+        controller.state.live_started = True
+        controller.state.current_map = "de_mirage"
+        controller.state.ct_score = 13
+        controller.state.player_teams.update({"alice": "CT", "bob": "TERRORIST"})
+        PLAYERS.observe("alice", "[U:1:1001]")
+
+        with mock.patch.object(controller, "record_match_result") as record, \
+                mock.patch("controller.update_elo"), \
+                mock.patch("controller.save_stats") as save_stats, \
+                mock.patch("controller.save_elo"), \
+                mock.patch("controller.save_targets"):
+            controller.handle_line(
+                "L 01/03/2026 - 18:50:00: Game Over: competitive mg_active de_mirage score 13:5 after 35 min"
+            )
+
+        record.assert_called_once_with("CT", ["alice"], ["bob"], save=False)
+        save_stats.assert_called_once_with(["ALICE", "BOB"])
+        self.assertIn("CT の勝利！GG WP!", messages)
+        self.assertEqual(controller.matches_finished, 1)
+        self.assertEqual(controller.state.ct_score, 0)
+        self.assertEqual(controller.state.player_teams, {})
+        self.assertEqual(controller.state.current_map, "de_mirage")
+        self.assertEqual(controller.get_team("[U:1:1001]"), "UNKNOWN")
+        self.assertEqual(PLAYERS.by_account_id(1001).name, "alice")
+
+    def test_eloshuffle_assigns_teams_in_one_batch(self) -> None:
+        batches: list[list[str]] = []
+        controller = Controller(
+            lambda cmd: "",
+            lambda msg: None,
+            MatchState(),
+            settings=RuntimeConfig(),
+            rcon_many_func=lambda commands: batches.append(list(commands)) or [""] * len(commands),
+        )
+        with mock.patch("controller.save_targets"):
+            for slot, name in enumerate(["alice", "bob", "carol", "dave"], 1):
+                controller.handle_line(
+                    f'L 01/03/2026 - 18:18:0{slot}: "{name}<{slot}><[U:1:100{slot}]><>" connected, address ""'
+                )
+        # Seen before but gone: no longer shuffled.
+        controller.handle_line('L 01/03/2026 - 18:19:00: "dave<4><[U:1:1004]><CT>" disconnected (reason "x")')
+
+        controller.handle_chat_command("admin", "[U:1:1]", "CT", "eloshuffle", "")
+
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(
+            sorted(cmd.split()[1] for cmd in batches[0]),
+            ["[U:1:1001]", "[U:1:1002]", "[U:1:1003]"],
+        )
+
+    def test_run_exits_with_error_when_no_log_appears(self) -> None:
+        controller, _, _ = self.make_controller()
+        follower = mock.Mock(current_path=None)
+        follower.refresh.return_value = False
+
+        def start() -> None:
+            controller.follower = follower
+
+        with mock.patch.object(controller, "start", start), mock.patch("controller.time.sleep") as sleep:
+            with self.assertRaises(SystemExit) as cm:
+                controller.run()
+
+        self.assertEqual(cm.exception.code, 1)
+        self.assertEqual(sleep.call_count, 31)
+        follower.close.assert_called_once()
+
+    def test_status_resyncs_roster_with_join_and_leave_times(self) -> None:
+        controller, _, _ = self.make_controller()
+        with mock.patch("controller.save_targets"):
+            controller.handle_line('L 01/03/2026 - 18:18:01: "ghost<9><[U:1:1009]><>" connected, address ""')
+            controller.handle_line('L 01/03/2026 - 18:18:05: "alice<2><[U:1:1001]><CT>" say "hi"')
+            controller.parse_status_output(
+                '  2 "alice" [U:1:1001] 00:10 50 0 active\n'
+                '  3 "bob" [U:1:1002] 00:10 50 0 active\n'
+            )
+
+        self.assertEqual(controller.roster.names, {"alice", "bob"})
+        [ghost] = controller.roster.recently_left()
+        self.assertEqual(ghost.name, "ghost")
+        self.assertEqual(ghost.joined_at, line_time("L 01/03/2026 - 18:18:01"))
+        self.assertIsNotNone(ghost.left_at)
+        self.assertEqual(controller.get_random_warning_target("alice"), "bob")
+
+    def test_status_without_player_lines_keeps_roster(self) -> None:
+        controller, _, _ = self.make_controller()
+        with mock.patch("controller.save_targets"):
+            controller.handle_line('L 01/03/2026 - 18:18:01: "alice<2><[U:1:1001]><>" connected, address ""')
+            controller.parse_status_output("hostname: cs2\nplayers  : 1 humans, 0 bots (10 max)\n#end\n")
+            self.assertEqual(controller.roster.names, {"alice"})
+
+            controller.parse_status_output("hostname: cs2\nplayers  : 0 humans, 0 bots (10 max)\n#end\n")
+            self.assertEqual(controller.roster.names, frozenset())
+
+            controller.parse_status_output('# 2 1 "bob" [U:1:1002] 00:10 50 0 active 786432 127.0.0.1:27005\n')
+        self.assertEqual(controller.roster.names, {"bob"})
+
+    def test_balancecheck_suggests_better_split(self) -> None:
+        controller, _, messages = self.make_controller()
+        controller.state.player_teams = {"a": "CT", "b": "CT", "c": "TERRORIST", "d": "TERRORIST"}
+        elo = {"a": 1200, "b": 1100, "c": 900, "d": 1000}
+
+        with mock.patch("controller.get_elo", elo.get):
+            controller.handle_chat_command("admin", "[U:1:1]", "CT", "balancecheck", "")
+
+        self.assertEqual(messages[2], "チーム間の Elo 差: 400")
+        self.assertEqual(messages[3], "最適な分け方なら Elo 差: 0 (!smartshuffle)")
+
+    def test_chat_line_feeds_identity_and_command_handlers(self) -> None:
+        controller, _, _ = self.make_controller()
+
+        with mock.patch.object(controller, "handle_chat_command") as handler:
+            controller.handle_line('L 01/03/2026 - 18:18:05: "alice<2><[U:1:1001]><CT>" say "!rdy"')
+
+        handler.assert_called_once_with("alice", "[U:1:1001]", "CT", "rdy", "")
+        self.assertEqual(PLAYERS.by_account_id(1001).name, "alice")
+        self.assertEqual(controller.get_team("[U:1:1001]"), "CT")
+
+    def test_round_stats_resolves_account_ids_seen_in_log(self) -> None:
+        controller, _, _ = self.make_controller()
+        with mock.patch("controller.save_targets"):
+            controller.handle_line('L 01/03/2026 - 18:18:01: "bob<3><[U:1:1002]><>" connected, address ""')
+
+        controller.handle_round_stats({
+            "fields": "accountid, kills, 3k, 4k, 5k",
+            "players": {"player_0": "1002, 3, 1, 0, 0"},
+        })
+
+        self.assertEqual(controller.state.accolades, [("3k", "bob", 1)])
+
     def test_side_switch_announced_once_at_round_13(self) -> None:
         controller, _, messages = self.make_controller()
         controller.state.live_started = True
@@ -266,7 +725,6 @@ class ControllerTests(unittest.TestCase):
         controller, _, _ = self.make_controller()
         controller.state.player_teams = {"alice": "CT"}
         controller.state.temp_player_teams = {"bob": "CT", "charlie": "TERRORIST"}
-        controller.state.steam_to_name = {}
 
         ct = controller._collect_team_players("CT")
         t = controller._collect_team_players("TERRORIST")
@@ -0,0 +1,119 @@
+import unittest
+
+from events import (
+    INTERESTING_LINE_RE,
+    ChatEvent,
+    DisconnectEvent,
+    EventBus,
+    KillEvent,
+    PlayerTeamEvent,
+    RoundStartEvent,
+    parse_line,
+    parse_log_time,
+)
+
+
+class ParseLineTests(unittest.TestCase):
+    def test_kill_line_parses_flags_once(self) -> None:
+        event = parse_line(
+            'L 01/03/2026 - 18:20:00: "alice<2><[U:1:1001]><CT>" [1 2 3] killed '
+            '"BOT Bob<3><BOT><TERRORIST>" [4 5 6] with "ak47" (headshot penetrated)'
+        )
+
+        self.assertIsInstance(event, KillEvent)
+        assert isinstance(event, KillEvent)
+        self.assertEqual(event.killer, "alice")
+        self.assertEqual(event.victim_steam_id, "BOT")
+        self.assertEqual(event.weapon, "ak47")
+        self.assertTrue(event.headshot)
+        self.assertTrue(event.penetrated)
+
+    def test_headshot_in_player_name_is_not_a_headshot(self) -> None:
+        event = parse_line(
+            'L 01/03/2026 - 18:20:00: "headshot<2><[U:1:1001]><CT>" [1 2 3] killed '
+            '"bob<3><[U:1:1002]><TERRORIST>" [4 5 6] with "glock"'
+        )
+
+        assert isinstance(event, KillEvent)
+        self.assertFalse(event.headshot)
+
+    def test_chat_command(self) -> None:
+        event = parse_line('L 01/03/2026 - 18:18:05: "test_user<2><[U:1:100000]><CT>" say "!map mirage"')
+
+        self.assertEqual(
+            event,
+            ChatEvent("test_user", "[U:1:100000]", "100000", "CT", "!map mirage", "map", "mirage"),
+        )
+
+    def test_spectator_chat_is_not_a_command(self) -> None:
+        event = parse_line('L 01/03/2026 - 18:18:05: "spec<2><[U:1:100000]><Spectator>" say "!lo3"')
+
+        assert isinstance(event, ChatEvent)
+        self.assertIsNone(event.command)
+
+    def test_disconnect_and_team_tag_fallback(self) -> None:
+        self.assertIsInstance(
+            parse_line('L 01/03/2026 - 18:20:00: "bob<3><[U:1:1002]><TERRORIST>" disconnected (reason "x")'),
+            DisconnectEvent,
+        )
+        self.assertEqual(
+            parse_line('L 01/03/2026 - 18:20:00: "bob<3><[U:1:1002]><TERRORIST>" purchased "ak47"'),
+            PlayerTeamEvent("bob", "[U:1:1002]", "TERRORIST"),
+        )
+
+    def test_round_start_and_unrelated_lines(self) -> None:
+        self.assertIsInstance(parse_line('L 01/03/2026 - 18:20:00: World triggered "Round_Start"'), RoundStartEvent)
+        self.assertIsNone(parse_line('L 01/03/2026 - 18:20:00: server cvar "mp_freezetime" = "15"'))
+
+    def test_keywords_match_with_server_casing_only(self) -> None:
+        lines = [
+            'World triggered "Round_Start"',
+            'Starting Freeze period',
+            'Game Over: competitive mg_active de_mirage score 13:5 after 35 min',
+            'MatchStatus: Score: 3:2 on map "de_mirage" RoundsPlayed: 5',
+            'ACCOLADE, FINAL: {3k},\talice<2>,\tVALUE: 2.000000,\tPOS: 1,\tSCORE: 40.0',
+            '"alice<2><[U:1:1001]><CT>" [1 2 3] killed "bob<3><[U:1:1002]><TERRORIST>" [4 5 6] with "ak47"',
+        ]
+        for text in lines:
+            with self.subTest(text=text):
+                line = f"L 01/03/2026 - 18:20:00: {text}"
+                self.assertIsNotNone(parse_line(line))
+                self.assertIsNotNone(INTERESTING_LINE_RE.search(line.encode()))
+                self.assertIsNone(parse_line(line.lower()))
+
+    def test_events_carry_log_timestamp(self) -> None:
+        first = parse_line('L 01/03/2026 - 18:20:00: World triggered "Round_Start"')
+        later = parse_line('L 01/03/2026 - 18:20:07: "bob<3><[U:1:1002]><TERRORIST>" purchased "ak47"')
+
+        self.assertEqual(later.timestamp - first.timestamp, 7.0)
+        self.assertEqual(parse_log_time(b"L 01/03/2026 - 18:20:07: x"), later.timestamp)
+        self.assertIsNone(parse_line('Loading map "de_mirage"').timestamp)
+
+    def test_malformed_timestamp_is_ignored(self) -> None:
+        event = parse_line('L 13/32/2026 - 18:20:00: World triggered "Round_Start"')
+
+        self.assertIsInstance(event, RoundStartEvent)
+        self.assertIsNone(event.timestamp)
+        self.assertIsNone(parse_log_time(b"L 02/30/2026 - 25:61:00: x"))
+
+    def test_events_use_slots(self) -> None:
+        event = KillEvent("a", "[U:1:1]", "CT", "b", "[U:1:2]", "TERRORIST", "awp")
+        with self.assertRaises(AttributeError):
+            event.extra = 1  # type: ignore[attr-defined]
+
+
+class EventBusTests(unittest.TestCase):
+    def test_publish_reaches_every_subscriber_in_order(self) -> None:
+        bus = EventBus()
+        seen = []
+        bus.subscribe(RoundStartEvent, lambda e: seen.append("first"))
+        bus.subscribe(RoundStartEvent, lambda e: seen.append("second"))
+        bus.subscribe(KillEvent, lambda e: seen.append("kill"))
+
+        self.assertEqual(bus.publish(RoundStartEvent()), 2)
+        self.assertEqual(seen, ["first", "second"])
+        self.assertEqual(bus.publish(PlayerTeamEvent("a", "BOT", "CT")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+import launcher
+
+
+class FakeProcess:
+    def __init__(self, code: int) -> None:
+        self.code = code
+
+    def wait(self) -> int:
+        return self.code
+
+
+class SuperviseTests(unittest.TestCase):
+    def run_supervisor(self, codes: list[int], run_seconds: float = 1.0) -> list[float]:
+        now = [0.0]
+        sleeps: list[float] = []
+        pending = list(codes)
+
+        def popen(_command: list[str]) -> FakeProcess:
+            now[0] += run_seconds
+            return FakeProcess(pending.pop(0))
+
+        def sleep(seconds: float) -> None:
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        self.assertEqual(launcher.supervise(["controller"], popen=popen, sleep=sleep, clock=lambda: now[0]), 0)
+        self.assertEqual(pending, [])
+        return sleeps
+
+    def test_crashes_back_off_exponentially_up_to_the_cap(self) -> None:
+        sleeps = self.run_supervisor([1] * 9 + [0])
+        self.assertEqual(sleeps, [1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0, 60.0])
+
+    def test_healthy_run_resets_backoff(self) -> None:
+        sleeps = self.run_supervisor([1, 1, 0], run_seconds=launcher.HEALTHY_RUN_SECONDS)
+        self.assertEqual(sleeps, [1.0, 1.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import time
+import unittest
+
+from log_follower import LogDirIndex, LogFollower
+
+
+class LogFollowerTests(unittest.TestCase):
+    use_inotify = True
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_dir = self.tmp.name
+        self.first = os.path.join(self.log_dir, "a.log")
+        with open(self.first, "w", encoding="utf-8") as f:
+            f.write("old line\n")
+        self.follower = LogFollower(
+            self.log_dir,
+            LogDirIndex(self.log_dir, check_interval=0.0),
+            use_inotify=self.use_inotify,
+        )
+
+    def tearDown(self) -> None:
+        self.follower.close()
+        self.tmp.cleanup()
+
+    def test_starts_at_end_and_reads_appended_lines(self) -> None:
+        self.assertTrue(self.follower.refresh())
+        self.assertEqual(self.follower.read_lines(), [])
+
+        with open(self.first, "a", encoding="utf-8") as f:
+            f.write("new line\n")
+
+        started = time.monotonic()
+        self.follower.wait(5.0)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(self.follower.read_lines(), [b"new line"])
+
+    def test_keeps_incomplete_line_until_newline_arrives(self) -> None:
+        self.follower.refresh()
+        with open(self.first, "ab") as f:
+            f.write(b"one\ntwo\nthr")
+        self.assertEqual(self.follower.read_lines(), [b"one", b"two"])
+        self.assertEqual(self.follower.read_lines(), [])
+
+        with open(self.first, "ab") as f:
+            f.write(b"ee\n")
+        self.assertEqual(self.follower.read_lines(), [b"three"])
+
+    def test_switches_to_rotated_log(self) -> None:
+        self.follower.refresh()
+        second = os.path.join(self.log_dir, "b.log")
+        with open(second, "w", encoding="utf-8") as f:
+            f.write("rotated\n")
+        future = time.time() + 5
+        os.utime(second, (future, future))
+
+        self.follower.wait(1.0)
+        self.assertTrue(self.follower.refresh())
+        self.assertEqual(self.follower.current_path, second)
+
+    def test_resume_reads_missed_tail_before_rotating(self) -> None:
+        with open(self.first, "ab") as f:
+            f.write(b"missed 1\nmissed 2\n")
+        second = os.path.join(self.log_dir, "b.log")
+        with open(second, "w", encoding="utf-8") as f:
+            f.write("rotated\n")
+        future = time.time() + 5
+        os.utime(second, (future, future))
+
+        self.assertTrue(self.follower.resume(self.first, len(b"old line\n")))
+        self.assertFalse(self.follower.refresh())
+        self.assertEqual(self.follower.read_lines(), [b"missed 1", b"missed 2"])
+        self.assertEqual(self.follower.offset, os.path.getsize(self.first))
+        self.assertTrue(self.follower.at_eof)
+        self.assertTrue(self.follower.refresh())
+        self.assertEqual(self.follower.current_path, second)
+
+    def test_resume_rejects_offset_past_end(self) -> None:
+        self.assertFalse(self.follower.resume(self.first, 10_000))
+        self.assertFalse(self.follower.resume(os.path.join(self.log_dir, "gone.log"), 0))
+        self.assertIsNone(self.follower.current_path)
+
+
+class LogDirIndexTests(unittest.TestCase):
+    def test_rescans_only_when_directory_changes(self) -> None:
+        now = [0.0]
+        with tempfile.TemporaryDirectory() as log_dir:
+            for i in range(50):
+                with open(os.path.join(log_dir, f"{i:03d}.log"), "w", encoding="utf-8") as f:
+                    f.write("x\n")
+            newest = os.path.join(log_dir, "049.log")
+            os.utime(newest, (time.time() + 5, time.time() + 5))
+
+            index = LogDirIndex(log_dir, check_interval=1.0, clock=lambda: now[0])
+            for _ in range(100):
+                self.assertEqual(index.latest(), newest)
+            now[0] += 2.0
+            self.assertEqual(index.latest(), newest)
+            self.assertEqual(index.scan_count, 1)
+
+            rotated = os.path.join(log_dir, "100.log")
+            with open(rotated, "w", encoding="utf-8"):
+                pass
+            os.utime(log_dir, (time.time() + 10, time.time() + 10))
+            now[0] += 2.0
+            self.assertEqual(index.latest(), newest)
+
+            with open(rotated, "a", encoding="utf-8") as f:
+                f.write("first line\n")
+            os.utime(rotated, (time.time() + 20, time.time() + 20))
+            now[0] += 2.0
+            self.assertEqual(index.latest(), rotated)
+            self.assertEqual(index.scan_count, 3)
+
+
+class PollingLogFollowerTests(LogFollowerTests):
+    use_inotify = False
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import match_journal
+import player_elo
+import player_stats
+from match_journal import MatchJournal, build_record, replay_journal, save_and_compact
+
+
+class MatchJournalTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.path = str(self.dir / "match_journal.jsonl")
+        for module, attr, name in (
+            (player_stats, "PLAYER_STATS_FILE", "player_stats.json"),
+            (player_elo, "PLAYER_ELO_FILE", "player_elo.json"),
+        ):
+            patcher = mock.patch.object(module, attr, str(self.dir / name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for table in (
+            player_stats.PLAYER_STATS,
+            player_elo.PLAYER_ELO,
+            player_stats.JOURNAL_SEQ,
+            player_elo.JOURNAL_SEQ,
+        ):
+            table.clear()
+            self.addCleanup(table.clear)
+
+    def play_match(self, journal: MatchJournal, winner: str = "CT") -> None:
+        names = ["ALICE", "BOB"]
+        stats_before = {n: dict(player_stats.PLAYER_STATS.get(n, {})) for n in names}
+        elo_before = {n: player_elo.get_elo(n) for n in names}
+        for name, won in (("ALICE", winner == "CT"), ("BOB", winner != "CT")):
+            row = player_stats.PLAYER_STATS.setdefault(name, {"wins": 0, "losses": 0})
+            row["wins" if won else "losses"] += 1
+        player_elo.update_elo(winner, ["alice"], ["bob"], save=False)
+        journal.append(build_record(winner, "de_mirage", (13, 5), ["alice"], ["bob"], stats_before, elo_before))
+
+    def test_replay_restores_result_missing_from_snapshots(self) -> None:
+        journal = MatchJournal(self.path)
+        self.play_match(journal)
+        # Crash before the snapshots were written.
+        player_stats.load_stats()
+        player_elo.load_elo()
+
+        names = replay_journal(MatchJournal(self.path))
+
+        self.assertEqual(sorted(names), ["ALICE", "BOB"])
+        self.assertEqual(player_stats.PLAYER_STATS["ALICE"], {"wins": 1, "losses": 0})
+        self.assertEqual(player_elo.PLAYER_ELO, {"ALICE": 1025, "BOB": 975})
+        record = MatchJournal(self.path).read()[0]
+        self.assertEqual(record.elo_deltas, {"ALICE": 25, "BOB": -25})
+        self.assertEqual(record.stats_deltas["BOB"], {"wins": 0, "losses": 1})
+
+    def test_replay_over_saved_snapshots_changes_nothing(self) -> None:
+        journal = MatchJournal(self.path)
+        self.play_match(journal)
+        save_and_compact(journal, ["ALICE", "BOB"])
+        player_stats.load_stats()
+        player_elo.load_elo()
+
+        replay_journal(journal)
+
+        self.assertEqual(player_stats.PLAYER_STATS["ALICE"], {"wins": 1, "losses": 0})
+        self.assertEqual(player_elo.PLAYER_ELO["ALICE"], 1025)
+
+    def test_replay_keeps_fields_saved_after_the_match(self) -> None:
+        journal = MatchJournal(self.path)
+        self.play_match(journal)
+        save_and_compact(journal, ["ALICE", "BOB"])
+        player_stats.PLAYER_STATS["ALICE"]["last_omikuji_date"] = "2026-01-03"
+        player_stats.save_stats(["ALICE"])
+        # Only the stats snapshot has the match: elo is replayed, stats not.
+        player_elo.PLAYER_ELO.clear()
+        player_elo.JOURNAL_SEQ.clear()
+        player_elo.save_elo()
+        player_stats.load_stats()
+        player_elo.load_elo()
+
+        names = replay_journal(MatchJournal(self.path))
+
+        self.assertEqual(sorted(names), ["ALICE", "BOB"])
+        self.assertEqual(
+            player_stats.PLAYER_STATS["ALICE"], {"wins": 1, "losses": 0, "last_omikuji_date": "2026-01-03"}
+        )
+        self.assertEqual(player_elo.PLAYER_ELO, {"ALICE": 1025, "BOB": 975})
+
+    def test_numbering_continues_after_full_compaction(self) -> None:
+        with mock.patch.object(match_journal, "COMPACT_AFTER_RECORDS", 1):
+            journal = MatchJournal(self.path)
+            self.play_match(journal)
+            save_and_compact(journal, ["ALICE", "BOB"])
+        self.assertEqual(Path(self.path).read_text(encoding="utf-8"), "")
+
+        player_stats.load_stats()
+        player_elo.load_elo()
+        journal = MatchJournal(self.path)
+        self.assertEqual(replay_journal(journal), [])
+        self.play_match(journal)
+        self.assertEqual([r.seq for r in journal.read()], [2])
+
+        # Crash before saving: only the second match is replayed.
+        player_stats.load_stats()
+        player_elo.load_elo()
+        replay_journal(MatchJournal(self.path))
+        self.assertEqual(player_stats.PLAYER_STATS["ALICE"], {"wins": 2, "losses": 0})
+        self.assertEqual(player_elo.PLAYER_ELO["ALICE"], 1050)
+
+    def test_partial_last_line_is_dropped(self) -> None:
+        journal = MatchJournal(self.path)
+        self.play_match(journal)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"winner": "CT", "map_na')
+
+        journal = MatchJournal(self.path)
+        self.play_match(journal, winner="TERRORIST")
+
+        self.assertEqual([r.winner for r in journal.read()], ["CT", "TERRORIST"])
+        self.assertEqual(journal.records, 2)
+
+    def test_compaction_keeps_records_after_the_saved_ones(self) -> None:
+        journal = MatchJournal(self.path)
+        with mock.patch.object(match_journal, "COMPACT_AFTER_RECORDS", 2):
+            self.play_match(journal)
+            save_and_compact(journal, ["ALICE", "BOB"])
+            self.assertEqual(journal.records, 1)
+            self.play_match(journal)
+            save_and_compact(journal, ["ALICE", "BOB"])
+        self.play_match(journal, winner="TERRORIST")
+
+        lines = Path(self.path).read_text(encoding="utf-8").splitlines()
+        self.assertEqual([json.loads(line)["winner"] for line in lines], ["TERRORIST"])
+        saved = json.loads((self.dir / "player_stats.json").read_text(encoding="utf-8"))
+        self.assertEqual(saved["players"]["ALICE"], {"wins": 2, "losses": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
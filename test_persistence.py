@@ -6,6 +6,9 @@ from unittest import mock
 
 import player_elo
 import player_stats
+from checkpoint import Checkpoint, load_checkpoint, save_checkpoint
+from persistence import JsonWriter, install_writer
+from state import MatchState
 
 
 class PersistenceTests(unittest.TestCase):
@@ -64,6 +67,105 @@ class PersistenceTests(unittest.TestCase):
                 player_stats.load_targets()
                 self.assertIn("TEST_USER", player_stats.TARGETS)
 
+    def test_checkpoint_round_trips_match_state(self) -> None:
+        state = MatchState(ct_score=7, t_score=5, live_started=True)
+        state.alive_ct.update({"alice", "carol"})
+        state.past_1v1_pairs.add(("alice", "bob"))
+        state.accolades.append(("mvp", "alice", 3.0))
+        state.player_teams["alice"] = "CT"
+
+        with tempfile.TemporaryDirectory() as td:
+            path = str(Path(td) / "checkpoint.json")
+            save_checkpoint(path, Checkpoint("L0103000.log", 1234, state.to_dict()))
+            checkpoint = load_checkpoint(path)
+
+        assert checkpoint is not None
+        self.assertEqual((checkpoint.log_path, checkpoint.offset), ("L0103000.log", 1234))
+        restored = MatchState.from_dict(checkpoint.state)
+        self.assertEqual(restored.to_dict(), state.to_dict())
+        self.assertEqual(restored.past_1v1_pairs, {("alice", "bob")})
+        self.assertEqual(restored.accolades, [("mvp", "alice", 3.0)])
+
+    def test_load_checkpoint_ignores_corrupt_file(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            path = Path(td) / "checkpoint.json"
+            path.write_text("{not json", encoding="utf-8")
+            with self.assertLogs("checkpoint", level="WARNING"):
+                self.assertIsNone(load_checkpoint(str(path)))
+
+
+class JsonWriterTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.writes: list[tuple[str, object]] = []
+        self.writer = JsonWriter(window=0.2, write=lambda path, payload: self.writes.append((path, payload)))
+        install_writer(self.writer)
+        self.addCleanup(install_writer, None)
+
+    def test_burst_of_saves_becomes_one_write_per_file(self) -> None:
+        self.writer.start()
+        with mock.patch.object(player_stats, "TARGETS_FILE", "targets.json"), \
+                mock.patch.object(player_elo, "PLAYER_ELO_FILE", "elo.json"):
+            for i in range(10):
+                player_stats.TARGETS[f"PLAYER{i}"] = f"[U:1:{i}]"
+                player_stats.save_targets()
+            player_elo.save_elo()
+            self.assertEqual(self.writes, [])
+            self.writer.stop()
+
+        self.assertEqual([path for path, _ in self.writes], ["targets.json", "elo.json"])
+        self.assertEqual(len(self.writes[0][1]), len(player_stats.TARGETS))
+        self.assertEqual(self.writer.metrics.coalesced, 9)
+        player_stats.TARGETS.clear()
+
+    def test_snapshot_is_taken_at_save_time(self) -> None:
+        with mock.patch.object(player_stats, "PLAYER_STATS_FILE", "stats.json"):
+            player_stats.PLAYER_STATS.clear()
+            player_stats.PLAYER_STATS["ALICE"] = {"wins": 1, "losses": 0}
+            player_stats.save_stats()
+            player_stats.PLAYER_STATS["ALICE"]["wins"] = 2
+            self.writer.stop()
+
+        self.assertEqual(self.writes[0][1]["players"]["ALICE"]["wins"], 1)
+        player_stats.PLAYER_STATS.clear()
+
+    def test_after_writes_runs_once_queued_writes_are_done(self) -> None:
+        seen: list[int] = []
+        self.writer.submit("a.json", {"n": 1})
+        self.writer.after_writes(lambda: seen.append(len(self.writes)))
+        self.writer.submit("b.json", {"n": 2})
+        self.assertEqual(seen, [])
+
+        self.writer.flush()
+
+        self.assertEqual(seen, [2])
+
+    def test_after_writes_is_skipped_while_a_write_is_failing(self) -> None:
+        def write(path: str, payload: dict) -> None:
+            if path == "stats.json":
+                raise OSError("disk full")
+            self.writes.append((path, payload))
+
+        seen: list[str] = []
+        writer = JsonWriter(write=write)
+        writer.submit("stats.json", {"n": 1})
+        writer.submit("elo.json", {"n": 1})
+        writer.after_writes(lambda: seen.append("first"))
+        with self.assertLogs("persistence", "WARNING"):
+            writer.flush()
+        # A later batch without the failed file must not run callbacks either.
+        writer.submit("elo.json", {"n": 2})
+        writer.after_writes(lambda: seen.append("second"))
+        with self.assertLogs("persistence", "WARNING"):
+            writer.flush()
+        self.assertEqual(seen, [])
+        self.assertEqual(writer.metrics.errors, 1)
+
+        writer._write = lambda path, payload: None
+        writer.submit("stats.json", {"n": 3})
+        writer.after_writes(lambda: seen.append("third"))
+        writer.flush()
+        self.assertEqual(seen, ["third"])
+
 
 if __name__ == "__main__":
     unittest.main()
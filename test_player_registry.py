@@ -0,0 +1,77 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import player_elo
+import player_stats
+from player_registry import PLAYERS, PlayerRegistry, account_id_of
+
+
+class PlayerRegistryTests(unittest.TestCase):
+    def test_one_identity_behind_name_steam_id_and_account_id(self) -> None:
+        registry = PlayerRegistry()
+        alice = registry.observe("alice", "[U:1:1001]")
+
+        self.assertIs(registry.by_name("ALICE"), alice)
+        self.assertIs(registry.by_steam_id("[U:1:1001]"), alice)
+        self.assertIs(registry.by_account_id("1001"), alice)
+        self.assertIs(registry.get("[U:1:1001]"), alice)
+        self.assertEqual(alice.account_id, 1001)
+        self.assertIsNone(registry.observe("ghost", "STEAM_0:1:2"))
+        self.assertIsNone(account_id_of("BOT"))
+
+    def test_rename_keeps_alias_until_name_is_taken(self) -> None:
+        registry = PlayerRegistry()
+        registry.observe("alice", "[U:1:1001]")
+        alice = registry.observe("alice2", "[U:1:1001]")
+
+        self.assertEqual((alice.name, alice.aliases), ("alice2", ["alice"]))
+        self.assertIs(registry.by_name("alice"), alice)
+        bob = registry.observe("alice", "[U:1:1002]")
+        self.assertIs(registry.by_name("alice"), bob)
+        self.assertEqual(len(registry), 2)
+
+    def test_seeding_does_not_rename_known_players(self) -> None:
+        registry = PlayerRegistry()
+        registry.observe("Alice", "[U:1:1001]")
+        registry.observe("ALICE", "[U:1:1001]", rename=False)
+        registry.observe("OLDNAME", "[U:1:1001]", rename=False)
+
+        alice = registry.by_account_id(1001)
+        self.assertEqual((alice.name, alice.aliases), ("Alice", ["OLDNAME"]))
+        self.assertIs(registry.by_name("oldname"), alice)
+
+    def test_one_bot_rule(self) -> None:
+        registry = PlayerRegistry()
+        registry.observe("Botan", "[U:1:1003]")
+        eddie = registry.observe("Eddie", "BOT")
+        frank = registry.observe("Frank", "BOT")
+
+        self.assertTrue(registry.is_bot("eddie"))
+        self.assertFalse(registry.is_bot("Botan"))
+        self.assertTrue(registry.is_bot("BOT Zed"))
+        self.assertFalse(registry.is_bot("unknown"))
+        self.assertNotEqual(eddie.account_id, frank.account_id)
+        self.assertLess(eddie.account_id, 0)
+
+    def test_load_targets_seeds_registry_used_by_elo(self) -> None:
+        player_elo.PLAYER_ELO.clear()
+        self.addCleanup(PLAYERS.clear)
+        self.addCleanup(player_stats.TARGETS.clear)
+        self.addCleanup(player_elo.PLAYER_ELO.clear)
+        with tempfile.TemporaryDirectory() as td:
+            path = Path(td) / "targets.json"
+            path.write_text(json.dumps({"alice": "[U:1:1001]", "Eddie": "BOT"}), encoding="utf-8")
+            with mock.patch.object(player_stats, "TARGETS_FILE", str(path)):
+                player_stats.load_targets()
+
+        self.assertEqual(player_stats.get_steam_id("alice"), "[U:1:1001]")
+        self.assertEqual(PLAYERS.by_account_id(1001).key, "ALICE")
+        player_elo.update_elo("CT", ["alice"], ["eddie"], save=False)
+        self.assertEqual(player_elo.PLAYER_ELO, {"ALICE": 1025})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import player_elo
+import player_stats
+from match_journal import MatchJournal, build_record, replay_journal
+from player_store import SqlitePlayerStore, install_store, open_sqlite_store
+
+
+class SqlitePlayerStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.db_path = str(self.dir / "players.db")
+        for module, attr, name in (
+            (player_stats, "PLAYER_STATS_FILE", "player_stats.json"),
+            (player_stats, "TARGETS_FILE", "targets.json"),
+            (player_elo, "PLAYER_ELO_FILE", "player_elo.json"),
+        ):
+            patcher = mock.patch.object(module, attr, str(self.dir / name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(install_store, None)
+        self.addCleanup(player_stats.PLAYER_STATS.clear)
+        self.addCleanup(player_stats.TARGETS.clear)
+        self.addCleanup(player_elo.PLAYER_ELO.clear)
+        self.addCleanup(player_stats.JOURNAL_SEQ.clear)
+        self.addCleanup(player_elo.JOURNAL_SEQ.clear)
+
+    def open_store(self) -> SqlitePlayerStore:
+        store = open_sqlite_store(self.db_path)
+        self.addCleanup(store.close)
+        return store
+
+    def test_first_open_imports_schema_v2_json_once(self) -> None:
+        (self.dir / "player_stats.json").write_text(
+            json.dumps({"schema_version": 2, "players": {"ALICE": {"wins": 3, "losses": 1}}}),
+            encoding="utf-8",
+        )
+        (self.dir / "player_elo.json").write_text(
+            json.dumps({"schema_version": 2, "ratings": {"ALICE": 1050}}), encoding="utf-8"
+        )
+        (self.dir / "targets.json").write_text(json.dumps({"ALICE": "[U:1:1001]"}), encoding="utf-8")
+
+        self.open_store().close()
+        (self.dir / "player_elo.json").write_text(json.dumps({"ALICE": 1}), encoding="utf-8")
+        self.open_store()
+        player_stats.load_stats()
+        player_elo.load_elo()
+        player_stats.load_targets()
+
+        self.assertEqual(player_stats.PLAYER_STATS, {"ALICE": {"wins": 3, "losses": 1}})
+        self.assertEqual(player_elo.PLAYER_ELO, {"ALICE": 1050})
+        self.assertEqual(player_stats.TARGETS, {"ALICE": "[U:1:1001]"})
+
+    def test_migration_keeps_the_journal_position_of_the_json_snapshots(self) -> None:
+        journal_path = str(self.dir / "match_journal.jsonl")
+        journal = MatchJournal(journal_path)
+        for winner in ("CT", "TERRORIST"):
+            stats_before = {"ALICE": dict(player_stats.PLAYER_STATS.get("ALICE", {}))}
+            elo_before = {"ALICE": player_elo.get_elo("ALICE")}
+            row = player_stats.PLAYER_STATS.setdefault("ALICE", {"wins": 0, "losses": 0})
+            row["wins" if winner == "CT" else "losses"] += 1
+            player_elo.update_elo(winner, ["alice"], [], save=False)
+            journal.append(build_record(winner, "de_mirage", (13, 5), ["alice"], [], stats_before, elo_before))
+            if winner == "CT":
+                # Only the first match reaches the JSON snapshots.
+                player_stats.save_stats()
+                player_elo.save_elo()
+
+        self.open_store()
+        player_stats.load_stats()
+        player_elo.load_elo()
+        replay_journal(MatchJournal(journal_path))
+
+        self.assertEqual(player_stats.PLAYER_STATS["ALICE"], {"wins": 1, "losses": 1})
+        self.assertEqual(player_elo.PLAYER_ELO, {"ALICE": 1000})
+        self.assertEqual(player_stats.JOURNAL_SEQ, {journal_path: 2})
+
+    def test_save_upserts_only_named_players(self) -> None:
+        store = self.open_store()
+        player_stats.PLAYER_STATS.update({f"P{i}": {"wins": 0, "losses": 0} for i in range(100)})
+        player_stats.save_stats()
+        player_stats.PLAYER_STATS["P1"]["wins"] = 1
+        player_stats.PLAYER_STATS["P2"]["wins"] = 5  # changed but not saved
+
+        with mock.patch.object(store, "_upsert_stats", wraps=store._upsert_stats) as upsert:
+            player_stats.save_stats(["P1", "GHOST"])
+
+        self.assertEqual(list(upsert.call_args.args[0]), ["P1"])
+        self.assertEqual(store.load_stats()["P1"]["wins"], 1)
+        self.assertEqual(store.load_stats()["P2"]["wins"], 0)
+        self.assertFalse((self.dir / "player_stats.json").exists())
+
+    def test_update_elo_saves_match_players_in_wal_database(self) -> None:
+        self.open_store()
+        player_elo.PLAYER_ELO.update({"ALICE": 1000, "BOB": 1000, "CAROL": 1200})
+
+        player_elo.update_elo("CT", ["alice"], ["bob"])
+
+        with sqlite3.connect(self.db_path) as other:
+            self.assertEqual(other.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            ratings = dict(other.execute("SELECT name, rating FROM player_elo").fetchall())
+        self.assertEqual(ratings, {"ALICE": 1025, "BOB": 975})
+
+    def test_controllers_sharing_the_file_keep_each_others_results(self) -> None:
+        first = SqlitePlayerStore(self.db_path)
+        second = SqlitePlayerStore(self.db_path)
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+        first.save_stats({"ALICE": {"wins": 2, "losses": 0}})
+        first.save_elo({"ALICE": 1050})
+        second_stats = second.load_stats()
+        second_elo = second.load_elo()
+
+        # Both record a match for ALICE from their own in-memory values.
+        first.save_stats({"ALICE": {"wins": 3, "losses": 0}})
+        first.save_elo({"ALICE": 1075})
+        merged = second.save_stats(
+            {"ALICE": {**second_stats["ALICE"], "losses": 1, "last_omikuji_date": "2026-01-03"}}
+        )
+        second.save_elo({"ALICE": second_elo["ALICE"] - 25})
+
+        self.assertEqual(merged["ALICE"], {"wins": 3, "losses": 1, "last_omikuji_date": "2026-01-03"})
+        self.assertEqual(first.load_stats(), {"ALICE": {"wins": 3, "losses": 1, "last_omikuji_date": "2026-01-03"}})
+        self.assertEqual(first.load_elo(), {"ALICE": 1050})
+
+
+if __name__ == "__main__":
+    unittest.main()
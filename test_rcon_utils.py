@@ -0,0 +1,100 @@
+import threading
+import time
+import unittest
+
+from rcon.exceptions import WrongPassword  # type: ignore
+
+from fake_rcon_server import FakeRconServer
+from rcon_utils import RconSession
+
+
+class RconSessionTests(unittest.TestCase):
+    def make_session(self, server: FakeRconServer, password: str = "secret") -> RconSession:
+        session = RconSession(server.host, server.port, password, timeout=2.0)
+        self.addCleanup(session.close)
+        return session
+
+    def test_commands_share_one_connection(self) -> None:
+        with FakeRconServer(handler=lambda cmd: f"ok {cmd}") as server:
+            session = self.make_session(server)
+            outputs = [session.run(f'say "{i}"') for i in range(5)]
+
+        self.assertEqual(outputs, [f'ok say "{i}"' for i in range(5)])
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(session.connects, 1)
+
+    def test_reconnects_after_server_drops_connection(self) -> None:
+        with FakeRconServer(handler=lambda cmd: "pong") as server:
+            session = self.make_session(server)
+            self.assertEqual(session.run("echo 1"), "pong")
+            server.drop_clients()
+            self.assertEqual(session.run("echo 2"), "pong")
+
+        self.assertEqual(session.connects, 2)
+        self.assertEqual(server.commands, ["echo 1", "echo 2"])
+
+    def test_wrong_password_is_not_retried(self) -> None:
+        with FakeRconServer() as server:
+            session = self.make_session(server, password="nope")
+            with self.assertRaises(WrongPassword):
+                session.run("status")
+
+        self.assertEqual(server.connections, 1)
+        self.assertFalse(session.connected)
+
+    def test_fragmented_response_leaves_connection_usable(self) -> None:
+        big = "x" * 5000
+        with FakeRconServer(handler=lambda cmd: big if cmd == "status" else "small") as server:
+            session = self.make_session(server)
+            self.assertEqual(session.run("status"), big)
+            self.assertEqual(session.run("echo"), "small")
+
+        self.assertEqual(server.connections, 1)
+
+    def test_run_many_returns_outputs_in_order(self) -> None:
+        big = "y" * 5000
+        with FakeRconServer(handler=lambda cmd: big if cmd == "status" else f"ok {cmd}") as server:
+            session = self.make_session(server)
+            outputs = session.run_many(["a", "status", "b", "status"])
+            self.assertEqual(session.run("c"), "ok c")
+
+        self.assertEqual(outputs, ["ok a", big, "ok b", big])
+        self.assertEqual(server.commands, ["a", "status", "b", "status", "c"])
+        self.assertEqual(server.connections, 1)
+
+    def test_run_many_costs_one_round_trip(self) -> None:
+        latency = 0.05
+        commands = [f"mp_team_assign [U:1:{i}] ct" for i in range(10)]
+        with FakeRconServer(latency=latency) as server:
+            session = self.make_session(server)
+            session.run("echo warmup")
+            started = time.perf_counter()
+            session.run_many(commands)
+            elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, latency * 4)
+        self.assertEqual(server.commands[1:], commands)
+
+    def test_concurrent_callers_get_their_own_responses(self) -> None:
+        results: dict[int, str] = {}
+        with FakeRconServer(handler=lambda cmd: cmd.upper()) as server:
+            session = self.make_session(server)
+
+            def worker(n: int) -> None:
+                for i in range(20):
+                    results[n * 100 + i] = session.run(f"cmd{n}_{i}")
+
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(len(results), 80)
+        for key, output in results.items():
+            self.assertEqual(output, f"CMD{key // 100}_{key % 100}")
+        self.assertEqual(server.connections, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from controller import parse_args
+from replay import parse_speed, run_replay
+from runtime_config import RuntimeConfig
+
+MATCH_LOG = """\
+L 01/03/2026 - 18:18:00: Loading map "de_mirage"
+L 01/03/2026 - 18:18:01: "alice<2><[U:1:1001]><>" connected, address ""
+L 01/03/2026 - 18:18:02: "alice<2><[U:1:1001]><Unassigned>" joined team "CT"
+L 01/03/2026 - 18:18:03: "bob<3><[U:1:1002]><Unassigned>" joined team "TERRORIST"
+L 01/03/2026 - 18:18:04: "alice<2><[U:1:1001]><CT>" say "!coin"
+L 01/03/2026 - 18:18:04: "alice<2><[U:1:1001]><CT>" say "!rdy"
+L 01/03/2026 - 18:18:04: "bob<3><[U:1:1002]><TERRORIST>" say "!rdy"
+L 01/03/2026 - 18:18:05: server cvar "mp_freezetime" = "15"
+L 01/03/2026 - 18:18:06: World triggered "Round_Start"
+L 01/03/2026 - 18:18:07: "alice<2><[U:1:1001]><CT>" [1 2 3] killed "bob<3><[U:1:1002]><TERRORIST>" [4 5 6] with "ak47" (headshot)
+L 01/03/2026 - 18:18:08: Game Over: competitive mg_active de_mirage score 13:5 after 35 min
+"""
+
+
+class ReplayTests(unittest.TestCase):
+    def test_parse_speed(self) -> None:
+        self.assertIsNone(parse_speed("max"))
+        self.assertEqual(parse_speed("4"), 4.0)
+        with self.assertRaises(ValueError):
+            parse_speed("0")
+
+    def test_invalid_speed_is_a_usage_error(self) -> None:
+        self.assertEqual(parse_args(["--speed", "4"]).speed, 4.0)
+        self.assertIsNone(parse_args([]).speed)
+        with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit) as cm:
+            parse_args(["--speed", "fast"])
+        self.assertEqual(cm.exception.code, 2)
+        self.assertIn("expected a positive number or 'max'", stderr.getvalue())
+
+    def test_replay_records_chat_and_rcon_without_touching_live_files(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            log_path = os.path.join(td, "match.log")
+            with open(log_path, "w", encoding="utf-8") as f:
+                f.write(MATCH_LOG)
+
+            cwd = os.getcwd()
+            os.chdir(td)
+            try:
+                with mock.patch("controller.random.choice", side_effect=lambda seq: seq[0]):
+                    report = run_replay(log_path, settings=RuntimeConfig(available_maps=["dust2"]))
+                created = sorted(os.listdir(td))
+            finally:
+                os.chdir(cwd)
+
+        self.assertEqual(created, ["match.log"])
+        self.assertEqual(report.lines, 11)
+        self.assertEqual(report.matches_finished, 1)
+        self.assertIn("status", report.rcon_commands)
+        self.assertTrue(any("コイントス結果" in m for m in report.chat_messages))
+        self.assertIn("_handle_chat_command_event", report.handler_timings)
+        self.assertEqual(report.handler_timings["_handle_map_change_event"].calls, 1)
+
+        out = io.StringIO()
+        report.print(out)
+        self.assertIn("lines/sec", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from roster import Roster
+
+
+class RosterTests(unittest.TestCase):
+    def test_rename_updates_cached_names_without_rejoining(self) -> None:
+        roster = Roster()
+        self.assertTrue(roster.join("alice", "[U:1:1001]", 10.0))
+        names = roster.names
+
+        self.assertFalse(roster.join("alice2", "[U:1:1001]", 20.0))
+
+        self.assertEqual(names, {"alice"})
+        self.assertEqual(roster.names, {"alice2"})
+        self.assertEqual(roster.entries()[0].joined_at, 10.0)
+
+    def test_bots_are_ignored_and_history_is_bounded(self) -> None:
+        roster = Roster(history=2)
+        self.assertFalse(roster.join("Eddie", "BOT", 0.0))
+        for i in range(4):
+            roster.join(f"p{i}", f"[U:1:{i}]", float(i))
+            roster.leave(f"[U:1:{i}]", float(i) + 0.5)
+
+        self.assertEqual(len(roster), 0)
+        self.assertEqual([e.name for e in roster.recently_left()], ["p2", "p3"])
+        self.assertIsNone(roster.leave("[U:1:9]", 9.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from scheduler import Scheduler
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SchedulerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.scheduler = Scheduler(clock=self.clock)
+        self.calls: list[str] = []
+
+    def test_runs_due_timers_in_time_then_schedule_order(self) -> None:
+        self.scheduler.call_later(2, self.calls.append, "late")
+        self.scheduler.call_later(1, self.calls.append, "first")
+        self.scheduler.call_later(1, self.calls.append, "second")
+
+        self.assertEqual(self.scheduler.run_due(), 0)
+        self.assertEqual(self.scheduler.next_delay(), 1.0)
+        self.clock.now = 1.5
+        self.assertEqual(self.scheduler.run_due(), 2)
+        self.assertEqual(self.calls, ["first", "second"])
+        self.assertEqual(self.scheduler.next_delay(), 0.5)
+
+    def test_repeating_timer_does_not_burst_after_a_stall(self) -> None:
+        timer = self.scheduler.call_every(1, self.calls.append, "tick")
+
+        self.clock.now = 1.0
+        self.scheduler.run_due()
+        self.clock.now = 5.5
+        self.scheduler.run_due()
+        self.assertEqual(self.calls, ["tick", "tick"])
+        self.assertEqual(self.scheduler.next_delay(), 1.0)
+
+        timer.cancel()
+        self.assertIsNone(self.scheduler.next_delay())
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_failing_action_does_not_stop_others(self) -> None:
+        def boom() -> None:
+            raise RuntimeError("boom")
+
+        self.scheduler.call_later(0, boom)
+        self.scheduler.call_later(0, self.calls.append, "after")
+
+        with self.assertLogs("scheduler", level="ERROR"):
+            self.assertEqual(self.scheduler.run_due(), 2)
+        self.assertEqual(self.calls, ["after"])
+
+
+if __name__ == "__main__":
+    unittest.main()
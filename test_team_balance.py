@@ -0,0 +1,88 @@
+import itertools
+import random
+import time
+import unittest
+
+import team_balance
+from team_balance import EXACT_MAX_PLAYERS, best_split, top_splits
+
+
+def brute_force_diffs(ratings: list[int]) -> list[int]:
+    """Diff of every split, each split counted once (mirror images dropped)."""
+    n = len(ratings)
+    total = sum(ratings)
+    teams = itertools.combinations(range(n), n // 2)
+    if n % 2 == 0:
+        teams = (team for team in teams if 0 in team)
+    return sorted(abs(total - 2 * sum(ratings[i] for i in team)) for team in teams)
+
+
+def brute_force_diff(ratings: list[int]) -> int:
+    return brute_force_diffs(ratings)[0]
+
+
+class TeamBalanceTests(unittest.TestCase):
+    def test_exact_split_matches_brute_force(self) -> None:
+        rng = random.Random(7)
+        for n in range(2, 13):
+            ratings = {f"P{i}": rng.randint(700, 1400) for i in range(n)}
+            split = best_split(ratings, ratings.__getitem__)
+
+            self.assertTrue(split.exact)
+            self.assertEqual(split.diff, brute_force_diff(list(ratings.values())))
+            self.assertEqual(sorted(split.team1 + split.team2), sorted(ratings))
+            self.assertEqual(len(split.team1), n // 2)
+
+    def test_twenty_players_in_milliseconds(self) -> None:
+        rng = random.Random(1)
+        ratings = {f"P{i}": rng.randint(700, 1400) for i in range(20)}
+
+        started = time.perf_counter()
+        split = best_split(ratings, ratings.__getitem__)
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.5)
+        self.assertLessEqual(split.diff, 1)
+        self.assertEqual((len(split.team1), len(split.team2)), (10, 10))
+
+    def test_large_roster_uses_budgeted_search(self) -> None:
+        rng = random.Random(3)
+        n = EXACT_MAX_PLAYERS + 15
+        ratings = {f"P{i}": rng.randint(700, 1400) for i in range(n)}
+
+        split = best_split(ratings, ratings.__getitem__, budget=0.05)
+
+        self.assertFalse(split.exact)
+        self.assertEqual((len(split.team1), len(split.team2)), (n // 2, n - n // 2))
+        self.assertLessEqual(split.diff, 50)
+        self.assertEqual(split.sum1, sum(ratings[p] for p in split.team1))
+
+    def test_top_splits_are_the_k_most_even_splits(self) -> None:
+        rng = random.Random(11)
+        for n in (4, 7, 10, 13):
+            ratings = {f"P{i}": rng.randint(700, 1400) for i in range(n)}
+            splits = top_splits(ratings, ratings.__getitem__, k=6)
+
+            self.assertEqual([s.diff for s in splits], brute_force_diffs(list(ratings.values()))[:6])
+            self.assertEqual(len({frozenset(s.team1) for s in splits}), len(splits))
+
+    @unittest.skipIf(team_balance.np is None, "numpy not installed")
+    def test_numpy_path_matches_pure_python(self) -> None:
+        rng = random.Random(5)
+        for n in (6, 11, 16):
+            ratings = {f"P{i}": rng.randint(700, 1400) for i in range(n)}
+            with_numpy = top_splits(ratings, ratings.__getitem__, k=5, use_numpy=True)
+            without = top_splits(ratings, ratings.__getitem__, k=5)
+
+            self.assertEqual([s.diff for s in with_numpy], [s.diff for s in without])
+
+    def test_each_rating_is_looked_up_once(self) -> None:
+        calls: list[str] = []
+
+        best_split(["a", "b", "c", "d"], lambda p: calls.append(p) or 1000)
+
+        self.assertEqual(sorted(calls), ["a", "b", "c", "d"])
+
+
+if __name__ == "__main__":
+    unittest.main()